@@ -10,6 +10,7 @@ export class S3BucketStack extends cdk.Stack {
   public readonly evalResultsBucket: s3.Bucket;
   public readonly evalTestCasesBucket: s3.Bucket;
   public readonly ragasDependenciesBucket: s3.Bucket;
+  public readonly sessionArchiveBucket: s3.Bucket;
 
   constructor(scope: Construct, id: string) {
     super(scope, id);
@@ -50,6 +51,13 @@ export class S3BucketStack extends cdk.Stack {
       versioned: true,
       removalPolicy: cdk.RemovalPolicy.DESTROY,
       autoDeleteObjects: true,
+      // Export caches are rebuilt after a day, and every refresh writes a new CSV and manifest
+      // version, so expire them once their presigned links (one hour) are no longer in use
+      lifecycleRules: [{
+        prefix: 'export-cache/',
+        expiration: cdk.Duration.days(2),
+        noncurrentVersionExpiration: cdk.Duration.days(1)
+      }],
       cors: [{
         allowedMethods: [s3.HttpMethods.GET,s3.HttpMethods.POST,s3.HttpMethods.PUT,s3.HttpMethods.DELETE],
         allowedOrigins: ['*'], 
@@ -87,6 +95,15 @@ export class S3BucketStack extends cdk.Stack {
       }]
     });
 
+    // Sessions moved out of DynamoDB by the session handler's archival job
+    this.sessionArchiveBucket = new s3.Bucket(scope, 'SessionArchiveBucket', {
+      versioned: true,
+      encryption: s3.BucketEncryption.S3_MANAGED,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      autoDeleteObjects: true,
+      blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+    });
+
     this.ragasDependenciesBucket = new s3.Bucket(scope, 'RagasDependenciesBucket', {
       versioned: true,
       removalPolicy: cdk.RemovalPolicy.DESTROY,
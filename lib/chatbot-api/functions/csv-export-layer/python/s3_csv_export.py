@@ -0,0 +1,270 @@
+"""
+CSV exports streamed to S3 and the cache of finished exports, deployed as a Lambda layer. The
+session handler writes session exports, the KPI handler interaction downloads and the
+feedback handler feedback downloads through it.
+
+S3MultipartCsvWriter buffers rows from several threads and uploads a multipart part whenever
+the buffer reaches part_size, so memory stays bounded by roughly one part per concurrent
+writer. An upload can be checkpointed and resumed by a later invocation. copy_with_appended
+extends an existing export into a new object server side with UploadPartCopy, so only the
+appended bytes are uploaded.
+
+Finished exports are cached per range under EXPORT_CACHE_PREFIX: a JSON manifest (keyed by a
+hash of the export type and its parameters) names the CSV and the high-water mark it covers.
+A later request for the same range tops the CSV up with the rows written since that mark.
+Rows newer than EXPORT_CACHE_SETTLE_SECONDS are left for the next refresh so queued writes
+are not skipped, and a manifest older than EXPORT_CACHE_MAX_AGE is ignored so the export is
+rebuilt to pick up edits and deletes. A refresh writes the topped-up CSV to a new key under
+EXPORT_CACHE_FILES_PREFIX and swaps the manifest with a conditional put, so a CSV is never
+rewritten while it is being served.
+
+Usage:
+    writer = S3MultipartCsvWriter(s3, bucket, key, ["Timestamp", "Username"])
+    writer.write_rows([["2024-05-01T10:00:00", "user"]])
+    etag = writer.complete()
+    etag = copy_with_appended(s3, bucket, key, new_key, b'"2024-05-02T09:00:00","user"\r\n')
+
+    cache_key = export_cache_key('sessions', {'start_time': ..., 'end_time': ...})
+    manifest, etag = load_export_cache(s3, bucket, cache_key)
+    manifest = swap_export_cache(s3, bucket, cache_key, refreshed, etag, manifest['file_name'])
+"""
+
+import csv
+import hashlib
+import io
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from botocore.exceptions import ClientError
+from structured_log import get_logger
+
+# structured_log comes from the logging layer, attached to every function using this one
+log = get_logger("s3-csv-export")
+
+# Smallest part S3 accepts for every part of a multipart upload but the last
+MIN_PART_SIZE = 5 * 1024 * 1024
+# UploadPartCopy parts are capped at 5 GiB; existing objects are copied in pieces of at most this
+MAX_COPY_PART_SIZE = 1024 ** 3
+
+EXPORT_CACHE_PREFIX = "export-cache/"
+EXPORT_CACHE_FILES_PREFIX = EXPORT_CACHE_PREFIX + "files/"
+EXPORT_CACHE_SETTLE_SECONDS = 60
+EXPORT_CACHE_MAX_AGE = timedelta(hours=24)
+
+
+class S3MultipartCsvWriter:
+    """
+    Stream CSV rows into an S3 multipart upload from several threads. csv_options are passed to
+    csv.writer (e.g. quoting, lineterminator) for the header and every row.
+    """
+
+    def __init__(self, s3, bucket, key, header=None, upload_id=None, parts=None, next_part_number=1,
+                 pending='', part_size=MIN_PART_SIZE, **csv_options):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self.csv_options = csv_options
+        self.lock = threading.Lock()
+        self.buffer = io.StringIO()
+        self.buffer.write(pending)
+        self.next_part_number = next_part_number
+        self.parts = list(parts or [])
+        self.rows_written = 0
+        if upload_id:
+            # Resuming an upload checkpointed by a previous invocation
+            self.upload_id = upload_id
+        else:
+            self.upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType='text/csv')['UploadId']
+            if header:
+                csv.writer(self.buffer, **csv_options).writerow(header)
+
+    def checkpoint(self):
+        """
+        Snapshot the upload so another invocation can resume it. Only call this while
+        no thread is writing; the returned pending text has not been uploaded yet.
+        """
+        with self.lock:
+            return {
+                'upload_id': self.upload_id,
+                'parts': sorted(self.parts, key=lambda p: p['PartNumber']),
+                'next_part_number': self.next_part_number
+            }, self.buffer.getvalue()
+
+    def write_rows(self, rows):
+        """Append rows as one contiguous block so a session's rows are never interleaved."""
+        if not rows:
+            return
+        chunk = io.StringIO()
+        csv.writer(chunk, **self.csv_options).writerows(rows)
+        part = None
+        with self.lock:
+            self.buffer.write(chunk.getvalue())
+            self.rows_written += len(rows)
+            if self.buffer.tell() >= self.part_size:
+                part = self._take_part()
+        if part:
+            self._upload_part(*part)
+
+    def _take_part(self):
+        body = self.buffer.getvalue().encode('utf-8')
+        part_number = self.next_part_number
+        self.next_part_number += 1
+        self.buffer = io.StringIO()
+        return part_number, body
+
+    def _upload_part(self, part_number, body):
+        response = self.s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            PartNumber=part_number,
+            Body=body
+        )
+        with self.lock:
+            self.parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    def complete(self):
+        """Upload whatever is left as the final (possibly small) part, finish the upload and return its ETag."""
+        with self.lock:
+            part = self._take_part()
+        self._upload_part(*part)
+        return self.s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self.upload_id,
+            MultipartUpload={'Parts': sorted(self.parts, key=lambda p: p['PartNumber'])}
+        )['ETag']
+
+    def abort(self):
+        """Abort the upload so its parts are not billed; returns False if S3 refused"""
+        try:
+            self.s3.abort_multipart_upload(Bucket=self.bucket, Key=self.key, UploadId=self.upload_id)
+        except ClientError:
+            return False
+        return True
+
+
+def copy_with_appended(s3, bucket, source_key, key, body):
+    """
+    Write the object at source_key followed by body (bytes) to key and return the new ETag.
+    Objects under MIN_PART_SIZE are copied in one put; larger ones are copied server side with
+    UploadPartCopy, in even pieces of at most MAX_COPY_PART_SIZE, and body is the last part.
+    """
+    size = s3.head_object(Bucket=bucket, Key=source_key)['ContentLength']
+    if size < MIN_PART_SIZE:
+        existing = s3.get_object(Bucket=bucket, Key=source_key)['Body'].read()
+        return s3.put_object(Bucket=bucket, Key=key, Body=existing + body, ContentType='text/csv')['ETag']
+
+    upload_id = s3.create_multipart_upload(Bucket=bucket, Key=key, ContentType='text/csv')['UploadId']
+    try:
+        copy_parts = -(-size // MAX_COPY_PART_SIZE)
+        copy_size = -(-size // copy_parts)
+        parts = []
+        for index in range(copy_parts):
+            first_byte = index * copy_size
+            last_byte = min(size, first_byte + copy_size) - 1
+            response = s3.upload_part_copy(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=index + 1,
+                CopySource={'Bucket': bucket, 'Key': source_key},
+                CopySourceRange=f"bytes={first_byte}-{last_byte}"
+            )
+            parts.append({'PartNumber': index + 1, 'ETag': response['CopyPartResult']['ETag']})
+        response = s3.upload_part(Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=copy_parts + 1, Body=body)
+        parts.append({'PartNumber': copy_parts + 1, 'ETag': response['ETag']})
+        return s3.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+        )['ETag']
+    except ClientError:
+        s3.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+        raise
+
+
+def export_cache_key(export_type, params):
+    digest = hashlib.sha256(json.dumps([export_type, params], sort_keys=True).encode('utf-8')).hexdigest()
+    return f"{EXPORT_CACHE_PREFIX}{export_type}/{digest}.json"
+
+
+def export_high_water_mark(now=datetime.now):
+    """Newest timestamp a refresh may include; now is the clock the export's rows are stamped with"""
+    return (now() - timedelta(seconds=EXPORT_CACHE_SETTLE_SECONDS)).isoformat()
+
+
+def load_export_cache(s3, bucket, cache_key, now=datetime.now):
+    """
+    (manifest, manifest ETag) for an export, or (None, None) when there is none, it has
+    expired or its CSV is gone from the bucket. Manifests recording the CSV's etag are also
+    dropped once that file is overwritten, for exports whose file names are shared between
+    ranges. now is the clock built_at was stamped with.
+    """
+    try:
+        response = s3.get_object(Bucket=bucket, Key=cache_key)
+        manifest = json.loads(response['Body'].read())
+        if datetime.fromisoformat(manifest['built_at']) < now() - EXPORT_CACHE_MAX_AGE:
+            return None, None
+        file_etag = s3.head_object(Bucket=bucket, Key=manifest['file_name'])['ETag']
+        if manifest.get('etag', file_etag) != file_etag:
+            return None, None
+    except ClientError as error:
+        if error.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None, None
+        raise
+    return manifest, response['ETag']
+
+
+def _json_number(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def save_export_cache(s3, bucket, cache_key, manifest, if_match=None):
+    """
+    Write an export's cache manifest. With if_match the write only succeeds if the manifest
+    is still the one loaded with that ETag; returns False when another refresh got there first.
+    """
+    put_params = {
+        'Bucket': bucket,
+        'Key': cache_key,
+        'Body': json.dumps(manifest, default=_json_number),
+        'ContentType': 'application/json'
+    }
+    if if_match:
+        put_params['IfMatch'] = if_match
+    try:
+        s3.put_object(**put_params)
+    except ClientError as error:
+        if error.response['Error']['Code'] in ('PreconditionFailed', 'ConditionalRequestConflict'):
+            return False
+        raise
+    return True
+
+
+def export_cache_file_key(file_name):
+    """New key for a refreshed copy of a cached CSV, keeping its file name for the download"""
+    return f"{EXPORT_CACHE_FILES_PREFIX}{uuid.uuid4().hex}/{file_name.rsplit('/', 1)[-1]}"
+
+
+def swap_export_cache(s3, bucket, cache_key, manifest, manifest_etag, previous_file_name, now=datetime.now):
+    """
+    Save a refreshed manifest if no other refresh replaced it since it was loaded. Returns
+    the manifest to serve: this one, or the one that won, whose copy is then served instead.
+    """
+    if save_export_cache(s3, bucket, cache_key, manifest, if_match=manifest_etag):
+        return manifest
+    current, _ = load_export_cache(s3, bucket, cache_key, now=now)
+    if current is None:
+        return manifest
+    if manifest['file_name'] != previous_file_name:
+        # The orphaned copy also expires with the export-cache/ lifecycle rule
+        try:
+            s3.delete_object(Bucket=bucket, Key=manifest['file_name'])
+        except ClientError as error:
+            log.warning("Failed to delete superseded export copy", file_name=manifest['file_name'], error=str(error))
+    return current
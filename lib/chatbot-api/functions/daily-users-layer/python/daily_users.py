@@ -0,0 +1,182 @@
+"""
+Per-day distinct user rollups, deployed as a Lambda layer. The session handler records a user
+when they create a session and the KPI handler merges the days of a chart range.
+
+The rollup table holds one item per UTC day, keyed by `pk_date` (YYYY-MM-DD):
+- `users`: String Set of the day's user IDs while it has at most EXACT_USERS_MAX of them
+- `sketch`: zlib-compressed HyperLogLog registers once it grows past that, with `version`
+  for optimistic concurrency on the read-modify-write of the registers
+Sets merge by union and sketches by register-wise max, so recording a user twice is harmless
+(backfills can be re-run) and distinct counts over weeks or months merge the days' items.
+
+Usage:
+    record_users(rollup_table, "2024-05-01", [user_id])
+    items = load_days(dynamodb, ROLLUP_TABLE, ["2024-05-01", "2024-05-02"])
+    count = distinct_users(items.values())
+"""
+
+import hashlib
+import math
+import zlib
+
+from botocore.exceptions import ClientError
+from dynamodb_batch import batch_get_keys
+
+# 2^12 one-byte registers: about 1.6% standard error, under 2 KB per day once compressed
+HLL_PRECISION = 12
+HLL_REGISTERS = 1 << HLL_PRECISION
+# A day keeps an exact set of user IDs up to this size, about the size of its sketch
+EXACT_USERS_MAX = 100
+# Attempts at a conditional rollup write before giving up on a contended day
+ROLLUP_CONFLICT_RETRIES = 5
+
+
+class HyperLogLog:
+    def __init__(self, registers=None):
+        self.registers = bytearray(registers) if registers is not None else bytearray(HLL_REGISTERS)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(zlib.decompress(data))
+
+    def to_bytes(self):
+        return zlib.compress(bytes(self.registers))
+
+    def add(self, user_id):
+        """Add a user ID; returns whether any register changed"""
+        hashed = int.from_bytes(hashlib.sha1(user_id.encode('utf-8')).digest()[:8], 'big')
+        index = hashed >> (64 - HLL_PRECISION)
+        remainder = hashed & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = (64 - HLL_PRECISION) - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            return True
+        return False
+
+    def merge(self, other):
+        self.registers = bytearray(max(pair) for pair in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / HLL_REGISTERS)
+        estimate = alpha * HLL_REGISTERS * HLL_REGISTERS / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        # Linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * HLL_REGISTERS and zeros:
+            estimate = HLL_REGISTERS * math.log(HLL_REGISTERS / zeros)
+        return int(round(estimate))
+
+
+def _conditional_check_failed(error):
+    return error.response['Error']['Code'] == 'ConditionalCheckFailedException'
+
+
+def _add_to_sketch(table, day, user_ids):
+    """Fold user IDs into a day's sketch, writing only if a register changed"""
+    for _ in range(ROLLUP_CONFLICT_RETRIES):
+        item = table.get_item(
+            Key={'pk_date': day},
+            ProjectionExpression='sketch, version',
+            ConsistentRead=True
+        )['Item']
+        sketch = HyperLogLog.from_bytes(item['sketch'].value)
+        changed = [sketch.add(user_id) for user_id in user_ids]
+        if not any(changed):
+            return
+        try:
+            table.update_item(
+                Key={'pk_date': day},
+                UpdateExpression="SET sketch = :sketch, version = version + :one",
+                ConditionExpression="version = :version",
+                ExpressionAttributeValues={':sketch': sketch.to_bytes(), ':one': 1, ':version': item['version']}
+            )
+            return
+        except ClientError as error:
+            if not _conditional_check_failed(error):
+                raise
+    raise RuntimeError(f"Gave up updating the user sketch for {day} after {ROLLUP_CONFLICT_RETRIES} conflicts")
+
+
+def _promote_to_sketch(table, day):
+    """
+    Replace a day's user set with a sketch. The write is conditioned on the set size read,
+    so users added concurrently are never dropped with the set.
+    """
+    for _ in range(ROLLUP_CONFLICT_RETRIES):
+        item = table.get_item(Key={'pk_date': day}, ConsistentRead=True)['Item']
+        if 'sketch' in item:
+            return
+        users = item.get('users', set())
+        sketch = HyperLogLog()
+        for user_id in users:
+            sketch.add(user_id)
+        try:
+            table.update_item(
+                Key={'pk_date': day},
+                UpdateExpression="SET sketch = :sketch, version = :one REMOVE #users",
+                ConditionExpression="attribute_not_exists(sketch) AND size(#users) = :count",
+                ExpressionAttributeNames={'#users': 'users'},
+                ExpressionAttributeValues={':sketch': sketch.to_bytes(), ':one': 1, ':count': len(users)}
+            )
+            return
+        except ClientError as error:
+            if not _conditional_check_failed(error):
+                raise
+    raise RuntimeError(f"Gave up converting {day} to a user sketch after {ROLLUP_CONFLICT_RETRIES} conflicts")
+
+
+def record_users(table, day, user_ids):
+    """
+    Count user IDs in a day's rollup. While the day is an exact set this is a single atomic
+    ADD; the set is converted to a sketch once it grows past EXACT_USERS_MAX.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    try:
+        response = table.update_item(
+            Key={'pk_date': day},
+            UpdateExpression="ADD #users :users",
+            ConditionExpression="attribute_not_exists(sketch)",
+            ExpressionAttributeNames={'#users': 'users'},
+            ExpressionAttributeValues={':users': user_ids},
+            ReturnValues='ALL_NEW'
+        )
+    except ClientError as error:
+        if not _conditional_check_failed(error):
+            raise
+        _add_to_sketch(table, day, user_ids)
+        return
+    if len(response['Attributes']['users']) > EXACT_USERS_MAX:
+        _promote_to_sketch(table, day)
+
+
+def load_days(dynamodb, table_name, days):
+    """BatchGetItem the rollup items of the given days; returns {day: item} for days that have one"""
+    items = batch_get_keys(
+        dynamodb,
+        table_name,
+        [{'pk_date': day} for day in days],
+        ProjectionExpression='pk_date, #users, sketch',
+        ExpressionAttributeNames={'#users': 'users'}
+    )
+    return {item['pk_date']: item for item in items}
+
+
+def distinct_users(items):
+    """
+    Distinct users across rollup items: exact when none of them has been converted to a
+    sketch, otherwise the estimate of their merged sketches plus the exact sets.
+    """
+    users = set()
+    sketch = None
+    for item in items:
+        users |= item.get('users', set())
+        if 'sketch' in item:
+            day_sketch = HyperLogLog.from_bytes(item['sketch'].value)
+            sketch = day_sketch if sketch is None else sketch.merge(day_sketch)
+    if sketch is None:
+        return len(users)
+    for user_id in users:
+        sketch.add(user_id)
+    return sketch.count()
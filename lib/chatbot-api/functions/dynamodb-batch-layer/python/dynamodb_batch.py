@@ -0,0 +1,54 @@
+"""
+BatchGetItem with bounded retries, deployed as a Lambda layer. DynamoDB returns the keys it
+could not read under a throttled table as UnprocessedKeys; these are retried with
+exponential backoff up to BATCH_MAX_RETRIES times before the call fails, so a hot table
+slows a request down instead of spinning it until the Lambda timeout.
+
+`dynamodb` is either the boto3 resource or its low-level client; the items come back in
+that interface's format.
+
+Usage:
+    items = batch_get_items(dynamodb, {TABLE: {'Keys': [...]}, OTHER_TABLE: {'Keys': [...]}})
+    sessions = batch_get_keys(dynamodb, TABLE, keys, ProjectionExpression='pk_session_id, user_id')
+"""
+
+import time
+
+# Retries of UnprocessedKeys before giving up; the backoff doubles from 50 ms up to 2 s
+BATCH_MAX_RETRIES = 8
+# Keys per BatchGetItem call
+BATCH_GET_MAX_KEYS = 100
+
+
+def batch_get_items(dynamodb, request_items, max_retries=BATCH_MAX_RETRIES):
+    """
+    One BatchGetItem request (at most BATCH_GET_MAX_KEYS keys across its tables), retried
+    until no keys are left unprocessed. Returns {table_name: [items]}; raises RuntimeError
+    if keys are still unprocessed after max_retries retries.
+    """
+    items = {table_name: [] for table_name in request_items}
+    for attempt in range(max_retries + 1):
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        for table_name, table_items in response.get('Responses', {}).items():
+            items[table_name].extend(table_items)
+        request_items = response.get('UnprocessedKeys') or {}
+        if not request_items:
+            return items
+        if attempt < max_retries:
+            time.sleep(min(0.05 * (2 ** attempt), 2))
+    unprocessed = sum(len(table_request['Keys']) for table_request in request_items.values())
+    raise RuntimeError(f"{unprocessed} reads still unprocessed after {max_retries} retries")
+
+
+def batch_get_keys(dynamodb, table_name, keys, max_retries=BATCH_MAX_RETRIES, **table_options):
+    """
+    Items of any number of keys of one table, read BATCH_GET_MAX_KEYS at a time.
+    table_options (ProjectionExpression, ExpressionAttributeNames, ConsistentRead) apply to
+    every call. Keys without an item are left out.
+    """
+    keys = list(keys)
+    items = []
+    for offset in range(0, len(keys), BATCH_GET_MAX_KEYS):
+        request_items = {table_name: {'Keys': keys[offset:offset + BATCH_GET_MAX_KEYS], **table_options}}
+        items.extend(batch_get_items(dynamodb, request_items, max_retries)[table_name])
+    return items
@@ -2,14 +2,33 @@ import json
 import uuid
 import boto3
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from boto3.dynamodb.conditions import Key, Attr
-import traceback
+from botocore.exceptions import ClientError
 import csv
 import io
+from structured_log import get_logger
+from s3_csv_export import (
+    copy_with_appended, export_cache_key, export_high_water_mark, load_export_cache, save_export_cache,
+    export_cache_file_key, swap_export_cache
+)
+
+log = get_logger("feedback-handler")
 
 dynamodb = boto3.resource('dynamodb')
 messages_table = dynamodb.Table(os.environ.get('FEEDBACK_TABLE'))
+sessions_table = dynamodb.Table(os.environ.get('SESSIONS_TABLE'))
+
+# Feedback downloads are cached per (range, topic) through s3_csv_export; feedback_created_at
+# is stamped in UTC, so the cache helpers are given that clock
+
+# The session handler moves sessions created more than ARCHIVE_AFTER_DAYS ago, with their
+# messages and feedback, to the S3 archive. Responses for ranges that start before that
+# horizon carry "archived_before" since the archived feedback is not included.
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '365'))
+FEEDBACK_CSV_COLUMNS = [
+    "FeedbackID", "SessionID", "UserPrompt", "FeedbackComment", "FeedbackCategory", "FeedbackType", "FeedbackRank", "ChatbotMessage", "CreatedAt"
+]
 
 from decimal import Decimal
 
@@ -24,8 +43,10 @@ class DecimalEncoder(json.JSONEncoder):
     
 
 
+@log.handler
 def lambda_handler(event, context):
-    print(event)
+    log.info("Request", route=event.get('routeKey'), path=event.get('rawPath'))
+    log.debug("Request event", event=event)
     http_method = event.get('routeKey')
     if 'POST' in http_method:
         if event.get('rawPath') == '/user-feedback/download-feedback':
@@ -41,6 +62,31 @@ def lambda_handler(event, context):
             'body': json.dumps('Method Not Allowed')
         }
 
+def update_session_feedback_summary(session_id, delta):
+    """
+    Keep has_feedback / feedback_count on the session item in step with the
+    feedback stored on its messages, so list_all_sessions never scans messages.
+    """
+    try:
+        response = sessions_table.update_item(
+            Key={'pk_session_id': session_id},
+            UpdateExpression="SET feedback_count = if_not_exists(feedback_count, :zero) + :delta, has_feedback = :has_feedback",
+            ConditionExpression=Attr('pk_session_id').exists(),
+            ExpressionAttributeValues={':zero': 0, ':delta': delta, ':has_feedback': True},
+            ReturnValues="UPDATED_NEW"
+        )
+        if response['Attributes']['feedback_count'] <= 0:
+            # Last feedback removed (or left before the counter existed)
+            sessions_table.update_item(
+                Key={'pk_session_id': session_id},
+                UpdateExpression="SET feedback_count = :zero, has_feedback = :has_feedback",
+                ExpressionAttributeValues={':zero': 0, ':has_feedback': False}
+            )
+    except ClientError as error:
+        if error.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
 def post_feedback(event):
     try:
         """
@@ -61,34 +107,64 @@ def post_feedback(event):
         if feedback_rank:
             feedback_rank = Decimal(feedback_rank)
 
+        updated_attributes = {
+            'feedback_type': feedback_type,
+            'feedback_rank': feedback_rank,
+            'feedback_category': feedback_category,
+            'feedback_message': feedback_message,
+            'feedback_created_at': feedback_created_at,
+            'feedback_date': feedback_created_at[:10]
+        }
         response = messages_table.update_item(
             Key={
                 'pk_message_id': message_id,
                 'sk_session_id': session_id
             },
             UpdateExpression="SET feedback_type = :type, feedback_rank = :rank, feedback_category = :category, \
-                              feedback_message = :message, feedback_created_at = :created_at",
+                              feedback_message = :message, feedback_created_at = :created_at, feedback_date = :date",
+            # Chat turns are persisted through a queue, so feedback can arrive before its message
+            # exists. Without the condition it would create a stub item that the ingestion then
+            # skips as already written, losing the turn.
+            ConditionExpression=Attr('pk_message_id').exists(),
             ExpressionAttributeValues={
                 ':type': feedback_type,
                 ':rank': feedback_rank,
                 ':category': feedback_category,
                 ':message': feedback_message,
-                ':created_at': feedback_created_at
+                ':created_at': feedback_created_at,
+                ':date': feedback_created_at[:10]
             },
-            ReturnValues="UPDATED_NEW"
+            ReturnValues="ALL_OLD"
         )
 
+        # Only count feedback once per message, re-submitting just updates it
+        if 'feedback_type' not in response.get('Attributes', {}):
+            update_session_feedback_summary(session_id, 1)
+
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 200,
             'body': json.dumps({
                 'FeedbackID': message_id,
-                'updated_attributes': response['Attributes']
+                'updated_attributes': updated_attributes
             }, cls=DecimalEncoder) # use JSON decimal encoder to serialize decimal feedback rank
         }
 
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            log.exception("Failed to submit feedback", error=str(e))
+            return {
+                'headers': {'Access-Control-Allow-Origin': '*'},
+                'statusCode': 500,
+                'body': json.dumps({'error': f'Failed to submit feedback: {str(e)}'})
+            }
+        return {
+            'headers': {'Access-Control-Allow-Origin': '*'},
+            'statusCode': 409,
+            'body': json.dumps({'error': 'Message is not stored yet, retry the feedback shortly'})
+        }
     except Exception as e:
-        print(e)
+        log.exception("Failed to submit feedback", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 500,
@@ -97,90 +173,64 @@ def post_feedback(event):
         
     
 def download_feedback(event):
-    print("[download_feedback] event:", event)
     data = json.loads(event['body'])
-    print("[download_feedback] parsed body:", data)
     start_time = data.get('startTime')
     end_time = data.get('endTime')
     topic = data.get('topic')
-    print(f"[download_feedback] start_time: {start_time} (type: {type(start_time)}), end_time: {end_time} (type: {type(end_time)}), topic: {topic} (type: {type(topic)})")
+    log.info("download_feedback", start_time=start_time, end_time=end_time, topic=topic)
 
     try:
-        filter_expression = Key('feedback_created_at').between(start_time, end_time) & Attr('feedback_type').exists()
-        if topic in {"Positive", "Negative"}:
-            filter_expression = Key('feedback_created_at').between(start_time, end_time) & Attr('feedback_type').eq(topic.lower())
-        elif topic in {"Error Messages", "Not Clear", "Poorly Formatted", "Inaccurate", "Not Relevant to My Question", "Other"}:
-            filter_expression = Key('feedback_created_at').between(start_time, end_time) & Attr('feedback_category').eq(topic)
+        s3 = boto3.client('s3')
+        S3_DOWNLOAD_BUCKET = os.environ["FEEDBACK_S3_DOWNLOAD"]
+        cache_key = export_cache_key('feedback', {'start_time': start_time, 'end_time': end_time, 'topic': topic})
+        high_water_mark = export_high_water_mark(now=datetime.utcnow)
+        cached, cached_etag = load_export_cache(s3, S3_DOWNLOAD_BUCKET, cache_key, now=datetime.utcnow)
+        if cached:
+            return _refresh_feedback_download(s3, S3_DOWNLOAD_BUCKET, cache_key, cached, cached_etag, high_water_mark)
 
-        print(f"[download_feedback] Using filter expression: {filter_expression}")
+        # Feedback stamped after the high-water mark is appended by the next cached refresh
+        filter_expression = _feedback_filter_expression(start_time, min(end_time, high_water_mark), topic)
 
-        all_items = []
-        last_evaluated_key = None
-
-        while True:
-            if last_evaluated_key:
-                response = messages_table.scan(
-                    FilterExpression=filter_expression,
-                    ExclusiveStartKey=last_evaluated_key
-                )
-            else:
-                response = messages_table.scan(
-                    FilterExpression=filter_expression
-                )
-            items = response.get('Items', [])
-            all_items.extend(items)
-            last_evaluated_key = response.get('LastEvaluatedKey')
-            if not last_evaluated_key:
-                break
-
-        print(f"[download_feedback] items: {all_items}")
+        all_items = _scan_feedback(filter_expression)
+        log.info("Feedback items retrieved", count=len(all_items))
+        log.debug("Feedback items", items=all_items)
 
         # Use csv module to write CSV properly
         output = io.StringIO()
         writer = csv.writer(output, quoting=csv.QUOTE_ALL)
-        # Define columns
-        columns = [
-            "FeedbackID", "SessionID", "UserPrompt", "FeedbackComment", "FeedbackCategory", "FeedbackType", "FeedbackRank", "ChatbotMessage", "CreatedAt"
-        ]
-        writer.writerow(columns)
-        for item in all_items:
-            writer.writerow([
-                item.get('pk_message_id', ''),
-                item.get('sk_session_id', ''),
-                item.get('user_prompt', ''),
-                item.get('feedback_message', ''),
-                item.get('feedback_category', ''),
-                item.get('feedback_type', ''),
-                item.get('feedback_rank', ''),
-                item.get('bot_response', ''),
-                item.get('feedback_created_at', ''),
-            ])
+        writer.writerow(FEEDBACK_CSV_COLUMNS)
+        writer.writerows(_feedback_csv_row(item) for item in all_items)
         csv_content = output.getvalue()
         output.close()
-        print(f"[download_feedback] csv_content: {csv_content}")
 
-        s3 = boto3.client('s3')
-        S3_DOWNLOAD_BUCKET = os.environ["FEEDBACK_S3_DOWNLOAD"]
         file_name = f"feedback-{start_time}-{end_time}.csv"
-        print(f"[download_feedback] Uploading to S3 bucket: {S3_DOWNLOAD_BUCKET}, file_name: {file_name}")
-        s3.put_object(Bucket=S3_DOWNLOAD_BUCKET, Key=file_name, Body=csv_content)
+        log.info("Uploading feedback CSV", bucket=S3_DOWNLOAD_BUCKET, file_name=file_name, bytes=len(csv_content))
+        response = s3.put_object(Bucket=S3_DOWNLOAD_BUCKET, Key=file_name, Body=csv_content)
+        save_export_cache(s3, S3_DOWNLOAD_BUCKET, cache_key, {
+            'export_type': 'feedback',
+            'start_time': start_time,
+            'end_time': end_time,
+            'topic': topic,
+            'file_name': file_name,
+            'etag': response['ETag'],
+            'high_water_mark': high_water_mark,
+            'built_at': datetime.utcnow().isoformat()
+        })
 
         presigned_url = s3.generate_presigned_url(
             'get_object',
             Params={'Bucket': S3_DOWNLOAD_BUCKET, 'Key': file_name},
             ExpiresIn=3600
         )
-        print(f"[download_feedback] presigned_url: {presigned_url}")
 
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 200,
-            'body': json.dumps({'download_url': presigned_url})
+            'body': json.dumps(_archive_notice({'download_url': presigned_url}, start_time))
         }
 
     except Exception as e:
-        print("[download_feedback] Exception occurred:", e)
-        traceback.print_exc()
+        log.exception("Failed to retrieve feedback for download", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 500,
@@ -188,51 +238,162 @@ def download_feedback(event):
         }
         
 
+def _archive_notice(body, start_time):
+    """Add archived_before to a response body if the range starts before the archive horizon"""
+    horizon = (datetime.utcnow() - timedelta(days=ARCHIVE_AFTER_DAYS)).strftime('%Y-%m-%d')
+    if start_time[:10] < horizon:
+        body['archived_before'] = horizon
+    return body
+
+
+def _feedback_topic_filter(topic):
+    if topic in {"Positive", "Negative"}:
+        return Attr('feedback_type').eq(topic.lower())
+    if topic in {"Error Messages", "Not Clear", "Poorly Formatted", "Inaccurate", "Not Relevant to My Question", "Other"}:
+        return Attr('feedback_category').eq(topic)
+    return Attr('feedback_type').exists()
+
+
+def _feedback_filter_expression(start_time, end_time, topic):
+    return Key('feedback_created_at').between(start_time, end_time) & _feedback_topic_filter(topic)
+
+
+def _scan_feedback(filter_expression):
+    all_items = []
+    last_evaluated_key = None
+
+    while True:
+        if last_evaluated_key:
+            response = messages_table.scan(
+                FilterExpression=filter_expression,
+                ExclusiveStartKey=last_evaluated_key
+            )
+        else:
+            response = messages_table.scan(
+                FilterExpression=filter_expression
+            )
+        items = response.get('Items', [])
+        all_items.extend(items)
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+    return all_items
+
+
+def _feedback_csv_row(item):
+    return [
+        item.get('pk_message_id', ''),
+        item.get('sk_session_id', ''),
+        item.get('user_prompt', ''),
+        item.get('feedback_message', ''),
+        item.get('feedback_category', ''),
+        item.get('feedback_type', ''),
+        item.get('feedback_rank', ''),
+        item.get('bot_response', ''),
+        item.get('feedback_created_at', ''),
+    ]
+
+
+def _feedback_since(start_time, end_time, topic, since):
+    """
+    Feedback for the range stamped after since, oldest first, read one day at a time from
+    FeedbackDateIndex. Feedback submitted before the index existed has no feedback_date, but
+    it is older than any cache's high-water mark.
+    """
+    lower = max(start_time, since)
+    if lower >= end_time:
+        return []
+    first_day = datetime.fromisoformat(lower[:10])
+    last_day = datetime.fromisoformat(end_time[:10])
+    items = []
+    for offset in range((last_day - first_day).days + 1):
+        query_params = {
+            'IndexName': 'FeedbackDateIndex',
+            'KeyConditionExpression': Key('feedback_date').eq((first_day + timedelta(days=offset)).strftime('%Y-%m-%d'))
+                & Key('feedback_created_at').between(lower, end_time),
+            'FilterExpression': _feedback_topic_filter(topic)
+        }
+        while True:
+            response = messages_table.query(**query_params)
+            items.extend(item for item in response.get('Items', []) if item['feedback_created_at'] > since)
+            if not response.get('LastEvaluatedKey'):
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return items
+
+
+def _refresh_feedback_download(s3, bucket, cache_key, manifest, manifest_etag, high_water_mark):
+    """
+    Bring a cached feedback download up to date and return a fresh link to it. New rows are
+    appended server side into a new copy of the CSV, which the manifest is then swapped to.
+
+    feedback_created_at is stamped when feedback is written, so only feedback stamped after
+    the cache's high-water mark can be new, and since a cache is rebuilt after
+    EXPORT_CACHE_MAX_AGE the days queried are bounded. Re-submitted feedback is re-stamped
+    and appended as a new row; its earlier row is dropped by that rebuild.
+    """
+    since = manifest['high_water_mark']
+    items = _feedback_since(manifest['start_time'], min(manifest['end_time'], high_water_mark), manifest['topic'], since)
+
+    previous_file_name = manifest['file_name']
+    if items:
+        output = io.StringIO()
+        csv.writer(output, quoting=csv.QUOTE_ALL).writerows(_feedback_csv_row(item) for item in items)
+        manifest['file_name'] = export_cache_file_key(previous_file_name)
+        manifest['etag'] = copy_with_appended(s3, bucket, previous_file_name, manifest['file_name'], output.getvalue().encode('utf-8'))
+    manifest['high_water_mark'] = max(since, high_water_mark)
+    manifest = swap_export_cache(s3, bucket, cache_key, manifest, manifest_etag, previous_file_name, now=datetime.utcnow)
+    log.info("Served cached feedback download", file_name=manifest['file_name'], rows_appended=len(items))
+
+    presigned_url = s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket, 'Key': manifest['file_name']},
+        ExpiresIn=3600
+    )
+    return {
+        'headers': {'Access-Control-Allow-Origin': '*'},
+        'statusCode': 200,
+        'body': json.dumps(_archive_notice({'download_url': presigned_url}, manifest['start_time']))
+    }
+
+
 def get_feedback(event):
     try:
         query_params = event.get('queryStringParameters', {})
-        print(f"Query parameters received: {query_params}")
         
         start_time = query_params.get('startTime')
         end_time = query_params.get('endTime')
         topic = query_params.get('topic')
-        print(f"Filtering by time range: {start_time} to {end_time}, topic: {topic}")
+        log.info("get_feedback", start_time=start_time, end_time=end_time, topic=topic)
 
         filter_expression = Key('feedback_created_at').between(start_time, end_time) & Attr('feedback_type').exists()
         if topic in {"Positive", "Negative"}:
             filter_expression = Key('feedback_created_at').between(start_time, end_time) & Attr('feedback_type').eq(topic.lower())
         elif topic in {"Error Messages", "Not Clear", "Poorly Formatted", "Inaccurate", "Not Relevant to My Question", "Other"}:
             filter_expression = Key('feedback_created_at').between(start_time, end_time) & Attr('feedback_category').eq(topic)
-        
-        print(f"Using filter expression: {filter_expression}")
 
         all_items = []
         last_evaluated_key = None
         
         while True:
             if last_evaluated_key:
-                print(f"Continuing scan with LastEvaluatedKey: {last_evaluated_key}")
                 response = messages_table.scan(
                     FilterExpression=filter_expression,
                     ExclusiveStartKey=last_evaluated_key
                 )
             else:
-                print("Starting initial scan")
                 response = messages_table.scan(
                     FilterExpression=filter_expression
                 )
             
             items = response.get('Items', [])
-            print(f"Retrieved {len(items)} items in this batch")
             all_items.extend(items)
             
             last_evaluated_key = response.get('LastEvaluatedKey')
             if not last_evaluated_key:
-                print("No more items to scan")
                 break
-            print(f"More items available, continuing scan")
 
-        print(f"Total items retrieved: {len(all_items)}")
+        log.info("Feedback items retrieved", count=len(all_items))
 
         formatted_feedback = [
             {
@@ -249,18 +410,16 @@ def get_feedback(event):
             for item in all_items
         ]
 
-        print(f"Formatted {len(formatted_feedback)} feedback items")
-
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 200,
-            'body': json.dumps({
+            'body': json.dumps(_archive_notice({
                 'Items': formatted_feedback
-            }, cls=DecimalEncoder)
+            }, start_time), cls=DecimalEncoder)
         }
 
     except Exception as e:
-        print(f"Error in get_feedback: {str(e)}")
+        log.exception("Error in get_feedback", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 500,
@@ -279,18 +438,21 @@ def delete_feedback(event):
                 'pk_message_id': message_id,
                 'sk_session_id': session_id
             },
-            UpdateExpression="REMOVE feedback_type, feedback_rank, feedback_category, feedback_message, feedback_created_at",
-            ReturnValues="UPDATED_NEW"
+            UpdateExpression="REMOVE feedback_type, feedback_rank, feedback_category, feedback_message, feedback_created_at, feedback_date",
+            ReturnValues="ALL_OLD"
         )
 
+        if 'feedback_type' in response.get('Attributes', {}):
+            update_session_feedback_summary(session_id, -1)
+
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 200,
-            'body': json.dumps({'message': 'Feedback deleted successfully', 'updated_attributes': response['Attributes']})
+            'body': json.dumps({'message': 'Feedback deleted successfully', 'updated_attributes': {}})
         }
 
     except Exception as e:
-        print(e)
+        log.exception("Failed to delete feedback", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 500,
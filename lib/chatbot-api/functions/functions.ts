@@ -10,7 +10,9 @@ import * as s3 from "aws-cdk-lib/aws-s3";
 import * as events from 'aws-cdk-lib/aws-events';
 import * as targets from 'aws-cdk-lib/aws-events-targets';
 import * as bedrock from "aws-cdk-lib/aws-bedrock";
-import { S3EventSource } from 'aws-cdk-lib/aws-lambda-event-sources';
+import * as secretsmanager from 'aws-cdk-lib/aws-secretsmanager';
+import * as sqs from 'aws-cdk-lib/aws-sqs';
+import { S3EventSource, SqsEventSource } from 'aws-cdk-lib/aws-lambda-event-sources';
 import { StepFunctionsStack } from './step-functions/step-functions';
 
 
@@ -19,7 +21,11 @@ interface LambdaFunctionStackProps {
   readonly sessionsTable: Table,
   readonly messagesTable: Table,
   readonly reviewsTable: Table,
+  readonly timelineTable: Table,
+  readonly dailyUsersTable: Table,
+  readonly responseTimeRollupTable: Table,
   readonly downloadBucket : s3.Bucket;
+  readonly sessionArchiveBucket : s3.Bucket;
   readonly driveSyncBucket : s3.Bucket;
   readonly knowledgeBucket : s3.Bucket;
   readonly knowledgeBase : bedrock.CfnKnowledgeBase;
@@ -50,19 +56,80 @@ export class LambdaFunctionStack extends cdk.Stack {
   constructor(scope: Construct, id: string, props: LambdaFunctionStackProps) {
     super(scope, id);    
 
+    // structured_log module shared by the Python API handlers (imported from /opt/python)
+    const structuredLogLayer = new lambda.LayerVersion(scope, 'StructuredLogLayer', {
+      code: lambda.Code.fromAsset(path.join(__dirname, 'logging-layer')),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+      description: 'Size-capped, sampled JSON logging for the Python handlers'
+    });
+
+    // daily_users module: per-day distinct user rollups written by the session handler and read by the KPI handler
+    const dailyUsersLayer = new lambda.LayerVersion(scope, 'DailyUsersLayer', {
+      code: lambda.Code.fromAsset(path.join(__dirname, 'daily-users-layer')),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+      description: 'Exact-set / HyperLogLog daily distinct user rollups'
+    });
+
+    // latency_sketch module: hourly response-time DDSketches written by the session handler and merged by the KPI handler
+    const latencySketchLayer = new lambda.LayerVersion(scope, 'LatencySketchLayer', {
+      code: lambda.Code.fromAsset(path.join(__dirname, 'latency-layer')),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+      description: 'DDSketch hourly response-time rollups'
+    });
+
+    // s3_csv_export module: multipart CSV exports and the export cache of the session, KPI and feedback handlers
+    const csvExportLayer = new lambda.LayerVersion(scope, 'CsvExportLayer', {
+      code: lambda.Code.fromAsset(path.join(__dirname, 'csv-export-layer')),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+      description: 'Multipart and server-side appended CSV exports to S3 and their cache manifests'
+    });
+
+    // dynamodb_batch module: BatchGetItem with bounded UnprocessedKeys retries, also used by daily_users
+    const dynamodbBatchLayer = new lambda.LayerVersion(scope, 'DynamodbBatchLayer', {
+      code: lambda.Code.fromAsset(path.join(__dirname, 'dynamodb-batch-layer')),
+      compatibleRuntimes: [lambda.Runtime.PYTHON_3_12],
+      description: 'DynamoDB BatchGetItem with backoff and a retry limit'
+    });
+
+    // HMAC key for the opaque pagination cursors returned by the session handler
+    const cursorSigningSecret = new secretsmanager.Secret(scope, 'SessionCursorSigningSecret', {
+      generateSecretString: { passwordLength: 64, excludePunctuation: true },
+    });
+
+    // Sessions older than this move to the archive bucket; handlers reporting on the
+    // session tables use it to flag ranges that reach past it
+    const archiveAfterDays = "365";
+
     const sessionAPIHandlerFunction = new lambda.Function(scope, 'SessionHandlerFunction', {
       runtime: lambda.Runtime.PYTHON_3_12, // Choose any supported Node.js runtime
       code: lambda.Code.fromAsset(path.join(__dirname, 'session-handler')), // Points to the lambda directory
+      layers: [structuredLogLayer, dailyUsersLayer, latencySketchLayer, csvExportLayer, dynamodbBatchLayer],
       handler: 'lambda_function.lambda_handler', // Points to the 'hello' file in the lambda directory
       environment: {
         "SESSION_TABLE" : props.sessionsTable.tableName,
         "MESSAGES_TABLE": props.messagesTable.tableName,
         "REVIEW_TABLE": props.reviewsTable.tableName,
-        "SESSION_S3_DOWNLOAD" : props.downloadBucket.bucketName
+        "TIMELINE_TABLE": props.timelineTable.tableName,
+        "CURSOR_SECRET_ARN": cursorSigningSecret.secretArn,
+        "DAILY_USERS_TABLE": props.dailyUsersTable.tableName,
+        "RESPONSE_TIME_ROLLUP_TABLE": props.responseTimeRollupTable.tableName,
+        "SESSION_S3_DOWNLOAD" : props.downloadBucket.bucketName,
+        "SESSION_ARCHIVE_BUCKET" : props.sessionArchiveBucket.bucketName,
+        "ARCHIVE_AFTER_DAYS" : archiveAfterDays
       },
       timeout: cdk.Duration.seconds(900),
       memorySize: 256
     });
+    cursorSigningSecret.grantRead(sessionAPIHandlerFunction);
+    props.sessionArchiveBucket.grantReadWrite(sessionAPIHandlerFunction);
+
+    // Daily move of old sessions to the archive bucket
+    new events.Rule(scope, 'SessionArchiveRule', {
+      schedule: events.Schedule.rate(cdk.Duration.days(1)),
+      targets: [new targets.LambdaFunction(sessionAPIHandlerFunction, {
+        event: events.RuleTargetInput.fromObject({ source: 'async', operation: 'archive_sessions' })
+      })]
+    });
 
     sessionAPIHandlerFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
@@ -81,7 +148,8 @@ export class LambdaFunctionStack extends cdk.Stack {
         'dynamodb:DeleteItem',
         'dynamodb:Query',
         'dynamodb:Scan',
-        'dynamodb:BatchWriteItem'
+        'dynamodb:BatchWriteItem',
+        'dynamodb:BatchGetItem'
       ],
       resources: [
         props.sessionsTable.tableArn, 
@@ -90,11 +158,37 @@ export class LambdaFunctionStack extends cdk.Stack {
         props.messagesTable.tableArn + "/index/*",
         props.reviewsTable.tableArn, 
         props.reviewsTable.tableArn + "/index/*",
+        props.timelineTable.tableArn,
+        props.dailyUsersTable.tableArn,
+        props.responseTimeRollupTable.tableArn,
       ]
     }));
 
+    // Session exports run as async self-invocations (same pattern as the Drive backfill)
+    sessionAPIHandlerFunction.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: ['lambda:InvokeFunction'],
+      resources: ['*']  // Referencing the function's own ARN here would be a circular dependency
+    }));
+
     this.sessionFunction = sessionAPIHandlerFunction;
 
+    // Write-behind queue for chat turns: FIFO per session, de-duplicated on message ID
+    const sessionWriteDeadLetterQueue = new sqs.Queue(scope, 'SessionWriteDeadLetterQueue', {
+      fifo: true,
+      retentionPeriod: cdk.Duration.days(14),
+    });
+    const sessionWriteQueue = new sqs.Queue(scope, 'SessionWriteQueue', {
+      fifo: true,
+      // Must be at least the session handler's timeout
+      visibilityTimeout: cdk.Duration.seconds(900),
+      deadLetterQueue: { queue: sessionWriteDeadLetterQueue, maxReceiveCount: 5 },
+    });
+    sessionAPIHandlerFunction.addEventSource(new SqsEventSource(sessionWriteQueue, {
+      batchSize: 10,
+      reportBatchItemFailures: true,
+    }));
+
     // Define the Lambda function resource
     const websocketAPIFunction = new lambda.Function(scope, 'ChatHandlerFunction', {
       runtime: lambda.Runtime.NODEJS_20_X, // Choose any supported Node.js runtime
@@ -104,6 +198,7 @@ export class LambdaFunctionStack extends cdk.Stack {
         // wsApiEndpoint is already in https format (not wss) for ApiGatewayManagementApiClient
         "WEBSOCKET_API_ENDPOINT" : props.wsApiEndpoint,
         "KB_ID" : props.knowledgeBase.attrKnowledgeBaseId,
+        "SESSION_WRITE_QUEUE_URL" : sessionWriteQueue.queueUrl,
         "PROMPT_DATA_BUCKET_NAME": process.env.CDK_STACK_NAME!.toLowerCase() + "-prompt-data-bucket"},
       timeout: cdk.Duration.seconds(900),
       memorySize: 256
@@ -147,15 +242,19 @@ export class LambdaFunctionStack extends cdk.Stack {
       ],
       resources: [this.sessionFunction.functionArn]
     }));
+    sessionWriteQueue.grantSendMessages(websocketAPIFunction);
     this.chatFunction = websocketAPIFunction;
 
     const feedbackAPIHandlerFunction = new lambda.Function(scope, 'FeedbackHandlerFunction', {
       runtime: lambda.Runtime.PYTHON_3_12, // Choose any supported Node.js runtime
       code: lambda.Code.fromAsset(path.join(__dirname, 'feedback-handler')), // Points to the lambda directory
+      layers: [structuredLogLayer, csvExportLayer],
       handler: 'lambda_function.lambda_handler', // Points to the 'hello' file in the lambda directory
       environment: {
         "FEEDBACK_TABLE" : props.messagesTable.tableName,
-        "FEEDBACK_S3_DOWNLOAD" : props.downloadBucket.bucketName
+        "SESSIONS_TABLE" : props.sessionsTable.tableName,
+        "FEEDBACK_S3_DOWNLOAD" : props.downloadBucket.bucketName,
+        "ARCHIVE_AFTER_DAYS" : archiveAfterDays
       },
       timeout: cdk.Duration.seconds(30)
     });
@@ -172,6 +271,15 @@ export class LambdaFunctionStack extends cdk.Stack {
       resources: [props.messagesTable.tableArn, props.messagesTable.tableArn + "/index/*"]
     }));
 
+    // Feedback changes keep the has_feedback / feedback_count summary on the session item current
+    feedbackAPIHandlerFunction.addToRolePolicy(new iam.PolicyStatement({
+      effect: iam.Effect.ALLOW,
+      actions: [
+        'dynamodb:UpdateItem'
+      ],
+      resources: [props.sessionsTable.tableArn]
+    }));
+
     feedbackAPIHandlerFunction.addToRolePolicy(new iam.PolicyStatement({
       effect: iam.Effect.ALLOW,
       actions: [
@@ -460,9 +568,11 @@ export class LambdaFunctionStack extends cdk.Stack {
     const metricsHandlerFunction = new lambda.Function(scope, 'MetricsHandlerFunction', {
       runtime: lambda.Runtime.PYTHON_3_12,
       code: lambda.Code.fromAsset(path.join(__dirname, 'metrics-handler')),
+      layers: [structuredLogLayer],
       handler: 'lambda_function.lambda_handler',
       environment: {
         "DDB_TABLE_NAME": props.sessionsTable.tableName,
+        "ARCHIVE_AFTER_DAYS": archiveAfterDays
       },
       timeout: cdk.Duration.seconds(60) // Increased timeout for scanning large tables
     });
@@ -478,15 +588,20 @@ export class LambdaFunctionStack extends cdk.Stack {
     this.metricsHandlerFunction = metricsHandlerFunction;
 
     // KPI Handler Function for chatbot interaction tracking
-    // Queries from sessions/messages tables - daily users computed on-demand
+    // Queries from sessions/messages tables - daily users and latency read from the rollup tables
     const kpiHandlerFunction = new lambda.Function(scope, 'KPIHandlerFunction', {
       runtime: lambda.Runtime.PYTHON_3_12,
       code: lambda.Code.fromAsset(path.join(__dirname, 'kpi-handler')),
+      layers: [structuredLogLayer, dailyUsersLayer, latencySketchLayer, csvExportLayer, dynamodbBatchLayer],
       handler: 'lambda_function.lambda_handler',
       environment: {
         "SESSIONS_TABLE": props.sessionsTable.tableName,
         "MESSAGES_TABLE": props.messagesTable.tableName,
-        "INTERACTION_S3_DOWNLOAD": props.downloadBucket.bucketName
+        "TIMELINE_TABLE": props.timelineTable.tableName,
+        "DAILY_USERS_TABLE": props.dailyUsersTable.tableName,
+        "RESPONSE_TIME_ROLLUP_TABLE": props.responseTimeRollupTable.tableName,
+        "INTERACTION_S3_DOWNLOAD": props.downloadBucket.bucketName,
+        "ARCHIVE_AFTER_DAYS": archiveAfterDays
       },
       timeout: cdk.Duration.seconds(60)
     });
@@ -499,13 +614,17 @@ export class LambdaFunctionStack extends cdk.Stack {
         'dynamodb:UpdateItem',
         'dynamodb:DeleteItem',
         'dynamodb:Query',
-        'dynamodb:Scan'
+        'dynamodb:Scan',
+        'dynamodb:BatchGetItem'
       ],
       resources: [
         props.sessionsTable.tableArn,
         props.sessionsTable.tableArn + "/index/*",
         props.messagesTable.tableArn,
-        props.messagesTable.tableArn + "/index/*"
+        props.messagesTable.tableArn + "/index/*",
+        props.timelineTable.tableArn,
+        props.dailyUsersTable.tableArn,
+        props.responseTimeRollupTable.tableArn
       ]
     }));
 
@@ -513,7 +632,11 @@ export class LambdaFunctionStack extends cdk.Stack {
       effect: iam.Effect.ALLOW,
       actions: [
         's3:PutObject',
-        's3:GetObject'
+        's3:GetObject',
+        's3:DeleteObject',
+        's3:AbortMultipartUpload',
+        // Lets a missing export cache manifest read as NoSuchKey rather than AccessDenied
+        's3:ListBucket'
       ],
       resources: [props.downloadBucket.bucketArn, props.downloadBucket.bucketArn + "/*"]
     }));
@@ -9,6 +9,9 @@ Admin users can access all functionalities, while non-admins have limited permis
 Environment variables:
 - `SESSIONS_TABLE`: The name of the DynamoDB table storing sessions.
 - `MESSAGES_TABLE`: The name of the DynamoDB table storing messages.
+- `TIMELINE_TABLE`: The name of the DynamoDB table storing the time-ordered copy of each session's messages.
+- `DAILY_USERS_TABLE`: The name of the DynamoDB table holding the per-day distinct user rollups.
+- `RESPONSE_TIME_ROLLUP_TABLE`: The name of the DynamoDB table holding the hourly response-time sketches.
 - `INTERACTION_S3_DOWNLOAD`: The S3 bucket used for storing downloadable interaction data CSV files.
 
 Functions:
@@ -16,21 +19,69 @@ Functions:
 - `download_interactions`: Handles POST requests to generate and return a downloadable CSV file of interactions.
 - `get_interactions`: Handles GET requests to retrieve chatbot interactions with optional pagination support.
 - `delete_interactions`: Handles DELETE requests to remove specific message entries from the DynamoDB table.
-- `get_daily_users`: Handles GET requests to retrieve daily unique user counts (computed from sessions).
+- `get_daily_users`: Handles GET requests to retrieve daily, weekly or monthly unique user counts (from the per-day rollups).
+- `get_response_time_percentiles`: Handles GET requests for response-time percentiles and histograms per day or hour (from the hourly sketches).
 """
 
 import json
 import boto3
 import os
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from boto3.dynamodb.conditions import Key, Attr
 from decimal import Decimal
 from collections import defaultdict
+from structured_log import get_logger
+from daily_users import load_days, distinct_users
+from dynamodb_batch import batch_get_keys
+from latency_sketch import LatencySketch
+from s3_csv_export import (
+    S3MultipartCsvWriter, copy_with_appended, export_cache_key, export_high_water_mark,
+    load_export_cache, save_export_cache, export_cache_file_key, swap_export_cache
+)
+
+log = get_logger("kpi-handler")
 
 # Initialize DynamoDB client
 dynamodb = boto3.resource('dynamodb')
 sessions_table = dynamodb.Table(os.environ.get('SESSIONS_TABLE'))
 messages_table = dynamodb.Table(os.environ.get('MESSAGES_TABLE'))
+timeline_table = dynamodb.Table(os.environ.get('TIMELINE_TABLE'))
+# Sort key of the session handler's history snapshot row in the timeline table
+SNAPSHOT_SORT_KEY = "#SNAPSHOT"
+DAILY_USERS_TABLE = os.environ.get('DAILY_USERS_TABLE')
+response_time_rollup_table = dynamodb.Table(os.environ.get('RESPONSE_TIME_ROLLUP_TABLE'))
+
+# The session handler moves sessions created more than ARCHIVE_AFTER_DAYS ago, with their
+# messages and feedback, to the S3 archive. Interaction responses for ranges that start
+# before that horizon carry "archived_before" since the archived part is not included.
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', '365'))
+
+# Chart buckets get_daily_users can count distinct users over, and the longest range it reads
+DAILY_USERS_GRANULARITIES = ('day', 'week', 'month')
+MAX_DAILY_USERS_RANGE_DAYS = 5 * 366
+
+# Response-time breakdowns get_response_time_percentiles returns, the longest range for each,
+# and the upper bounds (seconds) of its histogram bins; the last bin counts everything above
+LATENCY_RANGE_DAYS = {'day': 366, 'hour': 31}
+LATENCY_HISTOGRAM_BOUNDS = [0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60]
+
+INTERACTIONS_CSV_COLUMNS = ["Timestamp", "Username", "User Prompt", "Bot Message", "Response Time"]
+
+# Messages and sessions are read by time range through their CreatedDateIndex (created_date day
+# bucket, created_at sort key), one Query per day with INTERACTION_QUERY_WORKERS running at once.
+# Ranges longer than INTERACTION_MAX_DAY_QUERIES days fall back to scans in
+# INTERACTION_SCAN_SEGMENTS parallel segments, and a page of get_interactions stops after that
+# many days. Interaction downloads stream CSV into S3 multipart parts of INTERACTION_PART_SIZE.
+INTERACTION_QUERY_WORKERS = 10
+INTERACTION_SCAN_SEGMENTS = 8
+INTERACTION_MAX_DAY_QUERIES = 400
+DEFAULT_INTERACTIONS_PAGE_SIZE = 500
+MAX_INTERACTIONS_PAGE_SIZE = 1000
+INTERACTION_PART_SIZE = 5 * 1024 * 1024
+INTERACTION_PROJECTION = "created_at, user_prompt, bot_response, response_time"
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -40,6 +91,7 @@ class DecimalEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+@log.handler
 def lambda_handler(event, context):
     # Continue with normal API Gateway request processing
     admin = False
@@ -52,9 +104,9 @@ def lambda_handler(event, context):
         else:
             admin = "AdminUsers" in groups
         if not admin:
-            print("User is not in AdminUsers group")
+            log.info("User is not in AdminUsers group")
     except Exception as e:
-        print(f"Caught error checking admin access: {str(e)}")
+        log.exception("Caught error checking admin access", error=str(e))
         return {
             'statusCode': 500,
             'headers': {'Access-Control-Allow-Origin': '*'},
@@ -65,8 +117,10 @@ def lambda_handler(event, context):
     
     if http_method == "GET /daily-logins": 
         return get_daily_users(event)
+    elif http_method == 'GET /chatbot-use/latency' and admin:
+        return get_response_time_percentiles(event)
     elif http_method == 'POST /chatbot-use/download' and admin:
-        print('Downloading interactions')
+        log.info("Downloading interactions")
         return download_interactions(event)
     elif 'GET' in http_method and admin:
         return get_interactions(event)
@@ -80,57 +134,53 @@ def lambda_handler(event, context):
         }
 
 
+def _daily_users_bucket(day, granularity):
+    """Chart bucket a day falls in: the day itself, the Monday of its week, or the first of its month"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
 def get_daily_users(event):
     """
-    Compute daily unique user counts on-demand from the sessions table.
-    Returns data formatted for bar chart display.
+    Distinct user counts per day, week or month (`granularity`, default day), merged from the
+    per-day rollup items the session handler maintains. Costs one read per day in the range
+    rather than a scan of the sessions table. Returns data formatted for bar chart display.
     """
     try:
-        query_params = event.get('queryStringParameters', {})
-        start_date = query_params.get('startDate')
-        end_date = query_params.get('endDate')
-        
+        query_params = event.get('queryStringParameters') or {}
+        granularity = query_params.get('granularity', 'day')
+        if granularity not in DAILY_USERS_GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(DAILY_USERS_GRANULARITIES)}")
+
         # Parse and validate dates
-        start_date = datetime.strptime(start_date, "%Y-%m-%d")
-        end_date = datetime.strptime(end_date, "%Y-%m-%d")
-        
-        # Format for DynamoDB query
-        start_date_str = start_date.strftime("%Y-%m-%d")
-        end_date_str = (end_date + timedelta(days=1)).strftime("%Y-%m-%d")  # Include end date
-        
-        # Scan sessions within the date range
-        scan_kwargs = {
-            'FilterExpression': Attr('created_at').gte(start_date_str) & Attr('created_at').lt(end_date_str),
-            'ProjectionExpression': 'user_id, created_at'
-        }
-        
-        response = sessions_table.scan(**scan_kwargs)
-        all_sessions = response.get('Items', [])
-        
-        # Handle pagination
-        while 'LastEvaluatedKey' in response:
-            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
-            response = sessions_table.scan(**scan_kwargs)
-            all_sessions.extend(response.get('Items', []))
-        
-        # Group sessions by date and count unique users per day
-        daily_users = defaultdict(set)
-        for session in all_sessions:
-            created_at = session.get('created_at', '')
-            user_id = session.get('user_id', '')
-            if created_at and user_id:
-                # Extract date part (YYYY-MM-DD)
-                date_key = created_at.split('T')[0]
-                daily_users[date_key].add(user_id)
-        
+        if not query_params.get('startDate') or not query_params.get('endDate'):
+            raise ValueError("startDate and endDate are required")
+        start_date = datetime.strptime(query_params.get('startDate'), "%Y-%m-%d")
+        end_date = datetime.strptime(query_params.get('endDate'), "%Y-%m-%d")
+        day_count = (end_date - start_date).days + 1
+        if day_count < 1:
+            raise ValueError("endDate must not be before startDate")
+        if day_count > MAX_DAILY_USERS_RANGE_DAYS:
+            raise ValueError(f"Date range is limited to {MAX_DAILY_USERS_RANGE_DAYS} days")
+
+        days = [start_date + timedelta(days=offset) for offset in range(day_count)]
+        rollups = load_days(dynamodb, DAILY_USERS_TABLE, [day.strftime("%Y-%m-%d") for day in days])
+
+        # Group the days that have a rollup by chart bucket and count distinct users per bucket
+        buckets = defaultdict(list)
+        for day in days:
+            item = rollups.get(day.strftime("%Y-%m-%d"))
+            if item:
+                buckets[_daily_users_bucket(day, granularity).strftime("%Y-%m-%d")].append(item)
+
         # Convert to list format expected by frontend
         logins = [
-            {'Timestamp': date, 'Count': len(users)}
-            for date, users in daily_users.items()
+            {'Timestamp': bucket, 'Count': distinct_users(items)}
+            for bucket, items in sorted(buckets.items())
         ]
-        
-        # Sort by date
-        logins.sort(key=lambda x: x['Timestamp'])
 
         return {
             'headers': {'Access-Control-Allow-Origin': "*"},
@@ -138,10 +188,14 @@ def get_daily_users(event):
             'body': json.dumps({'logins': logins}, cls=DecimalEncoder)
         }
 
+    except ValueError as e:
+        return {
+            'headers': {'Access-Control-Allow-Origin': "*"},
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
-        print(f"Error retrieving daily users: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error retrieving daily users", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': "*"},
             'statusCode': 500,
@@ -149,10 +203,91 @@ def get_daily_users(event):
         }
 
 
+def _latency_entry(sketch, **labels):
+    return {**labels, **sketch.summary(), 'histogram': sketch.histogram(LATENCY_HISTOGRAM_BOUNDS)}
+
+
+def _latency_hours(day):
+    """The hourly response-time rollup items of one day"""
+    response = response_time_rollup_table.query(KeyConditionExpression=Key('pk_date').eq(day))
+    return response.get('Items', [])
+
+
+def get_response_time_percentiles(event):
+    """
+    Response-time count, mean, p50/p90/p99 and histogram for the range, each day in it and,
+    with `granularity=hour`, each hour. Merged from the hourly DDSketch rollups the session
+    handler maintains (one Query per day), so percentiles are within 1% of the exact values
+    without reading any messages. Histogram counts are per LATENCY_HISTOGRAM_BOUNDS bin.
+    """
+    try:
+        query_params = event.get('queryStringParameters') or {}
+        granularity = query_params.get('granularity', 'day')
+        if granularity not in LATENCY_RANGE_DAYS:
+            raise ValueError(f"granularity must be one of {', '.join(LATENCY_RANGE_DAYS)}")
+
+        if not query_params.get('startDate') or not query_params.get('endDate'):
+            raise ValueError("startDate and endDate are required")
+        start_date = datetime.strptime(query_params.get('startDate'), "%Y-%m-%d")
+        end_date = datetime.strptime(query_params.get('endDate'), "%Y-%m-%d")
+        day_count = (end_date - start_date).days + 1
+        if day_count < 1:
+            raise ValueError("endDate must not be before startDate")
+        if day_count > LATENCY_RANGE_DAYS[granularity]:
+            raise ValueError(f"Date range is limited to {LATENCY_RANGE_DAYS[granularity]} days for {granularity} granularity")
+
+        days = [(start_date + timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(day_count)]
+        with ThreadPoolExecutor(max_workers=INTERACTION_QUERY_WORKERS) as executor:
+            hours_by_day = dict(zip(days, executor.map(_latency_hours, days)))
+
+        overall = LatencySketch()
+        day_entries = []
+        hour_entries = []
+        for day in days:
+            day_sketch = LatencySketch()
+            for item in sorted(hours_by_day[day], key=lambda item: item['sk_hour']):
+                hour_sketch = LatencySketch.from_item(item)
+                day_sketch.merge(hour_sketch)
+                if granularity == 'hour':
+                    hour_entries.append(_latency_entry(hour_sketch, date=day, hour=item['sk_hour']))
+            if day_sketch.count:
+                day_entries.append(_latency_entry(day_sketch, date=day))
+                overall.merge(day_sketch)
+
+        result = {
+            'histogramBounds': LATENCY_HISTOGRAM_BOUNDS,
+            'overall': _latency_entry(overall),
+            'days': day_entries
+        }
+        if granularity == 'hour':
+            result['hours'] = hour_entries
+
+        return {
+            'headers': {'Access-Control-Allow-Origin': "*"},
+            'statusCode': 200,
+            'body': json.dumps(result, cls=DecimalEncoder)
+        }
+
+    except ValueError as e:
+        return {
+            'headers': {'Access-Control-Allow-Origin': "*"},
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
+    except Exception as e:
+        log.exception("Error retrieving response time percentiles", error=str(e))
+        return {
+            'headers': {'Access-Control-Allow-Origin': "*"},
+            'statusCode': 500,
+            'body': json.dumps({'error': f"Failed to retrieve response time percentiles: {str(e)}"})
+        }
+
+
 def download_interactions(event):
     """
-    Generate a CSV file of all interactions within the given time range.
-    Queries from messages and sessions tables.
+    Generate a CSV file of all interactions within the given time range: every message of
+    the sessions created in it, plus messages created in it in sessions that started earlier.
+    Sessions are queried concurrently and rows are streamed to S3 as a multipart upload.
     """
     data = json.loads(event['body'])
     start_time = data.get('startTime')
@@ -171,91 +306,91 @@ def download_interactions(event):
             'body': json.dumps({'error': 'Missing required query parameters'})
         }
 
+    s3 = boto3.client('s3')
+    S3_DOWNLOAD_BUCKET = os.environ["INTERACTION_S3_DOWNLOAD"]
+    cache_key = export_cache_key('interactions', {'start_time': start_time_iso, 'end_time': end_time_iso})
+    high_water_mark = export_high_water_mark()
+
     try:
-        # First, get all sessions in the time range
-        sessions_response = sessions_table.scan(
-            FilterExpression=Attr("created_at").between(start_time_iso, end_time_iso)
-        )
-        sessions = sessions_response.get('Items', [])
-        
-        # Handle pagination
-        while 'LastEvaluatedKey' in sessions_response:
-            sessions_response = sessions_table.scan(
-                FilterExpression=Attr("created_at").between(start_time_iso, end_time_iso),
-                ExclusiveStartKey=sessions_response['LastEvaluatedKey']
-            )
-            sessions.extend(sessions_response.get('Items', []))
-        
-        # Build a map of session_id -> user_id
-        session_user_map = {s['pk_session_id']: s.get('user_id', 'Unknown') for s in sessions}
-        session_ids = list(session_user_map.keys())
-        
-        # Get all messages for these sessions
-        all_messages = []
-        for session_id in session_ids:
-            msg_response = messages_table.query(
-                IndexName='SessionMessagesIndex',
-                KeyConditionExpression=Key('sk_session_id').eq(session_id)
-            )
-            for msg in msg_response.get('Items', []):
-                msg['user_id'] = session_user_map.get(session_id, 'Unknown')
-            all_messages.extend(msg_response.get('Items', []))
-        
-        # Also get messages created in the time range (for existing sessions)
-        msg_scan = messages_table.scan(
-            FilterExpression=Attr("created_at").between(start_time_iso, end_time_iso)
-        )
-        
-        existing_message_ids = set(m['pk_message_id'] for m in all_messages)
-        for msg in msg_scan.get('Items', []):
-            if msg['pk_message_id'] not in existing_message_ids:
-                # Get user_id from session if not already known
-                session_id = msg.get('sk_session_id')
-                if session_id and session_id not in session_user_map:
-                    session_resp = sessions_table.get_item(Key={'pk_session_id': session_id})
-                    if 'Item' in session_resp:
-                        session_user_map[session_id] = session_resp['Item'].get('user_id', 'Unknown')
-                msg['user_id'] = session_user_map.get(session_id, 'Unknown')
-                all_messages.append(msg)
-        
+        cached, cached_etag = load_export_cache(s3, S3_DOWNLOAD_BUCKET, cache_key)
+        if cached:
+            return _refresh_interactions_download(s3, S3_DOWNLOAD_BUCKET, cache_key, cached, cached_etag, high_water_mark)
     except Exception as e:
-        print(f"Error retrieving interaction data: {str(e)}")
+        log.exception("Error refreshing cached interactions", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': "*"},
             'statusCode': 500,
-            'body': json.dumps('Failed to retrieve interaction data for download: ' + str(e))
+            'body': json.dumps('Failed to generate download link: ' + str(e))
         }
 
-    def clean_csv(field):
-        field = str(field).replace('"', '""')
-        if ',' in field or '\n' in field or '"' in field:
-            field = f'"{field}"'
-        return field
-    
-    # Build CSV content
-    csv_content = "Timestamp,Username,User Prompt,Bot Message,Response Time\n"
-    for item in all_messages:
-        # Gracefully handle missing response_time (backwards compatibility)
-        response_time = item.get('response_time', 0)
-        if response_time is None:
-            response_time = 0
-        csv_content += (
-            f"{clean_csv(item.get('created_at', ''))},"
-            f"{clean_csv(item.get('user_id', 'Unknown'))},"
-            f"{clean_csv(item.get('user_prompt', ''))},"
-            f"{clean_csv(item.get('bot_response', ''))},"
-            f"{clean_csv(response_time)}\n"
-        )
-    
-    s3 = boto3.client('s3')
-    S3_DOWNLOAD_BUCKET = os.environ["INTERACTION_S3_DOWNLOAD"]
-
     start_date = start_time.strftime('%Y-%m-%d')
     end_date = end_time.strftime('%Y-%m-%d')
+    file_name = f"interaction-data-{start_date}_to_{end_date}.csv"
+
+    writer = None
+    try:
+        writer = S3MultipartCsvWriter(
+            s3, S3_DOWNLOAD_BUCKET, file_name, INTERACTIONS_CSV_COLUMNS,
+            part_size=INTERACTION_PART_SIZE,
+            lineterminator='\n'
+        )
+
+        # Sessions created in the range, one CreatedDateIndex query per day up to today, or a
+        # parallel scan of the index for very long ranges
+        days = _days_in_range(start_time_iso, end_time_iso)
+        session_users = {}
+        with ThreadPoolExecutor(max_workers=INTERACTION_QUERY_WORKERS) as executor:
+            if len(days) <= INTERACTION_MAX_DAY_QUERIES:
+                session_batches = executor.map(lambda day: _sessions_for_day(day, start_time_iso, end_time_iso), days)
+            else:
+                session_batches = executor.map(
+                    lambda segment: _scan_sessions_in_range(segment, start_time_iso, end_time_iso),
+                    range(INTERACTION_SCAN_SEGMENTS)
+                )
+            for sessions in session_batches:
+                session_users.update(sessions)
+
+            # All messages of those sessions; newer messages are appended by the next cached refresh
+            list(executor.map(
+                lambda session: _write_session_interactions(writer, session[0], session[1], high_water_mark),
+                session_users.items()
+            ))
+
+            # Messages created in the range in sessions that started before it
+            catch_up_end = min(end_time_iso, high_water_mark)
+            if len(days) <= INTERACTION_MAX_DAY_QUERIES:
+                list(executor.map(
+                    lambda day: _write_catch_up_day(writer, day, session_users, start_time_iso, catch_up_end),
+                    days
+                ))
+            else:
+                list(executor.map(
+                    lambda segment: _write_catch_up_segment(writer, segment, session_users, start_time_iso, catch_up_end),
+                    range(INTERACTION_SCAN_SEGMENTS)
+                ))
+
+        etag = writer.complete()
+        log.info("Interaction download written", file_name=file_name, sessions=len(session_users), rows=writer.rows_written)
+    except Exception as e:
+        log.exception("Error retrieving interaction data", error=str(e))
+        if writer and not writer.abort():
+            log.warning("Failed to abort multipart upload", upload_id=writer.upload_id)
+        return {
+            'headers': {'Access-Control-Allow-Origin': "*"},
+            'statusCode': 500,
+            'body': json.dumps('Failed to retrieve interaction data for download: ' + str(e))
+        }
 
     try:
-        file_name = f"interaction-data-{start_date}_to_{end_date}.csv"
-        s3.put_object(Bucket=S3_DOWNLOAD_BUCKET, Key=file_name, Body=csv_content)
+        save_export_cache(s3, S3_DOWNLOAD_BUCKET, cache_key, {
+            'export_type': 'interactions',
+            'start_time': start_time_iso,
+            'end_time': end_time_iso,
+            'file_name': file_name,
+            'etag': etag,
+            'high_water_mark': high_water_mark,
+            'built_at': datetime.now().isoformat()
+        })
         presigned_url = s3.generate_presigned_url(
             'get_object',
             Params={'Bucket': S3_DOWNLOAD_BUCKET, 'Key': file_name},
@@ -263,7 +398,7 @@ def download_interactions(event):
         )
 
     except Exception as e:
-        print(f"S3 error: {str(e)}")
+        log.exception("S3 error", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': "*"},
             'statusCode': 500,
@@ -273,18 +408,316 @@ def download_interactions(event):
     return {
         'headers': {'Access-Control-Allow-Origin': "*"},
         'statusCode': 200,
-        'body': json.dumps({'download_url': presigned_url})
+        'body': json.dumps(_archive_notice({'download_url': presigned_url}, start_time_iso))
+    }
+
+
+def _interaction_rows(messages):
+    """CSV rows for a list of messages carrying user_id"""
+    rows = []
+    for item in messages:
+        # Gracefully handle missing response_time (backwards compatibility)
+        response_time = item.get('response_time', 0)
+        if response_time is None:
+            response_time = 0
+        rows.append([
+            item.get('created_at', ''),
+            item.get('user_id', 'Unknown'),
+            item.get('user_prompt', ''),
+            item.get('bot_response', ''),
+            response_time
+        ])
+    return rows
+
+
+def _interactions_csv(messages):
+    """CSV lines (without the header) for a list of messages carrying user_id"""
+    output = io.StringIO()
+    csv.writer(output, lineterminator='\n').writerows(_interaction_rows(messages))
+    return output.getvalue()
+
+
+def _sessions_for_day(day, start_time_iso, end_time_iso):
+    """{session_id: user_id} of the sessions created on a day within the range"""
+    query_params = {
+        'IndexName': 'CreatedDateIndex',
+        'KeyConditionExpression': Key('created_date').eq(day) & Key('created_at').between(start_time_iso, end_time_iso),
+        'ProjectionExpression': 'pk_session_id, user_id'
+    }
+    sessions = {}
+    while True:
+        response = sessions_table.query(**query_params)
+        for session in response.get('Items', []):
+            sessions[session['pk_session_id']] = session.get('user_id', 'Unknown')
+        if not response.get('LastEvaluatedKey'):
+            return sessions
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _scan_sessions_in_range(segment, start_time_iso, end_time_iso):
+    """{session_id: user_id} of the sessions created in the range, from one CreatedDateIndex scan segment"""
+    scan_params = {
+        'IndexName': 'CreatedDateIndex',
+        'FilterExpression': Attr('created_at').between(start_time_iso, end_time_iso),
+        'ProjectionExpression': 'pk_session_id, user_id',
+        'Segment': segment,
+        'TotalSegments': INTERACTION_SCAN_SEGMENTS
+    }
+    sessions = {}
+    while True:
+        response = sessions_table.scan(**scan_params)
+        for session in response.get('Items', []):
+            sessions[session['pk_session_id']] = session.get('user_id', 'Unknown')
+        if not response.get('LastEvaluatedKey'):
+            return sessions
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _write_session_interactions(writer, session_id, user_id, high_water_mark):
+    """Write every message of a session up to the high-water mark, one query page at a time"""
+    query_params = {
+        'IndexName': 'SessionMessagesIndex',
+        'KeyConditionExpression': Key('sk_session_id').eq(session_id) & Key('created_at').lte(high_water_mark),
+        'ProjectionExpression': INTERACTION_PROJECTION
+    }
+    while True:
+        response = messages_table.query(**query_params)
+        messages = response.get('Items', [])
+        for msg in messages:
+            msg['user_id'] = user_id
+        writer.write_rows(_interaction_rows(messages))
+        if not response.get('LastEvaluatedKey'):
+            return
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _batch_get_sessions(session_ids, projection):
+    """{session_id: session item} for sessions looked up with BatchGetItem; missing sessions are left out"""
+    sessions = batch_get_keys(
+        dynamodb,
+        sessions_table.name,
+        [{'pk_session_id': session_id} for session_id in session_ids],
+        ProjectionExpression=projection
+    )
+    return {session['pk_session_id']: session for session in sessions}
+
+
+def _session_user_ids(session_ids):
+    """{session_id: user_id} for sessions looked up with BatchGetItem; missing sessions map to Unknown"""
+    sessions = _batch_get_sessions(session_ids, 'pk_session_id, user_id')
+    return {session_id: sessions.get(session_id, {}).get('user_id', 'Unknown') for session_id in session_ids}
+
+
+def _days_in_range(start_time_iso, end_time_iso):
+    """YYYY-MM-DD day buckets from the start of the range to its end or today, whichever is first"""
+    first_day = datetime.strptime(start_time_iso[:10], '%Y-%m-%d').date()
+    last_day = min(datetime.strptime(end_time_iso[:10], '%Y-%m-%d').date(), datetime.now().date())
+    return [(first_day + timedelta(days=offset)).strftime('%Y-%m-%d') for offset in range((last_day - first_day).days + 1)]
+
+
+def _query_message_day(day, start_time_iso, end_time_iso, limit=None, exclusive_start_key=None, projection=None, newest_first=False):
+    """One CreatedDateIndex query page of the messages created on a day within the range; returns (items, last_evaluated_key)"""
+    query_params = {
+        'IndexName': 'CreatedDateIndex',
+        'KeyConditionExpression': Key('created_date').eq(day) & Key('created_at').between(start_time_iso, end_time_iso),
+        'ScanIndexForward': not newest_first
+    }
+    if limit:
+        query_params['Limit'] = limit
+    if exclusive_start_key:
+        query_params['ExclusiveStartKey'] = exclusive_start_key
+    if projection:
+        query_params['ProjectionExpression'] = projection
+    response = messages_table.query(**query_params)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def _message_index_key(message):
+    """ExclusiveStartKey that resumes a CreatedDateIndex query right after a message"""
+    return {attribute: message[attribute] for attribute in ('created_date', 'created_at', 'pk_message_id', 'sk_session_id')}
+
+
+def _messages_page(start_time_iso, end_time_iso, page_size, cursor=None):
+    """
+    One page of the messages created in the range, newest first. Days are queried newest
+    first in windows that double up to INTERACTION_QUERY_WORKERS days run in parallel, so a
+    page in a busy range costs about one query while sparse ranges still move quickly. A page
+    covers at most INTERACTION_MAX_DAY_QUERIES days. Returns (items, next_cursor).
+    """
+    days = _days_in_range(start_time_iso, end_time_iso)[::-1]
+    start_key = None
+    if cursor:
+        if cursor.get('day') not in days:
+            raise ValueError("nextPageToken does not belong to this time range")
+        days = days[days.index(cursor['day']):]
+        start_key = cursor.get('key')
+
+    items = []
+    position = 0
+    window_size = 1
+    with ThreadPoolExecutor(max_workers=INTERACTION_QUERY_WORKERS) as executor:
+        while position < len(days):
+            if len(items) >= page_size or position >= INTERACTION_MAX_DAY_QUERIES:
+                return items, {'day': days[position]}
+            window = days[position:position + window_size]
+            remaining = page_size - len(items)
+            futures = [
+                executor.submit(_query_message_day, day, start_time_iso, end_time_iso, remaining,
+                                start_key if offset == 0 else None, None, True)
+                for offset, day in enumerate(window)
+            ]
+            start_key = None
+            consumed = len(window)
+            for offset, (day, future) in enumerate(zip(window, futures)):
+                day_items, last_key = future.result()
+                while True:
+                    room = page_size - len(items)
+                    items.extend(day_items[:room])
+                    if len(day_items) > room or (len(items) >= page_size and last_key):
+                        # The page ends inside this day
+                        return items, {'day': day, 'key': _message_index_key(items[-1])}
+                    if not last_key or len(items) >= page_size:
+                        break
+                    day_items, last_key = _query_message_day(day, start_time_iso, end_time_iso, page_size - len(items), last_key, None, True)
+                if len(items) >= page_size:
+                    consumed = offset + 1
+                    break
+            position += consumed
+            window_size = min(window_size * 2, INTERACTION_QUERY_WORKERS)
+    return items, None
+
+
+def _write_earlier_session_interactions(writer, messages, session_users, earlier_session_users):
+    """
+    Write the messages whose session started before the range (sessions in session_users were
+    written in full already). earlier_session_users caches the owners looked up so far.
+    """
+    messages = [msg for msg in messages if msg.get('sk_session_id') not in session_users]
+    # Only messages written before user_id was copied onto them need their session looked up
+    unknown = {msg['sk_session_id'] for msg in messages if not msg.get('user_id')} - earlier_session_users.keys()
+    if unknown:
+        earlier_session_users.update(_session_user_ids(unknown))
+    for msg in messages:
+        if not msg.get('user_id'):
+            msg['user_id'] = earlier_session_users[msg['sk_session_id']]
+    writer.write_rows(_interaction_rows(messages))
+
+
+def _write_catch_up_day(writer, day, session_users, start_time_iso, end_time_iso):
+    """Catch-up pass over the messages created on one day, read through CreatedDateIndex"""
+    earlier_session_users = {}
+    last_key = None
+    while True:
+        messages, last_key = _query_message_day(
+            day, start_time_iso, end_time_iso, exclusive_start_key=last_key,
+            projection=f"sk_session_id, user_id, {INTERACTION_PROJECTION}"
+        )
+        _write_earlier_session_interactions(writer, messages, session_users, earlier_session_users)
+        if not last_key:
+            return
+
+
+def _write_catch_up_segment(writer, segment, session_users, start_time_iso, end_time_iso):
+    """Catch-up pass over one parallel scan segment of the messages table, for very long ranges"""
+    scan_params = {
+        'FilterExpression': Attr('created_at').between(start_time_iso, end_time_iso),
+        'ProjectionExpression': f"sk_session_id, user_id, {INTERACTION_PROJECTION}",
+        'Segment': segment,
+        'TotalSegments': INTERACTION_SCAN_SEGMENTS
+    }
+    earlier_session_users = {}
+    while True:
+        response = messages_table.scan(**scan_params)
+        _write_earlier_session_interactions(writer, response.get('Items', []), session_users, earlier_session_users)
+        if not response.get('LastEvaluatedKey'):
+            return
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _archive_notice(body, start_time):
+    """Add archived_before to a response body if the range starts before the archive horizon"""
+    horizon = (datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)).strftime('%Y-%m-%d')
+    if start_time[:10] < horizon:
+        body['archived_before'] = horizon
+    return body
+
+
+def _interactions_since(start_time_iso, end_time_iso, since, until):
+    """
+    Interactions for the range created in (since, until], read day by day through the messages
+    CreatedDateIndex. Messages after the end of the range only belong to it when their session
+    was created in the range, so those sessions (and the owners of messages written before
+    user_id was copied onto them) are looked up with one BatchGetItem per 100 sessions.
+    """
+    lower = max(start_time_iso, since)
+    if lower >= until:
+        return []
+
+    def read_day(day):
+        messages, last_key = [], None
+        while True:
+            items, last_key = _query_message_day(
+                day, lower, until, exclusive_start_key=last_key,
+                projection=f"sk_session_id, user_id, {INTERACTION_PROJECTION}"
+            )
+            messages.extend(item for item in items if item['created_at'] > since)
+            if not last_key:
+                return messages
+
+    with ThreadPoolExecutor(max_workers=INTERACTION_QUERY_WORKERS) as executor:
+        messages = [msg for day_messages in executor.map(read_day, _days_in_range(lower, until)) for msg in day_messages]
+
+    lookups = {msg['sk_session_id'] for msg in messages if msg['created_at'] > end_time_iso or not msg.get('user_id')}
+    sessions = _batch_get_sessions(lookups, 'pk_session_id, user_id, created_at') if lookups else {}
+    interactions = []
+    for msg in messages:
+        session = sessions.get(msg['sk_session_id'], {})
+        if msg['created_at'] > end_time_iso and not start_time_iso <= session.get('created_at', '') <= end_time_iso:
+            continue
+        if not msg.get('user_id'):
+            msg['user_id'] = session.get('user_id', 'Unknown')
+        interactions.append(msg)
+    interactions.sort(key=lambda msg: msg['created_at'])
+    return interactions
+
+
+def _refresh_interactions_download(s3, bucket, cache_key, manifest, manifest_etag, high_water_mark):
+    """
+    Append the interactions written since a cached download was built into a new copy of
+    its CSV (copied server side, so only the new rows are uploaded), swap the manifest to it
+    with an advanced high-water mark and return a fresh link to it.
+    """
+    messages = _interactions_since(manifest['start_time'], manifest['end_time'], manifest['high_water_mark'], high_water_mark)
+    previous_file_name = manifest['file_name']
+    if messages:
+        manifest['file_name'] = export_cache_file_key(previous_file_name)
+        manifest['etag'] = copy_with_appended(
+            s3, bucket, previous_file_name, manifest['file_name'], _interactions_csv(messages).encode('utf-8')
+        )
+    manifest['high_water_mark'] = max(manifest['high_water_mark'], high_water_mark)
+    manifest = swap_export_cache(s3, bucket, cache_key, manifest, manifest_etag, previous_file_name)
+    log.info("Served cached interactions", file_name=manifest['file_name'], messages_appended=len(messages))
+
+    presigned_url = s3.generate_presigned_url(
+        'get_object',
+        Params={'Bucket': bucket, 'Key': manifest['file_name']},
+        ExpiresIn=3600
+    )
+    return {
+        'headers': {'Access-Control-Allow-Origin': "*"},
+        'statusCode': 200,
+        'body': json.dumps(_archive_notice({'download_url': presigned_url}, manifest['start_time']))
     }
 
 
 def get_interactions(event):
     """
-    Retrieve chatbot interactions from the messages table.
-    Supports pagination via nextPageToken.
+    Retrieve chatbot interactions from the messages table, newest first.
+    Supports pagination via nextPageToken and pageSize.
     """
     try:
         query_params = event.get('queryStringParameters', {})
-        print("Query params:", query_params)
+        log.info("get_interactions", query_params=query_params)
         start_time = query_params.get('startTime')
         end_time = query_params.get('endTime')
         exclusive_start_key = query_params.get('nextPageToken')
@@ -301,25 +734,15 @@ def get_interactions(event):
                 'body': json.dumps({'error': 'Missing required query parameters'})
             }
 
-        # First, get messages in the time range
-        scan_kwargs = {
-            'FilterExpression': Attr("created_at").between(start_time_iso, end_time_iso),
-        }
-        
-        if exclusive_start_key:
-            scan_kwargs['ExclusiveStartKey'] = json.loads(exclusive_start_key)
-
-        response = messages_table.scan(**scan_kwargs)
-        messages = response.get('Items', [])
+        page_size = min(int(query_params.get('pageSize', DEFAULT_INTERACTIONS_PAGE_SIZE)), MAX_INTERACTIONS_PAGE_SIZE)
+        if page_size < 1:
+            raise ValueError("pageSize must be positive")
+        cursor = json.loads(exclusive_start_key) if exclusive_start_key else None
+        messages, next_cursor = _messages_page(start_time_iso, end_time_iso, page_size, cursor)
         
-        # Get user_ids from sessions
-        session_ids = set(m.get('sk_session_id') for m in messages if m.get('sk_session_id'))
-        session_user_map = {}
-        
-        for session_id in session_ids:
-            session_resp = sessions_table.get_item(Key={'pk_session_id': session_id})
-            if 'Item' in session_resp:
-                session_user_map[session_id] = session_resp['Item'].get('user_id', 'Unknown')
+        # Messages carry user_id; ones written before that fall back to one BatchGetItem
+        session_ids = set(m['sk_session_id'] for m in messages if not m.get('user_id') and m.get('sk_session_id'))
+        session_user_map = _session_user_ids(session_ids) if session_ids else {}
         
         # Format response to match expected KPI format
         formatted_items = []
@@ -331,7 +754,7 @@ def get_interactions(event):
                 response_time = 0
             formatted_items.append({
                 'Timestamp': msg.get('created_at', ''),
-                'Username': session_user_map.get(session_id, 'Unknown'),
+                'Username': msg.get('user_id') or session_user_map.get(session_id, 'Unknown'),
                 'UserPrompt': msg.get('user_prompt', ''),
                 'BotMessage': msg.get('bot_response', ''),
                 'ResponseTime': response_time,
@@ -339,15 +762,12 @@ def get_interactions(event):
                 'SessionId': session_id
             })
         
-        # Sort by timestamp descending
-        formatted_items.sort(key=lambda x: x['Timestamp'], reverse=True)
-
-        body = {
+        body = _archive_notice({
             'Items': formatted_items
-        }
+        }, start_time_iso)
 
-        if 'LastEvaluatedKey' in response:
-            body['NextPageToken'] = json.dumps(response['LastEvaluatedKey'])
+        if next_cursor:
+            body['NextPageToken'] = json.dumps(next_cursor)
 
         return {
             'headers': {'Access-Control-Allow-Origin': "*"},
@@ -355,10 +775,14 @@ def get_interactions(event):
             'body': json.dumps(body, cls=DecimalEncoder)
         }
 
+    except ValueError as e:
+        return {
+            'headers': {'Access-Control-Allow-Origin': "*"},
+            'statusCode': 400,
+            'body': json.dumps({'error': str(e)})
+        }
     except Exception as e:
-        print(f"Error retrieving interactions: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error retrieving interactions", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': "*"},
             'statusCode': 500,
@@ -387,8 +811,38 @@ def delete_interactions(event):
             Key={
                 'pk_message_id': message_id,
                 'sk_session_id': session_id
-            }
+            },
+            ReturnValues='ALL_OLD'
         )
+
+        # Keep the session's message_count in step, which also invalidates cached histories
+        if response.get('Attributes'):
+            try:
+                sessions_table.update_item(
+                    Key={'pk_session_id': session_id},
+                    UpdateExpression='ADD message_count :dec',
+                    ConditionExpression='attribute_exists(pk_session_id)',
+                    ExpressionAttributeValues={':dec': -1}
+                )
+            except sessions_table.meta.client.exceptions.ConditionalCheckFailedException:
+                pass
+
+        # Remove the timeline copy as well. Backfilled legacy messages use a derived sort key,
+        # so look it up by message ID within the session rather than assuming it.
+        query_params = {
+            'KeyConditionExpression': Key('pk_session_id').eq(session_id),
+            'FilterExpression': Attr('pk_message_id').eq(message_id),
+            'ProjectionExpression': 'pk_session_id, sk_message_id'
+        }
+        while True:
+            timeline_response = timeline_table.query(**query_params)
+            for key in timeline_response.get('Items', []):
+                timeline_table.delete_item(Key=key)
+            if 'LastEvaluatedKey' not in timeline_response:
+                break
+            query_params['ExclusiveStartKey'] = timeline_response['LastEvaluatedKey']
+        # The session's history snapshot may hold the deleted turn; the session handler rebuilds it
+        timeline_table.delete_item(Key={'pk_session_id': session_id, 'sk_message_id': SNAPSHOT_SORT_KEY})
         
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
@@ -396,7 +850,7 @@ def delete_interactions(event):
             'body': json.dumps({'message': 'Interaction item deleted successfully'})
         }
     except Exception as e:
-        print(f"Error deleting interaction: {str(e)}")
+        log.exception("Error deleting interaction", error=str(e))
         return {
             'headers': {'Access-Control-Allow-Origin': '*'},
             'statusCode': 500,
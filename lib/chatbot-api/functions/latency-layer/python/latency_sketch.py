@@ -0,0 +1,127 @@
+"""
+Response-time rollups as DDSketch summaries, deployed as a Lambda layer. The session handler
+adds each stored turn's response_time and the KPI handler merges the hours of a range to
+report percentiles and histograms.
+
+The rollup table holds one item per hour, keyed by `pk_date` (YYYY-MM-DD) and `sk_hour` (HH).
+Response times fall in logarithmic buckets whose width is set by RELATIVE_ACCURACY. Each
+bucket's count is a top-level number attribute (`b<index>`, `bm<index>` for negative
+indexes), next to `response_count` and `response_time_sum`. New turns are recorded with one
+atomic ADD per hour, and hours merge into days or ranges by adding bucket counts, so any
+quantile is within RELATIVE_ACCURACY of the exact value.
+
+Usage:
+    table.update_item(Key=..., **rollup_update([1.8, 2.4]))
+    sketch = LatencySketch()
+    for item in hour_items:
+        sketch.merge(LatencySketch.from_item(item))
+    sketch.summary()    # {'count': ..., 'mean': ..., 'p50': ..., 'p90': ..., 'p99': ...}
+"""
+
+import math
+import re
+from collections import Counter
+from decimal import Decimal
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+# Smaller response times are counted in the bucket of this value
+MIN_TRACKED_SECONDS = 0.001
+QUANTILES = {'p50': 0.5, 'p90': 0.9, 'p99': 0.99}
+
+BUCKET_ATTRIBUTE = re.compile(r'^b(m?)(\d+)$')
+
+
+def bucket_index(value):
+    return math.ceil(math.log(max(value, MIN_TRACKED_SECONDS)) / LOG_GAMMA)
+
+
+def bucket_value(index):
+    """Value reported for a bucket, within RELATIVE_ACCURACY of everything counted in it"""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+def bucket_attribute(index):
+    return f"b{index}" if index >= 0 else f"bm{-index}"
+
+
+def rollup_update(response_times):
+    """update_item arguments that ADD response times (in seconds) to an hour's rollup item"""
+    counts = Counter(bucket_attribute(bucket_index(value)) for value in response_times)
+    names = {f"#{attribute}": attribute for attribute in counts}
+    values = {f":{attribute}": count for attribute, count in counts.items()}
+    values[':count'] = len(response_times)
+    values[':sum'] = Decimal(str(round(sum(response_times), 6)))
+    terms = [f"#{attribute} :{attribute}" for attribute in counts]
+    return {
+        'UpdateExpression': "ADD " + ", ".join(terms + ["response_count :count", "response_time_sum :sum"]),
+        'ExpressionAttributeNames': names,
+        'ExpressionAttributeValues': values
+    }
+
+
+class LatencySketch:
+    def __init__(self):
+        self.buckets = Counter()
+        self.count = 0
+        self.total = 0.0
+
+    @classmethod
+    def from_item(cls, item):
+        sketch = cls()
+        for name, value in item.items():
+            match = BUCKET_ATTRIBUTE.match(name)
+            if match:
+                index = int(match.group(2))
+                sketch.buckets[-index if match.group(1) else index] += int(value)
+        sketch.count = int(item.get('response_count', 0))
+        sketch.total = float(item.get('response_time_sum', 0))
+        return sketch
+
+    def add(self, value):
+        self.buckets[bucket_index(value)] += 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other):
+        self.buckets.update(other.buckets)
+        self.count += other.count
+        self.total += other.total
+        return self
+
+    def item_attributes(self):
+        """Attributes of a rollup item holding this sketch, for rebuilding an hour with put_item"""
+        attributes = {bucket_attribute(index): count for index, count in self.buckets.items()}
+        attributes['response_count'] = self.count
+        attributes['response_time_sum'] = Decimal(str(round(self.total, 6)))
+        return attributes
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return bucket_value(index)
+        return bucket_value(max(self.buckets))
+
+    def histogram(self, bounds):
+        """Counts per bin: at most bounds[0], each (bounds[i-1], bounds[i]], and above bounds[-1]"""
+        counts = [0] * (len(bounds) + 1)
+        for index, count in self.buckets.items():
+            value = bucket_value(index)
+            counts[next((position for position, bound in enumerate(bounds) if value <= bound), len(bounds))] += count
+        return counts
+
+    def summary(self):
+        summary = {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None
+        }
+        for name, q in QUANTILES.items():
+            value = self.quantile(q)
+            summary[name] = round(value, 3) if value is not None else None
+        return summary
@@ -0,0 +1,119 @@
+"""
+Structured JSON logging for the Python Lambda handlers, deployed as a Lambda layer.
+
+Every record is written as one JSON line holding level, logger, message, the Lambda
+request_id and any keyword fields, so CloudWatch Logs Insights can filter on them.
+Output is kept bounded:
+- string fields (and fields whose JSON form is longer) are truncated to LOG_MAX_FIELD_CHARS
+- debug records, used for request and payload dumps, are only written for a sampled
+  share of invocations (LOG_DEBUG_SAMPLE_RATE) at INFO, or always when LOG_LEVEL is DEBUG
+- each invocation may write LOG_INVOCATION_BYTE_BUDGET bytes; later records are dropped
+  and counted, except errors, which are always written
+
+Usage:
+    log = get_logger("session-handler")
+
+    @log.handler
+    def lambda_handler(event, context):
+        log.debug("Request body", body=data)
+        log.info("Export completed", job_id=job_id, rows=rows)
+"""
+
+import functools
+import json
+import os
+import random
+import sys
+import threading
+import traceback
+
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40}
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "1024"))
+LOG_INVOCATION_BYTE_BUDGET = int(os.getenv("LOG_INVOCATION_BYTE_BUDGET", str(64 * 1024)))
+
+
+class StructuredLogger:
+    def __init__(self, name):
+        self.name = name
+        self.level = LEVELS.get(LOG_LEVEL, LEVELS['INFO'])
+        self.lock = threading.Lock()
+        self._start_invocation(None)
+
+    def _start_invocation(self, request_id):
+        self.request_id = request_id
+        self.bytes_written = 0
+        self.dropped = 0
+        self.sampled = self.level <= LEVELS['DEBUG'] or (
+            self.level <= LEVELS['INFO'] and random.random() < LOG_DEBUG_SAMPLE_RATE
+        )
+
+    def handler(self, func):
+        """Decorate a lambda_handler so the budget, sampling and request_id are per invocation"""
+        @functools.wraps(func)
+        def wrapper(event, context):
+            self._start_invocation(getattr(context, 'aws_request_id', None))
+            try:
+                return func(event, context)
+            finally:
+                if self.dropped:
+                    self._write('WARNING', "Log budget exhausted", {
+                        'dropped_records': self.dropped,
+                        'budget_bytes': LOG_INVOCATION_BYTE_BUDGET
+                    }, always=True)
+        return wrapper
+
+    def _truncate(self, value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if not isinstance(value, str):
+            text = json.dumps(value, default=str)
+            if len(text) <= LOG_MAX_FIELD_CHARS:
+                return value
+            value = text
+        if len(value) > LOG_MAX_FIELD_CHARS:
+            return f"{value[:LOG_MAX_FIELD_CHARS]}...[{len(value) - LOG_MAX_FIELD_CHARS} more chars]"
+        return value
+
+    def _write(self, level, message, fields, always=False):
+        record = {'level': level, 'logger': self.name, 'message': self._truncate(message)}
+        if self.request_id:
+            record['request_id'] = self.request_id
+        for key, value in fields.items():
+            record[key] = self._truncate(value)
+        line = json.dumps(record, default=str) + "\n"
+
+        with self.lock:
+            if not always and self.bytes_written + len(line) > LOG_INVOCATION_BYTE_BUDGET:
+                self.dropped += 1
+                return
+            self.bytes_written += len(line)
+        sys.stdout.write(line)
+
+    def debug(self, message, **fields):
+        if self.sampled:
+            self._write('DEBUG', message, fields)
+
+    def info(self, message, **fields):
+        if self.level <= LEVELS['INFO']:
+            self._write('INFO', message, fields)
+
+    def warning(self, message, **fields):
+        if self.level <= LEVELS['WARNING']:
+            self._write('WARNING', message, fields)
+
+    def error(self, message, **fields):
+        self._write('ERROR', message, fields, always=True)
+
+    def exception(self, message, **fields):
+        """error() with the current exception's traceback, keeping its innermost frames"""
+        trace = traceback.format_exc()
+        if len(trace) > LOG_MAX_FIELD_CHARS:
+            trace = f"...{trace[3 - LOG_MAX_FIELD_CHARS:]}"
+        self._write('ERROR', message, {**fields, 'traceback': trace}, always=True)
+
+
+def get_logger(name):
+    return StructuredLogger(name)
@@ -4,10 +4,16 @@ from botocore.exceptions import ClientError
 import json
 from datetime import datetime, timedelta
 from collections import defaultdict
+from structured_log import get_logger
+
+log = get_logger("metrics-handler")
 
 DDB_TABLE_NAME = os.environ["DDB_TABLE_NAME"]
 dynamodb = boto3.resource("dynamodb", region_name='us-east-1')
 table = dynamodb.Table(DDB_TABLE_NAME)
+# Sessions created more than ARCHIVE_AFTER_DAYS ago are moved to the S3 archive by the
+# session handler, so the totals only cover sessions created on or after "archived_before"
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", "365"))
 
 def get_unique_users_count():
     """Get total count of unique users from sessions table"""
@@ -36,7 +42,7 @@ def get_unique_users_count():
         
         return len(unique_users)
     except Exception as e:
-        print(f"Error getting unique users count: {e}")
+        log.exception("Error getting unique users count", error=str(e))
         return 0
 
 def get_traffic_metrics():
@@ -79,7 +85,7 @@ def get_traffic_metrics():
                         daily_stats[date_key]["messages"] += message_count
                         unique_users_daily[date_key].add(item.get('user_id'))
                     except Exception as parse_error:
-                        print(f"Error parsing timestamp {timestamp}: {parse_error}")
+                        log.warning("Error parsing timestamp", timestamp=timestamp, error=str(parse_error))
                         pass
             
             last_evaluated_key = response.get("LastEvaluatedKey")
@@ -102,16 +108,16 @@ def get_traffic_metrics():
             "daily_breakdown": daily_breakdown
         }
     except Exception as e:
-        print(f"Error getting traffic metrics: {e}")
+        log.exception("Error getting traffic metrics", error=str(e))
         return {
             "total_sessions": 0,
             "total_messages": 0,
             "daily_breakdown": []
         }
 
+@log.handler
 def lambda_handler(event, context):
-    # DEBUG: Print the entire event to see the structure
-    print(f"Full event: {json.dumps(event)}")
+    log.debug("Request event", event=event)
     
     headers = {
         'Access-Control-Allow-Origin': '*',
@@ -123,21 +129,16 @@ def lambda_handler(event, context):
     admin = False
     try:
         request_context = event.get("requestContext", {}).get("authorizer", {}).get("jwt", {}).get("claims", {})
-        print(f"Request context claims: {json.dumps(request_context)}")
-        
         cognito_groups = request_context.get("cognito:groups", "")
-        print(f"cognito:groups value: {cognito_groups}")
         
         # Check if "Admin" substring is in the groups (handles both "Admin" and "AdminUsers")
         if "Admin" in cognito_groups:
             admin = True
-            print("Admin access granted via cognito:groups")
+            log.info("Admin access granted via cognito:groups")
         else:
-            print(f"User is not in Admin group. Groups: {cognito_groups}")
+            log.info("User is not in Admin group", groups=cognito_groups)
     except Exception as e:
-        print(f"Error checking admin status: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error checking admin status", error=str(e))
     
     # Handle OPTIONS request
     http_method = event.get('routeKey', '')
@@ -172,7 +173,8 @@ def lambda_handler(event, context):
             "unique_users": unique_users,
             "total_sessions": traffic_metrics["total_sessions"],
             "total_messages": traffic_metrics["total_messages"],
-            "daily_breakdown": traffic_metrics["daily_breakdown"]
+            "daily_breakdown": traffic_metrics["daily_breakdown"],
+            "archived_before": (datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)).strftime('%Y-%m-%d')
         }
         
         return {
@@ -181,9 +183,7 @@ def lambda_handler(event, context):
             'body': json.dumps(response_data)
         }
     except Exception as e:
-        print(f"Error in lambda_handler: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Error in lambda_handler", error=str(e))
         return {
             'statusCode': 500,
             'headers': headers,
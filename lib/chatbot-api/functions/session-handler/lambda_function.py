@@ -2,22 +2,134 @@ import os
 import boto3
 from botocore.exceptions import ClientError
 import json
-from datetime import datetime, timezone
+import base64
+from datetime import datetime, timezone, timedelta
 from decimal import Decimal
 import uuid
+import hashlib
+import hmac
+import zlib
+import gzip
 from boto3.dynamodb.conditions import Key, Attr
 import csv
 import io
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import OrderedDict, defaultdict
+import threading
+import copy
+import time
+import re
+import bisect
+from structured_log import get_logger
+from daily_users import record_users
+from dynamodb_batch import batch_get_items, batch_get_keys
+from latency_sketch import LatencySketch, rollup_update
+from s3_csv_export import (
+    S3MultipartCsvWriter, copy_with_appended, export_cache_key, export_high_water_mark,
+    load_export_cache, save_export_cache, export_cache_file_key, swap_export_cache
+)
 
 SESSIONS_TABLE = os.getenv("SESSION_TABLE")
 MESSAGES_TABLE = os.getenv("MESSAGES_TABLE")
 REVIEWS_TABLE = os.getenv("REVIEW_TABLE")
+TIMELINE_TABLE = os.getenv("TIMELINE_TABLE")
+CURSOR_SECRET_ARN = os.getenv("CURSOR_SECRET_ARN")
+DAILY_USERS_TABLE = os.getenv("DAILY_USERS_TABLE")
+RESPONSE_TIME_ROLLUP_TABLE = os.getenv("RESPONSE_TIME_ROLLUP_TABLE")
+
+log = get_logger("session-handler")
 
 dynamodb = boto3.resource("dynamodb", region_name='us-east-1')
 sessions_table = dynamodb.Table(SESSIONS_TABLE)
 messages_table = dynamodb.Table(MESSAGES_TABLE)
 reviews_table = dynamodb.Table(REVIEWS_TABLE)
+timeline_table = dynamodb.Table(TIMELINE_TABLE)
+daily_users_table = dynamodb.Table(DAILY_USERS_TABLE)
+response_time_rollup_table = dynamodb.Table(RESPONSE_TIME_ROLLUP_TABLE)
+
+# Sessions with more messages than this finish deleting in the background
+DELETE_SYNC_MESSAGE_LIMIT = 1000
+BATCH_WRITE_MAX_RETRIES = 8
+
+# Messages per TransactWriteItems call in batch appends. Each message is written to the
+# messages and timeline tables, plus one session update, kept well under the 100 item / 4 MB limits
+MAX_TRANSACT_MESSAGES = 12
+
+# Upper bound for a single page of messages returned by get_session
+MAX_MESSAGE_PAGE_SIZE = 100
+# Upper bound for session IDs in one get_sessions_batch call (the BatchGetItem limit)
+MAX_SESSION_BATCH_SIZE = 100
+# Serialized chat history returned by one get_sessions_batch call, kept under the 6 MB Lambda response limit
+MAX_SESSION_BATCH_BYTES = 5 * 1024 * 1024
+
+# Default and upper bound for a page of a user's sessions
+DEFAULT_SESSION_PAGE_SIZE = 15
+MAX_SESSION_PAGE_SIZE = 100
+
+# Default and upper bound for a page of list_reviews_by_reviewer
+DEFAULT_REVIEW_PAGE_SIZE = 25
+MAX_REVIEW_PAGE_SIZE = 100
+# Trailing UTC designator or offset of an ISO timestamp bound
+TIMESTAMP_OFFSET_PATTERN = re.compile(r"(Z|[+-]\d{2}:\d{2})$")
+
+# Compressed snapshot of the latest turns, kept as its own row of the timeline table so the
+# session item (copied to UserSessionsIndex and read by every sessions scan) stays small.
+# SNAPSHOT_SORT_KEY sorts before every MESSAGE- key of the session's timeline.
+SNAPSHOT_MAX_TURNS = 10
+SNAPSHOT_MAX_BYTES = 32 * 1024
+SNAPSHOT_SORT_KEY = "#SNAPSHOT"
+# Snapshot attributes earlier deploys kept on the session item; removed by the next append
+SNAPSHOT_ATTRIBUTES = ('history_snapshot', 'snapshot_message_count', 'snapshot_complete')
+
+# Warm-container cache of full session histories, bounded by entries and messages per session
+SESSION_CACHE_MAX_ENTRIES = 32
+SESSION_CACHE_MAX_MESSAGES = 500
+# Session attributes re-read on every cache lookup; message_count and updated_at detect new messages
+SESSION_CACHE_VALIDATION_ATTRIBUTES = [
+    'updated_at', 'message_count', 'title', 'has_feedback', 'feedback_count',
+    'has_review', 'review_id', 'reviewed_by'
+]
+
+# Warm-container title search index, one entry per user. An entry picks up newer sessions on
+# every search; it is rebuilt after SEARCH_INDEX_MAX_AGE_SECONDS to drop sessions deleted elsewhere.
+SEARCH_INDEX_MAX_USERS = 64
+SEARCH_INDEX_MAX_AGE_SECONDS = 300
+DEFAULT_SEARCH_RESULTS = 15
+MAX_SEARCH_RESULTS = 100
+
+# Messages read per query page when assembling a budgeted chat history
+CHAT_HISTORY_PAGE_SIZE = 20
+
+# Prefix of every message sort key in the timeline table
+TIMELINE_MESSAGE_PREFIX = "MESSAGE-"
+
+# Concurrent DynamoDB queries used when fanning out over sessions or days
+SESSION_QUERY_WORKERS = 10
+
+# Parallel scan segments and multipart part size for the session CSV export
+EXPORT_SCAN_SEGMENTS = 8
+EXPORT_PART_SIZE = 5 * 1024 * 1024
+# Concurrent review lookups per scanned page, kept small since every segment runs its own pool
+EXPORT_REVIEW_WORKERS = 4
+
+# Export job manifests, progress cadence and how close to the Lambda timeout a job checkpoints
+EXPORT_JOB_PREFIX = "export-jobs/"
+EXPORT_PROGRESS_INTERVAL_SECONDS = 10
+EXPORT_CHECKPOINT_MARGIN_MS = 120 * 1000
+
+# Cached exports are topped up through s3_csv_export; refreshes touching more sessions
+# than this run as a full export job instead
+EXPORT_CACHE_MAX_DELTA_SESSIONS = 500
+
+# Sessions older than ARCHIVE_AFTER_DAYS move from DynamoDB to gzipped JSONL in S3
+SESSION_ARCHIVE_BUCKET = os.getenv("SESSION_ARCHIVE_BUCKET")
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "365"))
+ARCHIVE_PREFIX = "session-archive/"
+ARCHIVE_PART_BYTES = 32 * 1024 * 1024
+ARCHIVE_CHECKPOINT_MARGIN_MS = 60 * 1000
+
+# Days rebuilt per rebuild_latency_rollups call
+MAX_LATENCY_REBUILD_DAYS = 31
 
 # Custom JSON encoder
 class DecimalEncoder(json.JSONEncoder):
@@ -26,236 +138,1086 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+
+def _response(status_code, body, **dumps_options):
+    """API Gateway response with a JSON body; dumps_options go to json.dumps (e.g. cls=DecimalEncoder)"""
+    return {
+        'statusCode': status_code,
+        'headers': {'Access-Control-Allow-Origin': '*'},
+        'body': json.dumps(body, **dumps_options)
+    }
+
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_RANDOM_BITS = 80
+_ulid_lock = threading.Lock()
+_ulid_state = {'ms': -1, 'random': 0}
+
+def _encode_ulid(timestamp_ms, randomness):
+    """Encode a 48-bit millisecond timestamp and 80 random bits as a 26 character ULID"""
+    value = (timestamp_ms << ULID_RANDOM_BITS) | randomness
+    chars = []
+    for _ in range(26):
+        chars.append(CROCKFORD_BASE32[value & 31])
+        value >>= 5
+    return ''.join(reversed(chars))
+
+def _generate_ulid():
+    """
+    Millisecond-resolution, lexicographically sortable ID. IDs generated in the same
+    millisecond by this container increment the random part, so they stay in creation order.
+    """
+    with _ulid_lock:
+        timestamp_ms = int(time.time() * 1000)
+        if timestamp_ms <= _ulid_state['ms']:
+            timestamp_ms = _ulid_state['ms']
+            randomness = _ulid_state['random'] + 1
+            if randomness >= 1 << ULID_RANDOM_BITS:
+                timestamp_ms += 1
+                randomness = int.from_bytes(os.urandom(10), 'big')
+        else:
+            randomness = int.from_bytes(os.urandom(10), 'big')
+        _ulid_state['ms'] = timestamp_ms
+        _ulid_state['random'] = randomness
+    return _encode_ulid(timestamp_ms, randomness)
+
+def _is_ulid_id(item_id, prefix):
+    return item_id.startswith(prefix) and len(item_id) == len(prefix) + 26
+
 def _generate_message_id():
-    return f"MESSAGE-{int(datetime.now().timestamp())}-{uuid.uuid4().hex[:8]}"
+    return f"MESSAGE-{_generate_ulid()}"
 
 def _generate_review_id():
-    return f"REVIEW-{int(datetime.now().timestamp())}-{uuid.uuid4().hex[:8]}"
+    return f"REVIEW-{_generate_ulid()}"
 
-def add_new_session_with_first_message(session_id, user_id, title, first_chat_entry):
-    try:
-        session_id = session_id
-        message_id = _generate_message_id()
+def _date_bucket(timestamp):
+    """
+    Day bucket (YYYY-MM-DD) used as the partition key of the sessions and messages CreatedDateIndex
+    """
+    return timestamp[:10]
+
+def _build_message_item(session_id, message_id, chat_entry, created_at, user_id=None):
+    message_item = {
+        'pk_message_id': message_id,
+        'sk_session_id': session_id,
+        'user_prompt': chat_entry['user_prompt'],
+        'bot_response': chat_entry['bot_response'],
+        'sources': chat_entry.get('sources', []),
+        'created_at': created_at,
+        'created_date': _date_bucket(created_at),
+        'response_time': Decimal(str(chat_entry.get('response_time', 0)))
+    }
+    # The session owner is copied onto messages so interaction listings need no session lookups
+    if user_id:
+        message_item['user_id'] = user_id
+    return message_item
+
+
+def _session_user_id(session_id):
+    """Owner of a session, for writers whose caller did not pass user_id"""
+    return sessions_table.get_item(
+        Key={'pk_session_id': session_id},
+        ProjectionExpression='user_id'
+    ).get('Item', {}).get('user_id')
+
+
+def _timeline_sort_key(message):
+    """
+    Sort key of a message in the session timeline table. Messages with ULID-based IDs
+    use the ID itself. Legacy IDs (MESSAGE-<seconds>-<hex>) do not sort in creation order,
+    so they get a ULID built from created_at and a hash of the old ID, which keeps
+    backfills idempotent.
+    """
+    message_id = message['pk_message_id']
+    if _is_ulid_id(message_id, "MESSAGE-"):
+        return message_id
+    created_at = datetime.fromisoformat((message.get('created_at') or message['sent_at']).replace('Z', '+00:00'))
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    randomness = int.from_bytes(hashlib.sha256(message_id.encode('utf-8')).digest()[:10], 'big')
+    return f"MESSAGE-{_encode_ulid(int(created_at.timestamp() * 1000), randomness)}"
 
-        sessions_table.put_item(
-            Item={
-                'pk_session_id': session_id,
-                'user_id': user_id,
-                'title': title.strip(),
-                'created_at': datetime.now().isoformat(),
-                'updated_at': datetime.now().isoformat(),
-                'message_count': 1
-            }
-        )
 
-        messages_table.put_item(
-            Item={
-                'pk_message_id': message_id,
-                'sk_session_id': session_id,
-                'user_prompt': first_chat_entry['user_prompt'],
-                'bot_response': first_chat_entry['bot_response'],
-                'sources': first_chat_entry.get('sources', []),
-                'created_at': datetime.now().isoformat(),
-                'response_time': Decimal(str(first_chat_entry.get('response_time', 0)))
-            }
-        )
+def _build_timeline_item(message_item):
+    """
+    Copy of the immutable parts of a message, keyed by session and time-ordered message ID
+    so "messages after X" can be read with a strongly consistent Query instead of the GSI.
+    """
+    timeline_item = {
+        'pk_session_id': message_item['sk_session_id'],
+        'sk_message_id': _timeline_sort_key(message_item),
+        'pk_message_id': message_item['pk_message_id'],
+        'user_prompt': message_item.get('user_prompt'),
+        'bot_response': message_item.get('bot_response'),
+        'sources': message_item.get('sources', [])
+    }
+    # Prompts recorded by update_session only carry sent_at and are left out of chat history
+    if message_item.get('created_at'):
+        timeline_item['created_at'] = message_item['created_at']
+    else:
+        timeline_item['sent_at'] = message_item['sent_at']
+    return timeline_item
 
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                "session_id": session_id,
-                "message_id": message_id
-            })
+
+def _message_puts(message_item, only_if_new=False):
+    """
+    TransactWriteItems Puts for a new message and its timeline entry. With only_if_new the
+    transaction is cancelled if the message already exists.
+    """
+    message_put = {'TableName': MESSAGES_TABLE, 'Item': message_item}
+    if only_if_new:
+        message_put['ConditionExpression'] = 'attribute_not_exists(pk_message_id)'
+    return [
+        {'Put': message_put},
+        {'Put': {'TableName': TIMELINE_TABLE, 'Item': _build_timeline_item(message_item)}}
+    ]
+
+
+def _session_counter_update(session_id, count, updated_at):
+    """TransactWriteItems Update that bumps message_count and updated_at on a session"""
+    return {
+        'Update': {
+            'TableName': SESSIONS_TABLE,
+            'Key': {'pk_session_id': session_id},
+            'UpdateExpression': "SET updated_at = :updated_at, message_count = message_count + :inc REMOVE " + ", ".join(SNAPSHOT_ATTRIBUTES),
+            'ExpressionAttributeValues': {
+                ':updated_at': updated_at,
+                ':inc': count
+            }
         }
+    }
+
+
+def _transact_write(transact_items):
+    """
+    Run a TransactWriteItems call. The resource's client accepts plain Python values
+    and serializes them the same way Table.put_item / update_item do.
+    """
+    dynamodb.meta.client.transact_write_items(TransactItems=transact_items)
+
+
+def _snapshot_turn(message):
+    """The fields of a message that non-admin chat history is built from"""
+    return {
+        'pk_message_id': message.get('pk_message_id', ''),
+        'user_prompt': message.get('user_prompt', ''),
+        'bot_response': message.get('bot_response', ''),
+        'sources': message.get('sources', []),
+        'created_at': message.get('created_at', '')
+    }
+
+
+def _snapshot_attributes(turns, message_count, complete, last_sort_key):
+    """
+    Snapshot row attributes holding the last SNAPSHOT_MAX_TURNS turns, zlib-compressed and
+    base64-encoded. Oldest turns are dropped until the snapshot fits SNAPSHOT_MAX_BYTES;
+    complete records whether the snapshot still holds the session's whole history and
+    last_sort_key is the newest timeline row it reflects.
+    """
+    turns = [_snapshot_turn(turn) for turn in turns if turn.get('created_at')]
+    if len(turns) > SNAPSHOT_MAX_TURNS:
+        turns = turns[-SNAPSHOT_MAX_TURNS:]
+        complete = False
+    while True:
+        raw = json.dumps(turns, cls=DecimalEncoder, separators=(',', ':')).encode('utf-8')
+        encoded = base64.b64encode(zlib.compress(raw)).decode('ascii')
+        if len(encoded) <= SNAPSHOT_MAX_BYTES or not turns:
+            break
+        turns = turns[1:]
+        complete = False
+    return {
+        'history_snapshot': encoded,
+        'snapshot_message_count': message_count,
+        'snapshot_complete': complete,
+        'snapshot_sort_key': last_sort_key
+    }
+
 
+def _snapshot_item(session_id, turns, message_count, complete, last_sort_key):
+    return {
+        'pk_session_id': session_id,
+        'sk_message_id': SNAPSHOT_SORT_KEY,
+        **_snapshot_attributes(turns, message_count, complete, last_sort_key)
+    }
+
+
+def _decode_snapshot(snapshot_item):
+    return json.loads(zlib.decompress(base64.b64decode(snapshot_item['history_snapshot'])).decode('utf-8'))
+
+
+def _strip_legacy_snapshot(session_item):
+    """Drop snapshot attributes an earlier deploy left on a session item"""
+    for attribute in SNAPSHOT_ATTRIBUTES:
+        session_item.pop(attribute, None)
+    return session_item
+
+
+def _read_snapshot(snapshot_item, message_count):
+    """(turns, complete) if the snapshot row reflects message_count, otherwise (None, False)"""
+    if not snapshot_item or snapshot_item.get('snapshot_message_count') != message_count:
+        return None, False
+    return _decode_snapshot(snapshot_item), snapshot_item.get('snapshot_complete', False)
+
+
+def _get_session_with_snapshot(session_id):
+    """
+    The session item and its snapshot row, read strongly consistent in one BatchGetItem.
+    Returns (session, snapshot_item); either is None if it does not exist.
+    """
+    request_items = {
+        SESSIONS_TABLE: {'Keys': [{'pk_session_id': session_id}], 'ConsistentRead': True},
+        TIMELINE_TABLE: {'Keys': [{'pk_session_id': session_id, 'sk_message_id': SNAPSHOT_SORT_KEY}], 'ConsistentRead': True}
+    }
+    items = batch_get_items(dynamodb.meta.client, request_items)
+    session = next(iter(items[SESSIONS_TABLE]), None)
+    return (_strip_legacy_snapshot(session) if session else None), next(iter(items[TIMELINE_TABLE]), None)
+
+
+def _store_snapshot(session_id, turns, message_count, complete, last_sort_key):
+    """Write a session's snapshot row; returns the (turns, complete) it holds after trimming"""
+    item = _snapshot_item(session_id, turns, message_count, complete, last_sort_key)
+    try:
+        timeline_table.put_item(Item=item)
     except ClientError as error:
-        print(f"Error creating new session: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
-        }
+        # The history is still served; the next read retries the snapshot
+        log.warning("Could not store history snapshot", session_id=session_id, error=str(error))
+    return _decode_snapshot(item), item['snapshot_complete']
+
+
+def _current_snapshot(session_id, message_count, snapshot_item):
+    """
+    (turns, complete) of a session's snapshot as of message_count. Appends do not touch the
+    snapshot, so a stale one is advanced with the timeline rows written after it and stored
+    again. (None, False) when there is no snapshot or the rows do not add up to message_count.
+    """
+    turns, complete = _read_snapshot(snapshot_item, message_count)
+    if turns is not None or not snapshot_item:
+        return turns, complete
+    tail = _read_timeline_tail(session_id, snapshot_item['snapshot_sort_key'])
+    if not tail or snapshot_item['snapshot_message_count'] + len(tail) != message_count:
+        return None, False
+    return _store_snapshot(
+        session_id,
+        _decode_snapshot(snapshot_item) + [item for item in tail if item.get('created_at')],
+        message_count,
+        snapshot_item.get('snapshot_complete', False),
+        tail[-1]['sk_message_id']
+    )
+
+
+def _snapshot_put(message_item):
+    """TransactWriteItems Put of the snapshot row of a session created with message_item"""
+    return {'Put': {
+        'TableName': TIMELINE_TABLE,
+        'Item': _snapshot_item(message_item['sk_session_id'], [message_item], 1, True, _timeline_sort_key(message_item))
+    }}
+
+
+def _new_session_item(session_id, user_id, title, created_at):
+    return {
+        'pk_session_id': session_id,
+        'user_id': user_id,
+        'title': title.strip(),
+        'created_at': created_at,
+        'created_date': _date_bucket(created_at),
+        'updated_at': created_at,
+        'message_count': 1,
+        'has_feedback': False,
+        'feedback_count': 0,
+        'has_review': False
+    }
+
+
+def _record_daily_user(user_id, created_at):
+    """Count a session's creator in the distinct-user rollup of its day"""
+    try:
+        record_users(daily_users_table, _date_bucket(created_at), [user_id])
+    except (ClientError, RuntimeError) as error:
+        # The session is already written; the day is corrected by backfill_daily_users
+        log.warning("Could not record daily user", created_at=created_at, error=str(error))
+
+
+def _record_response_times(message_items):
+    """Add stored messages' response times to the hourly latency rollups, one ADD per hour"""
+    by_hour = defaultdict(list)
+    for message_item in message_items:
+        response_time = float(message_item.get('response_time', 0))
+        # Placeholder turns (e.g. update_session) carry no measured response time
+        if response_time > 0:
+            by_hour[(_date_bucket(message_item['created_at']), message_item['created_at'][11:13])].append(response_time)
+    for (day, hour), response_times in by_hour.items():
+        try:
+            response_time_rollup_table.update_item(
+                Key={'pk_date': day, 'sk_hour': hour},
+                **rollup_update(response_times)
+            )
+        except ClientError as error:
+            # The messages are already written; rebuild_latency_rollups recomputes the day
+            log.warning("Could not record response times", day=day, hour=hour, error=str(error))
+
+
+def add_new_session_with_first_message(session_id, user_id, title, first_chat_entry):
+    """
+    Create a session with its first message. If the session already exists (a second
+    turn raced the first one's write), the entry is appended to it instead.
+    """
+    try:
+        message_id = _generate_message_id()
+        created_at = datetime.now().isoformat()
+
+        # Session and first message are written atomically in one round trip
+        message_item = _build_message_item(session_id, message_id, first_chat_entry, created_at, user_id)
+        try:
+            _transact_write([
+                {'Put': {
+                    'TableName': SESSIONS_TABLE,
+                    'Item': _new_session_item(session_id, user_id, title, created_at),
+                    'ConditionExpression': 'attribute_not_exists(pk_session_id)'
+                }},
+                *_message_puts(message_item),
+                _snapshot_put(message_item)
+            ])
+        except dynamodb.meta.client.exceptions.TransactionCanceledException as error:
+            reasons = error.response.get('CancellationReasons', [])
+            if not reasons or reasons[0].get('Code') != 'ConditionalCheckFailed':
+                raise
+            log.info("Session already exists, appending first message", session_id=session_id)
+            return add_message_to_existing_session(session_id, first_chat_entry, user_id)
+        _record_daily_user(user_id, created_at)
+        _record_response_times([message_item])
+
+        return _response(200, {
+            "session_id": session_id,
+            "message_id": message_id
+        })
+
+    except ClientError as error:
+        log.error("Error creating new session", session_id=session_id, error=str(error))
+        return _response(500, str(error))
 
 
-def add_message_to_existing_session(session_id, new_chat_entry):
+def add_message_to_existing_session(session_id, new_chat_entry, user_id=None):
     try:
         message_id = _generate_message_id()
+        created_at = datetime.now().isoformat()
+        user_id = user_id or _session_user_id(session_id)
+
+        # Message and session counter are written atomically so message_count cannot drift
+        message_item = _build_message_item(session_id, message_id, new_chat_entry, created_at, user_id)
+        _transact_write([
+            *_message_puts(message_item),
+            _session_counter_update(session_id, 1, created_at)
+        ])
+        _session_cache_append(session_id, message_item)
+        _record_response_times([message_item])
+
+        return _response(200, {
+            "session_id": session_id,
+            "message_id": message_id
+        })
 
-        messages_table.put_item(
-            Item={
-                'pk_message_id': message_id,
-                'sk_session_id': session_id,
-                'user_prompt': new_chat_entry['user_prompt'],
-                'bot_response': new_chat_entry['bot_response'],
-                'sources': new_chat_entry.get('sources', []),
-                'created_at': datetime.now().isoformat(),
-                'response_time': Decimal(str(new_chat_entry.get('response_time', 0)))
-            }
-        )
+    except ClientError as error:
+        log.error("Error adding message to session", session_id=session_id, error=str(error))
+        return _response(500, str(error))
 
-        sessions_table.update_item(
-            Key={'pk_session_id': session_id},
-            UpdateExpression="SET updated_at = :updated_at, message_count = message_count + :inc",
-            ExpressionAttributeValues={
-                ':updated_at': datetime.now().isoformat(),
-                ':inc': 1
-            }
-        )
 
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                "session_id": session_id,
-                "message_id": message_id
-            })
-        }
+def add_messages_to_existing_session(session_id, new_chat_entries, user_id=None):
+    """
+    Append several chat entries to a session. Entries are written in transactions of
+    up to MAX_TRANSACT_MESSAGES messages, each together with its message_count update.
+    """
+    message_ids = []
+    try:
+        user_id = user_id or _session_user_id(session_id)
+        for offset in range(0, len(new_chat_entries), MAX_TRANSACT_MESSAGES):
+            chunk = new_chat_entries[offset:offset + MAX_TRANSACT_MESSAGES]
+            transact_items = []
+            chunk_message_items = []
+            for chat_entry in chunk:
+                message_id = _generate_message_id()
+                created_at = datetime.now().isoformat()
+                message_item = _build_message_item(session_id, message_id, chat_entry, created_at, user_id)
+                transact_items.extend(_message_puts(message_item))
+                chunk_message_items.append(message_item)
+            transact_items.append(_session_counter_update(session_id, len(chunk), created_at))
+            _transact_write(transact_items)
+            _record_response_times(chunk_message_items)
+            message_ids.extend(item['pk_message_id'] for item in chunk_message_items)
+
+        return _response(200, {
+            "session_id": session_id,
+            "message_ids": message_ids
+        })
 
     except ClientError as error:
-        print(f"Error adding message to session {session_id}: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
-        }
+        log.error("Error adding messages to session", session_id=session_id, error=str(error))
+        return _response(500, {
+            "error": str(error),
+            # Messages from transactions that committed before the failing one
+            "message_ids": message_ids
+        })
+
 
-def get_session(session_id, user_id, isAdmin):
+def _encode_cursor(last_evaluated_key):
     """
-    Add message_id to chat_history JSON so that it can be parsed by the frontend 
-    for the get_feedback() function inside feedback handler Lambda function
+    Wrap a DynamoDB LastEvaluatedKey in an opaque, URL-safe cursor string
     """
+    if not last_evaluated_key:
+        return None
+    raw = json.dumps(last_evaluated_key, cls=DecimalEncoder, sort_keys=True)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('utf-8')
+
+
+def _decode_cursor(cursor):
+    """
+    Turn a cursor produced by _encode_cursor back into an ExclusiveStartKey
+    """
+    if not cursor:
+        return None
     try:
-        session_response = sessions_table.get_item(Key={'pk_session_id': session_id})
-        if 'Item' not in session_response:
-            return {
-                'statusCode': 200,
-                'headers': {'Access-Control-Allow-Origin': '*'},
-                'body': json.dumps({})
+        return json.loads(base64.urlsafe_b64decode(cursor.encode('utf-8')).decode('utf-8'))
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Invalid cursor: {error}")
+
+
+_cursor_signing_key = None
+
+def _get_cursor_signing_key():
+    """Fetch the cursor HMAC key from Secrets Manager once per container"""
+    global _cursor_signing_key
+    if _cursor_signing_key is None:
+        secret = boto3.client('secretsmanager').get_secret_value(SecretId=CURSOR_SECRET_ARN)
+        _cursor_signing_key = secret['SecretString'].encode('utf-8')
+    return _cursor_signing_key
+
+
+def _sign_cursor(last_evaluated_key, scope):
+    """
+    Like _encode_cursor, with an HMAC over the cursor and the scope it was issued for
+    (e.g. the user whose sessions are listed), so callers cannot forge or reuse it elsewhere.
+    """
+    cursor = _encode_cursor(last_evaluated_key)
+    if cursor is None:
+        return None
+    signature = hmac.new(_get_cursor_signing_key(), f"{scope}.{cursor}".encode('utf-8'), hashlib.sha256).digest()
+    return f"{cursor}.{base64.urlsafe_b64encode(signature).decode('utf-8').rstrip('=')}"
+
+
+def _verify_cursor(signed_cursor, scope):
+    """Check a cursor produced by _sign_cursor for the same scope and return its ExclusiveStartKey"""
+    if not signed_cursor:
+        return None
+    if not isinstance(signed_cursor, str):
+        raise ValueError("Invalid cursor: expected a string")
+    cursor, _, signature = signed_cursor.rpartition('.')
+    expected = hmac.new(_get_cursor_signing_key(), f"{scope}.{cursor}".encode('utf-8'), hashlib.sha256).digest()
+    # Compared as bytes: compare_digest raises TypeError on str with non-ASCII characters
+    if not cursor or not hmac.compare_digest(signature.encode('utf-8'), base64.urlsafe_b64encode(expected).rstrip(b'=')):
+        raise ValueError("Invalid cursor: signature mismatch")
+    return _decode_cursor(cursor)
+
+
+def _format_chat_history(messages, isAdmin):
+    """
+    Format message items into the chat_history shape consumed by the frontend.
+    Feedback is only exposed to admins.
+    """
+    chat_history = []
+    for message in messages:
+        if isAdmin:
+            user_feedback = {
+                "feedbackType": message.get("feedback_type", "").title(),
+                "feedbackCategory": message.get("feedback_category", ""),
+                "feedbackMessage": message.get("feedback_message", ""),
+                "feedbackRank": str(message.get("feedback_rank", ""))
             }
+        else:
+            user_feedback = {}
+        chat_history.append({
+            "user": message.get("user_prompt", ""),
+            "chatbot": message.get("bot_response", ""),
+            "metadata": json.dumps(message.get("sources", [])),
+            "messageId": message.get("pk_message_id", ""),
+            "userFeedback": user_feedback
+        })
+    return chat_history
+
+
+def _query_session_messages(session_id, page_size=None, cursor=None, last_n=None):
+    """
+    Read messages for a session from SessionMessagesIndex.
+
+    - last_n: newest-first query stopping after last_n messages, returned oldest-first
+    - page_size: a single page of at most page_size messages starting at cursor
+    - neither: every message in the session, following LastEvaluatedKey to the end
+
+    Returns (messages, next_cursor). next_cursor is None when there is nothing left to read.
+    """
+    query_params = {
+        'IndexName': 'SessionMessagesIndex',
+        'KeyConditionExpression': "sk_session_id = :sid",
+        'ExpressionAttributeValues': {':sid': session_id},
+        'ScanIndexForward': True
+    }
+
+    if last_n is not None:
+        messages = []
+        last_evaluated_key = None
+        query_params['ScanIndexForward'] = False
+        while len(messages) < last_n:
+            query_params['Limit'] = last_n - len(messages)
+            if last_evaluated_key:
+                query_params['ExclusiveStartKey'] = last_evaluated_key
+            response = messages_table.query(**query_params)
+            messages.extend(response.get('Items', []))
+            last_evaluated_key = response.get('LastEvaluatedKey')
+            if not last_evaluated_key:
+                break
+        messages.reverse()
+        return messages, None
+
+    if page_size is not None:
+        query_params['Limit'] = page_size
+        # Signed for this session, so a cursor cannot carry a forged key or another session's
+        scope = f"session_messages:{session_id}"
+        exclusive_start_key = _verify_cursor(cursor, scope)
+        if exclusive_start_key:
+            query_params['ExclusiveStartKey'] = exclusive_start_key
+        response = messages_table.query(**query_params)
+        return response.get('Items', []), _sign_cursor(response.get('LastEvaluatedKey'), scope)
+
+    messages = []
+    while True:
+        response = messages_table.query(**query_params)
+        messages.extend(response.get('Items', []))
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        if not last_evaluated_key:
+            break
+        query_params['ExclusiveStartKey'] = last_evaluated_key
+    return messages, None
+
+
+# session_id -> {'session', 'messages', 'message_count', 'updated_at'}, least recently used first
+_session_cache = OrderedDict()
+_session_cache_lock = threading.Lock()
+_session_cache_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+
+def _session_cache_log(outcome, session_id):
+    log.info(
+        "Session cache lookup",
+        outcome=outcome,
+        session_id=session_id,
+        hits=_session_cache_stats['hits'],
+        misses=_session_cache_stats['misses'],
+        evictions=_session_cache_stats['evictions'],
+        size=len(_session_cache)
+    )
+
+
+def _session_cache_put(session_id, entry):
+    with _session_cache_lock:
+        _session_cache[session_id] = entry
+        _session_cache.move_to_end(session_id)
+        while len(_session_cache) > SESSION_CACHE_MAX_ENTRIES:
+            _session_cache.popitem(last=False)
+            _session_cache_stats['evictions'] += 1
+
+
+def _session_cache_evict(session_id):
+    with _session_cache_lock:
+        _session_cache.pop(session_id, None)
+
+
+def _session_cache_append(session_id, message_item):
+    """
+    Called after this container appends a message. Only advances the cached entry; the
+    next lookup still compares message_count, so writes from other containers are caught.
+    """
+    with _session_cache_lock:
+        entry = _session_cache.get(session_id)
+        if entry is None:
+            return
+        entry['messages'].append(message_item)
+        entry['message_count'] += 1
+        entry['updated_at'] = message_item['created_at']
+        entry['session']['message_count'] = entry['message_count']
+        entry['session']['updated_at'] = entry['updated_at']
+        if len(entry['messages']) > SESSION_CACHE_MAX_MESSAGES:
+            del _session_cache[session_id]
+
+
+def _read_timeline_tail(session_id, after_sort_key=TIMELINE_MESSAGE_PREFIX):
+    """Consistent read of every timeline item after after_sort_key (by default the whole timeline)"""
+    query_params = {
+        'KeyConditionExpression': Key('pk_session_id').eq(session_id) & Key('sk_message_id').gt(after_sort_key),
+        'ConsistentRead': True
+    }
+    items = []
+    while True:
+        response = timeline_table.query(**query_params)
+        items.extend(response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            return items
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _read_full_timeline(session_id, message_count):
+    """
+    Every chat turn of a session, read from the strongly consistent timeline table, and the
+    sort key of its newest row. Returns (None, None) when the timeline does not add up to
+    message_count, i.e. the session was not backfilled yet or message_count was read
+    before the newest write.
+    """
+    items = _read_timeline_tail(session_id)
+    if len(items) != message_count:
+        return None, None
+    last_sort_key = items[-1]['sk_message_id'] if items else TIMELINE_MESSAGE_PREFIX
+    return [item for item in items if item.get('created_at')], last_sort_key
 
-        session_data = session_response['Item']
 
-        messages_response = messages_table.query(
-            IndexName='SessionMessagesIndex',
-            KeyConditionExpression="sk_session_id = :sid",
-            ExpressionAttributeValues={':sid': session_id},
-            ScanIndexForward=True
+def _get_cached_session(session_id):
+    """
+    Return (session, messages) for a full-history read, using the container cache.
+
+    Every call re-reads the session's summary attributes. If message_count and updated_at
+    are unchanged the cached messages are returned as-is; otherwise only the messages
+    written since the cached ones are read from the timeline table. Falls back to a full
+    reload whenever the counts do not line up. session is None if the session is gone.
+    """
+    with _session_cache_lock:
+        entry = _session_cache.get(session_id)
+        if entry is not None:
+            _session_cache.move_to_end(session_id)
+
+    if entry is not None:
+        current = sessions_table.get_item(
+            Key={'pk_session_id': session_id},
+            ProjectionExpression=', '.join(SESSION_CACHE_VALIDATION_ATTRIBUTES)
+        ).get('Item')
+        if current is None:
+            _session_cache_evict(session_id)
+            return None, []
+
+        messages = entry['messages']
+        fresh = (
+            current.get('message_count') == entry['message_count']
+            and current.get('updated_at') == entry['updated_at']
         )
+        if not fresh and messages and current.get('message_count', 0) > entry['message_count']:
+            tail = _read_timeline_tail(session_id, _timeline_sort_key(messages[-1]))
+            if entry['message_count'] + len(tail) == current['message_count']:
+                messages = messages + [item for item in tail if item.get('created_at')]
+                fresh = True
+
+        if fresh:
+            session = dict(entry['session'])
+            for attribute in SESSION_CACHE_VALIDATION_ATTRIBUTES:
+                if attribute in current:
+                    session[attribute] = current[attribute]
+                else:
+                    session.pop(attribute, None)
+            _session_cache_stats['hits'] += 1
+            _session_cache_log('hit', session_id)
+            if len(messages) <= SESSION_CACHE_MAX_MESSAGES:
+                _session_cache_put(session_id, {
+                    'session': session,
+                    'messages': messages,
+                    'message_count': current.get('message_count'),
+                    'updated_at': current.get('updated_at')
+                })
+            else:
+                _session_cache_evict(session_id)
+            return dict(session), messages
+
+    _session_cache_stats['misses'] += 1
+    session, snapshot_item = _get_session_with_snapshot(session_id)
+    if session is None:
+        _session_cache_log('miss', session_id)
+        return None, []
+    message_count = session.get('message_count')
+    messages, complete = _read_snapshot(snapshot_item, message_count)
+    cacheable = True
+    if messages is None or not complete:
+        # An incomplete but current snapshot is left as is; only a stale one is rebuilt
+        snapshot_current = messages is not None
+        messages, last_sort_key = _read_full_timeline(session_id, message_count)
+        if messages is not None:
+            if not snapshot_current:
+                _store_snapshot(session_id, messages, message_count, True, last_sort_key)
+        else:
+            # SessionMessagesIndex may lag the session item, so this read is served but
+            # neither cached nor snapshotted under the session's message_count
+            messages, _ = _query_session_messages(session_id)
+            cacheable = False
+    if cacheable and len(messages) <= SESSION_CACHE_MAX_MESSAGES:
+        _session_cache_put(session_id, {
+            'session': dict(session),
+            'messages': messages,
+            'message_count': message_count,
+            'updated_at': session.get('updated_at')
+        })
+    _session_cache_log('miss', session_id)
+    return session, messages
+
+
+def get_session(session_id, user_id, isAdmin, page_size=None, cursor=None, last_n_turns=None, include_archived=True):
+    """
+    Add message_id to chat_history JSON so that it can be parsed by the frontend 
+    for the get_feedback() function inside feedback handler Lambda function
 
-        messages = messages_response.get('Items', [])
-        
-        if isAdmin:
-            chat_history = [
-                {
-                    "user": message.get("user_prompt", ""),
-                    "chatbot": message.get("bot_response", ""),
-                    "metadata": json.dumps(message.get("sources", [])),
-                    "messageId": message.get("pk_message_id", ""),
-                    "userFeedback": {
-                        "feedbackType": message.get("feedback_type", "").title(),
-                        "feedbackCategory": message.get("feedback_category", ""),
-                        "feedbackMessage": message.get("feedback_message", ""),
-                        "feedbackRank": str(message.get("feedback_rank", ""))
-                    }
-                }
-                for message in messages
-            ]
+    By default the full history is returned. Pass page_size (and the returned
+    next_cursor) to page through long sessions oldest-first, or last_n_turns to
+    read only the most recent turns. Sessions missing from DynamoDB are looked up in
+    the S3 archive unless include_archived is False (e.g. for a chat's first turn).
+    """
+    try:
+        if last_n_turns is not None:
+            last_n_turns = max(0, int(last_n_turns))
+        if page_size is not None:
+            page_size = min(max(1, int(page_size)), MAX_MESSAGE_PAGE_SIZE)
+
+        # Full-history reads by the session owner go through the container cache. Admin
+        # views skip it since they show message feedback, which can change at any time.
+        with _session_cache_lock:
+            cached = session_id in _session_cache
+        if not isAdmin and page_size is None and (last_n_turns is None or cached):
+            session_data, messages = _get_cached_session(session_id)
+            if last_n_turns is not None:
+                messages = messages[-last_n_turns:] if last_n_turns else []
+            next_cursor = None
         else:
-            chat_history = [
-                {
-                    "user": message.get("user_prompt", ""),
-                    "chatbot": message.get("bot_response", ""),
-                    "metadata": json.dumps(message.get("sources", [])),
-                    "messageId": message.get("pk_message_id", ""),
-                    "userFeedback": {}
-                }
-                for message in messages
-            ]
+            snapshot_item = None
+            if not isAdmin and page_size is None and last_n_turns:
+                # Recent turns of a non-admin view can come from the snapshot row
+                session_data, snapshot_item = _get_session_with_snapshot(session_id)
+            else:
+                session_data = sessions_table.get_item(Key={'pk_session_id': session_id}).get('Item')
+                if session_data is not None:
+                    _strip_legacy_snapshot(session_data)
+            messages, next_cursor = [], None
+            if session_data is not None:
+                snapshot, complete = _current_snapshot(session_id, session_data.get('message_count'), snapshot_item)
+                if snapshot is not None and (complete or len(snapshot) >= last_n_turns):
+                    messages = snapshot[-last_n_turns:]
+                else:
+                    messages, next_cursor = _query_session_messages(
+                        session_id,
+                        page_size=page_size,
+                        cursor=cursor,
+                        last_n=last_n_turns
+                    )
 
-        session_data["chat_history"] = chat_history
+        if session_data is None and include_archived:
+            session_data, messages = _rehydrate_archived_session(session_id)
+            next_cursor = None
+            if last_n_turns is not None:
+                messages = messages[-last_n_turns:] if last_n_turns else []
 
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(session_data, cls=DecimalEncoder)
-        }
+        if session_data is None:
+            return _response(200, {})
 
-    except ClientError as error:
-        print(f"DynamoDB ClientError: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
-        }
+        session_data["chat_history"] = _format_chat_history(messages, isAdmin)
+        if page_size is not None:
+            session_data["next_cursor"] = next_cursor
+
+        return _response(200, session_data, cls=DecimalEncoder)
 
+    except ValueError as error:
+        log.warning("Invalid get_session request", session_id=session_id, error=str(error))
+        return _response(400, str(error))
+    except (ClientError, RuntimeError) as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+
+def _batch_get_sessions(session_ids, projection=None):
+    """
+    Fetch up to 100 session items with BatchGetItem, retrying UnprocessedKeys with backoff
+    """
+    options = {'ProjectionExpression': projection} if projection else {}
+    sessions = batch_get_keys(dynamodb.meta.client, SESSIONS_TABLE, [{'pk_session_id': session_id} for session_id in session_ids], **options)
+    return {session['pk_session_id']: session for session in sessions}
+
+
+def get_sessions_batch(session_ids, isAdmin, last_n_turns=None):
+    """
+    get_session for up to MAX_SESSION_BATCH_SIZE sessions in one call, so the review UI
+    can prefetch a page of conversations. Session items come from one BatchGetItem and
+    the message queries run concurrently. Unknown IDs are listed under "missing".
+    Sessions whose history would push the response past MAX_SESSION_BATCH_BYTES are
+    listed, in request order, under "deferred" for the caller to fetch again.
+    """
+    try:
+        session_ids = list(dict.fromkeys(session_ids))
+        if len(session_ids) > MAX_SESSION_BATCH_SIZE:
+            raise ValueError(f"At most {MAX_SESSION_BATCH_SIZE} session IDs can be fetched at once")
+        if last_n_turns is not None:
+            last_n_turns = max(0, int(last_n_turns))
+
+        sessions = _batch_get_sessions(session_ids) if session_ids else {}
+        for session in sessions.values():
+            _strip_legacy_snapshot(session)
+        with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+            futures = {
+                session_id: executor.submit(_query_session_messages, session_id, last_n=last_n_turns)
+                for session_id in sessions
+            }
+            histories = {}
+            for session_id, future in futures.items():
+                messages, _ = future.result()
+                histories[session_id] = _format_chat_history(messages, isAdmin)
+
+        response_bytes = 0
+        deferred = []
+        for session_id in session_ids:
+            if session_id not in sessions:
+                continue
+            session = sessions[session_id]
+            session["chat_history"] = histories[session_id]
+            session_bytes = len(json.dumps(session, cls=DecimalEncoder))
+            # The first session is always returned so a caller re-requesting deferred IDs makes progress
+            if deferred or (response_bytes and response_bytes + session_bytes > MAX_SESSION_BATCH_BYTES):
+                deferred.append(session_id)
+                del sessions[session_id]
+                continue
+            response_bytes += session_bytes
+
+        return _response(200, {
+            "sessions": sessions,
+            "missing": [session_id for session_id in session_ids if session_id not in sessions and session_id not in deferred],
+            "deferred": deferred
+        }, cls=DecimalEncoder)
+    except ValueError as error:
+        return _response(400, str(error))
+    except (ClientError, RuntimeError) as error:
+        log.error("Error fetching session batch", error=str(error))
+        return _response(500, str(error))
 
 
 def update_session(session_id, user_id, new_chat_entry):
     try:
         message_id = _generate_message_id()
-        
-        messages_table.put_item(
-            Item={
-                'pk_message_id': message_id,
-                'sk_session_id': session_id,
-                'user_prompt': new_chat_entry,
-                'bot_response': None,
-                'sent_at': datetime.now().isoformat(),
-                'response_time': Decimal("0")
-            }
-        )
-        
-        sessions_table.update_item(
-            Key={'pk_session_id': session_id},
-            UpdateExpression="SET updated_at = :updated_at, message_count = message_count + :inc",
-            ExpressionAttributeValues={
-                ':updated_at': datetime.now().isoformat(),
-                ':inc': 1
-            }
-        )
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({"message_id": message_id}, cls=DecimalEncoder)
+        sent_at = datetime.now().isoformat()
+
+        message_item = {
+            'pk_message_id': message_id,
+            'sk_session_id': session_id,
+            'user_prompt': new_chat_entry,
+            'bot_response': None,
+            'sent_at': sent_at,
+            'response_time': Decimal("0")
         }
+        if user_id:
+            message_item['user_id'] = user_id
+        _transact_write([
+            *_message_puts(message_item),
+            _session_counter_update(session_id, 1, sent_at)
+        ])
+
+        return _response(200, {"message_id": message_id}, cls=DecimalEncoder)
     except ClientError as error:
-        print(f"DynamoDB ClientError: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
-        }
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def _batch_delete(table_name, keys):
+    """
+    Delete up to 25 keys with BatchWriteItem, retrying UnprocessedItems with backoff
+    """
+    request_items = {table_name: [{'DeleteRequest': {'Key': key}} for key in keys]}
+    for attempt in range(BATCH_WRITE_MAX_RETRIES + 1):
+        response = dynamodb.meta.client.batch_write_item(RequestItems=request_items)
+        request_items = response.get('UnprocessedItems') or {}
+        if not request_items:
+            return len(keys)
+        time.sleep(min(0.05 * (2 ** attempt), 2))
+    raise RuntimeError(f"{len(request_items[table_name])} deletes still unprocessed in {table_name} after {BATCH_WRITE_MAX_RETRIES} retries")
+
+
+def _delete_session_messages(session_id):
+    """
+    Delete every message of a session, following every SessionMessagesIndex page and
+    fanning the deletes out over parallel BatchWriteItem calls.
+    """
+    query_params = {
+        'IndexName': 'SessionMessagesIndex',
+        'KeyConditionExpression': Key('sk_session_id').eq(session_id),
+        'ProjectionExpression': 'pk_message_id, sk_session_id'
+    }
+    futures = []
+    with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+        while True:
+            response = messages_table.query(**query_params)
+            keys = response.get('Items', [])
+            for offset in range(0, len(keys), 25):
+                futures.append(executor.submit(_batch_delete, MESSAGES_TABLE, keys[offset:offset + 25]))
+            if not response.get('LastEvaluatedKey'):
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return sum(future.result() for future in futures)
+
+
+def _delete_session_reviews(session_id):
+    query_params = {
+        'IndexName': 'SessionReviewIndex',
+        'KeyConditionExpression': Key('session_id').eq(session_id),
+        'ProjectionExpression': 'pk_review_id'
+    }
+    deleted = 0
+    while True:
+        response = reviews_table.query(**query_params)
+        keys = response.get('Items', [])
+        for offset in range(0, len(keys), 25):
+            deleted += _batch_delete(REVIEWS_TABLE, keys[offset:offset + 25])
+        if not response.get('LastEvaluatedKey'):
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return deleted
+
+
+def _delete_session_timeline(session_id):
+    query_params = {
+        'KeyConditionExpression': Key('pk_session_id').eq(session_id),
+        'ProjectionExpression': 'pk_session_id, sk_message_id'
+    }
+    futures = []
+    with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+        while True:
+            response = timeline_table.query(**query_params)
+            keys = response.get('Items', [])
+            for offset in range(0, len(keys), 25):
+                futures.append(executor.submit(_batch_delete, TIMELINE_TABLE, keys[offset:offset + 25]))
+            if not response.get('LastEvaluatedKey'):
+                break
+            query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return sum(future.result() for future in futures)
+
+
+def _cascade_delete_session(session_id, keep_archive=False):
+    """
+    Delete a session's messages, timeline entries and reviews, then the session item
+    itself, so a failed run can simply be retried. Its archive pointer goes first, so a
+    deleted session cannot be brought back from the archive; the archive run itself
+    passes keep_archive once the session has been copied there.
+    """
+    if SESSION_ARCHIVE_BUCKET and not keep_archive:
+        boto3.client('s3').delete_object(Bucket=SESSION_ARCHIVE_BUCKET, Key=_archive_pointer_key(session_id))
+    deleted_messages = _delete_session_messages(session_id)
+    _delete_session_timeline(session_id)
+    deleted_reviews = _delete_session_reviews(session_id)
+    sessions_table.delete_item(Key={'pk_session_id': session_id})
+    log.info("Session deleted", session_id=session_id, messages=deleted_messages, reviews=deleted_reviews)
 
 
-def delete_session(session_id, user_id):
+def delete_session(session_id, user_id, context=None):
+    """
+    Delete a session together with all of its messages and reviews, and its archive
+    pointer if it was archived.
+
+    Sessions with more than DELETE_SYNC_MESSAGE_LIMIT messages are removed from the
+    sessions table right away and the rest of the cascade finishes in an async
+    self-invocation, returning 202.
+    """
+    _session_cache_evict(session_id)
+    _search_index_evict(user_id)
     try:
+        session = sessions_table.get_item(
+            Key={'pk_session_id': session_id},
+            ProjectionExpression='message_count'
+        ).get('Item', {})
 
-        messages = messages_table.query(
-            IndexName='SessionMessagesIndex',
-            KeyConditionExpression="sk_session_id = :sid",
-            ExpressionAttributeValues={':sid': session_id}
-        )['Items']
-        
-        with messages_table.batch_writer() as batch:
+        if context and session.get('message_count', 0) > DELETE_SYNC_MESSAGE_LIMIT:
+            sessions_table.delete_item(Key={'pk_session_id': session_id})
+            _invoke_self_async({'source': 'async', 'operation': 'delete_session', 'session_id': session_id}, context)
+            return _response(202, f"Session {session_id} is being deleted.")
+
+        _cascade_delete_session(session_id)
+
+        return _response(200, f"Session {session_id} deleted.")
+    except (ClientError, RuntimeError) as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+def get_messages_after(session_id, after=None, limit=MAX_MESSAGE_PAGE_SIZE):
+    """
+    Strongly consistent, time-ordered read of a session's messages from the timeline
+    table, starting after the sort key `after` (a ULID message ID, or the sort_key
+    returned by a previous call). Unlike SessionMessagesIndex this sees a message as
+    soon as its write commits.
+    """
+    try:
+        limit = min(max(1, int(limit)), MAX_MESSAGE_PAGE_SIZE)
+        # Starting at the message prefix also skips the session's snapshot row
+        key_condition = Key('pk_session_id').eq(session_id) & Key('sk_message_id').gt(max(after or '', TIMELINE_MESSAGE_PREFIX))
+        response = timeline_table.query(
+            KeyConditionExpression=key_condition,
+            ConsistentRead=True,
+            Limit=limit
+        )
+        messages = [
+            {
+                "messageId": item.get("pk_message_id", ""),
+                "sortKey": item["sk_message_id"],
+                "user": item.get("user_prompt", ""),
+                "chatbot": item.get("bot_response", ""),
+                "metadata": json.dumps(item.get("sources", [])),
+                "createdAt": item.get("created_at") or item.get("sent_at", "")
+            }
+            for item in response.get('Items', [])
+        ]
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        return _response(200, {
+            "messages": messages,
+            "next_after": last_evaluated_key['sk_message_id'] if last_evaluated_key else None
+        }, cls=DecimalEncoder)
+    except ClientError as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def backfill_session_timeline(cursor=None, limit=1000):
+    """
+    Migration step for the timeline table: copy messages written before it existed.
+    New messages are already dual-written, so once a full pass finishes (next_cursor
+    is null) time-ordered reads can move from SessionMessagesIndex to get_messages_after.
+    Safe to re-run, legacy sort keys are derived deterministically.
+    """
+    try:
+        scan_params = {'Limit': limit}
+        exclusive_start_key = _verify_cursor(cursor, "backfill_session_timeline")
+        if exclusive_start_key:
+            scan_params['ExclusiveStartKey'] = exclusive_start_key
+        response = messages_table.scan(**scan_params)
+        messages = [
+            message for message in response.get('Items', [])
+            if message.get('created_at') or message.get('sent_at')
+        ]
+        with timeline_table.batch_writer(overwrite_by_pkeys=['pk_session_id', 'sk_message_id']) as batch:
             for message in messages:
-                batch.delete_item(Key={'pk_message_id': message['pk_message_id'], 'sk_session_id': session_id})
-        
-        sessions_table.delete_item(Key={'pk_session_id': session_id})
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(f"Session {session_id} deleted.")
-        }
+                batch.put_item(Item=_build_timeline_item(message))
+
+        return _response(200, {
+            'processed': len(messages),
+            'next_cursor': _sign_cursor(response.get('LastEvaluatedKey'), "backfill_session_timeline")
+        })
+    except ValueError as error:
+        return _response(400, str(error))
     except ClientError as error:
-        print(f"DynamoDB ClientError: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def _format_user_sessions(items):
+    return [
+        {
+            "session_id": item["pk_session_id"],
+            "title": item["title"].strip(),
+            "time_stamp": item["created_at"]
         }
+        for item in items
+    ]
+
 
 def list_sessions_by_user_id(user_id, limit=15):
     items = []
@@ -266,6 +1228,7 @@ def list_sessions_by_user_id(user_id, limit=15):
             'IndexName': 'UserSessionsIndex',
             'KeyConditionExpression': 'user_id = :uid',
             'ExpressionAttributeValues': {':uid': user_id},
+            'ProjectionExpression': 'pk_session_id, title, created_at',
             'ScanIndexForward': False,
             'Limit': limit - len(items)
         }
@@ -282,144 +1245,613 @@ def list_sessions_by_user_id(user_id, limit=15):
 
     sorted_items = sorted(items, key=lambda x: x['created_at'], reverse=True)
 
-    formatted_items = [
-        {
-            "session_id": item["pk_session_id"],
-            "title": item["title"].strip(),
-            "time_stamp": item["created_at"]
+    return _format_user_sessions(sorted_items)
+
+
+def list_sessions_page_by_user_id(user_id, page_size=None, cursor=None):
+    """
+    One page of a user's sessions, newest first. next_cursor is an opaque, signed
+    token to pass back for the following page, or null after the oldest session.
+    """
+    try:
+        page_size = min(max(1, int(page_size or DEFAULT_SESSION_PAGE_SIZE)), MAX_SESSION_PAGE_SIZE)
+        scope = f"list_sessions_by_user_id:{user_id}"
+        query_params = {
+            'IndexName': 'UserSessionsIndex',
+            'KeyConditionExpression': Key('user_id').eq(user_id),
+            'ProjectionExpression': 'pk_session_id, title, created_at',
+            'ScanIndexForward': False,
+            'Limit': page_size
         }
-        for item in sorted_items
-    ]
-    
-    return formatted_items
+        exclusive_start_key = _verify_cursor(cursor, scope)
+        if exclusive_start_key:
+            query_params['ExclusiveStartKey'] = exclusive_start_key
 
+        response = sessions_table.query(**query_params)
+        return _response(200, {
+            'sessions': _format_user_sessions(response.get('Items', [])),
+            'next_cursor': _sign_cursor(response.get('LastEvaluatedKey'), scope)
+        })
+    except ValueError as error:
+        return _response(400, str(error))
+    except ClientError as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
 
-def list_all_sessions(start_time, end_time, has_feedback, has_review, user_id, limit=10000):
-    # Get all (or first 250) sessions from sessions table
-    items = []
-    last_evaluated_key = None
 
-    while len(items) < limit:
-        if last_evaluated_key:
-            response = sessions_table.scan(
-                FilterExpression=Key('created_at').between(start_time, end_time),
-                ExclusiveStartKey=last_evaluated_key,
-                Limit=limit-len(items)
-            )
-        else: 
-            response = sessions_table.scan(
-                FilterExpression=Key('created_at').between(start_time, end_time),
-                Limit=limit
-            )
-        last_evaluated_key = response.get('LastEvaluatedKey')
-        
+# user_id -> {'sessions', 'postings', 'newest', 'built_at'}, least recently used first
+_search_index = OrderedDict()
+_search_index_lock = threading.Lock()
+
+
+def _title_tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _query_user_sessions_after(user_id, created_after=None):
+    """Every session of a user (or those created after created_after), title fields only"""
+    key_condition = Key('user_id').eq(user_id)
+    if created_after:
+        key_condition = key_condition & Key('created_at').gt(created_after)
+    query_params = {
+        'IndexName': 'UserSessionsIndex',
+        'KeyConditionExpression': key_condition,
+        'ProjectionExpression': 'pk_session_id, title, created_at'
+    }
+    items = []
+    while True:
+        response = sessions_table.query(**query_params)
         items.extend(response.get('Items', []))
-        
-        if not last_evaluated_key:
+        if not response.get('LastEvaluatedKey'):
+            return items
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _search_index_add(entry, items):
+    """Index sessions under every token of their title; postings stay sorted by token"""
+    for item in items:
+        position = len(entry['sessions'])
+        entry['sessions'].append(item)
+        for token in set(_title_tokens(item.get('title', ''))):
+            bisect.insort(entry['postings'], (token, position))
+        entry['newest'] = max(entry['newest'] or '', item['created_at'])
+
+
+def _search_index_evict(user_id):
+    with _search_index_lock:
+        _search_index.pop(user_id, None)
+
+
+def _get_search_index(user_id):
+    """
+    The user's title index, built from one projected UserSessionsIndex query and then
+    kept current by querying only the sessions created after the newest one indexed.
+    """
+    with _search_index_lock:
+        entry = _search_index.get(user_id)
+        if entry is not None:
+            _search_index.move_to_end(user_id)
+
+    if entry is None or time.monotonic() - entry['built_at'] > SEARCH_INDEX_MAX_AGE_SECONDS:
+        entry = {'sessions': [], 'postings': [], 'newest': None, 'built_at': time.monotonic()}
+        _search_index_add(entry, _query_user_sessions_after(user_id))
+        with _search_index_lock:
+            _search_index[user_id] = entry
+            _search_index.move_to_end(user_id)
+            while len(_search_index) > SEARCH_INDEX_MAX_USERS:
+                _search_index.popitem(last=False)
+        return entry
+
+    newer = _query_user_sessions_after(user_id, entry['newest'])
+    if newer:
+        with _search_index_lock:
+            _search_index_add(entry, newer)
+    return entry
+
+
+def _search_index_match(entry, term):
+    """Positions of sessions with a title token starting with term"""
+    postings = entry['postings']
+    matches = set()
+    index = bisect.bisect_left(postings, (term,))
+    while index < len(postings) and postings[index][0].startswith(term):
+        matches.add(postings[index][1])
+        index += 1
+    return matches
+
+
+def search_sessions(user_id, query, limit=None):
+    """
+    Search a user's sessions by title. Every word of the query must prefix-match a word
+    of the title ("bud rep" finds "Budget report"); results are newest first.
+    """
+    try:
+        limit = min(max(1, int(limit or DEFAULT_SEARCH_RESULTS)), MAX_SEARCH_RESULTS)
+        terms = _title_tokens(query or '')
+        if not terms:
+            raise ValueError("query must contain at least one word")
+
+        entry = _get_search_index(user_id)
+        with _search_index_lock:
+            positions = None
+            for term in sorted(set(terms), key=len, reverse=True):
+                matches = _search_index_match(entry, term)
+                positions = matches if positions is None else positions & matches
+                if not positions:
+                    break
+            items = [entry['sessions'][position] for position in positions]
+
+        items.sort(key=lambda item: item['created_at'], reverse=True)
+        return _response(200, {'sessions': _format_user_sessions(items[:limit]), 'total': len(items)})
+    except ValueError as error:
+        return _response(400, str(error))
+    except ClientError as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def _date_buckets_in_range(start_time, end_time):
+    """
+    List the YYYY-MM-DD buckets covered by [start_time, end_time].
+    Days after today are dropped since no session can have been created on them yet.
+    """
+    start_date = datetime.fromisoformat(_date_bucket(start_time))
+    end_date = min(datetime.fromisoformat(_date_bucket(end_time)), datetime.now())
+    buckets = []
+    current = start_date
+    while current <= end_date:
+        buckets.append(current.strftime("%Y-%m-%d"))
+        current += timedelta(days=1)
+    return buckets
+
+
+def _summary_filter_expression(has_feedback, has_review):
+    """
+    Build a FilterExpression for the denormalized has_feedback / has_review flags.
+    Sessions written before the flags existed are treated as "no". has_review on the
+    session means any admin reviewed it, so only has_review "yes" narrows the read; the
+    caller's own reviews are matched afterwards with _reviewed_by_caller.
+    """
+    filter_expression = None
+    for attribute, value in (('has_feedback', has_feedback), ('has_review', has_review)):
+        if value == "yes":
+            condition = Attr(attribute).eq(True)
+        elif value == "no" and attribute == 'has_feedback':
+            condition = Attr(attribute).not_exists() | Attr(attribute).eq(False)
+        else:
+            continue
+        filter_expression = condition if filter_expression is None else filter_expression & condition
+    return filter_expression
+
+
+def _reviewer_review_ids(user_id):
+    """{session_id: review_id} for the reviews written by one admin, read from ReviewerIndex"""
+    review_ids = {}
+    query_params = {
+        'IndexName': 'ReviewerIndex',
+        'KeyConditionExpression': Key('reviewed_by').eq(user_id),
+        'ProjectionExpression': 'session_id, pk_review_id'
+    }
+    while True:
+        response = reviews_table.query(**query_params)
+        for review in response.get('Items', []):
+            review_ids[review['session_id']] = review['pk_review_id']
+        if not response.get('LastEvaluatedKey'):
             break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return review_ids
 
-    # Add a check to see if the items retreive up to the limit
-    total_items = len(items)
-    if limit <= total_items:
-        print(f"Warning: Limit {limit} restricts the number of items retrieved, increase limit to retrieve all items")
 
-    # Get list of session IDs that have at least 1 feedback response
-    sessions_with_feedback = set()
+def _reviewed_by_caller(items, has_review, review_ids):
+    """Keep the sessions matching a has_review filter on the calling admin's own reviews"""
+    if has_review == "yes":
+        return [item for item in items if item['pk_session_id'] in review_ids]
+    if has_review == "no":
+        return [item for item in items if item['pk_session_id'] not in review_ids]
+    return items
+
+
+def _query_sessions_for_day(date_bucket, start_time, end_time, filter_expression=None, limit=None):
+    """
+    Query CreatedDateIndex for the sessions created on one day within [start_time, end_time]
+    """
+    items = []
+    query_params = {
+        'IndexName': 'CreatedDateIndex',
+        'KeyConditionExpression': Key('created_date').eq(date_bucket) & Key('created_at').between(start_time, end_time),
+        'ScanIndexForward': False
+    }
+    if filter_expression is not None:
+        query_params['FilterExpression'] = filter_expression
+
     while True:
-        if last_evaluated_key:
-            # Check if last_evaluated_key contains the necessary keys before using it
-            if last_evaluated_key and 'pk_message_id' in last_evaluated_key and 'sk_session_id' in last_evaluated_key:
-                response = messages_table.scan(
-                    FilterExpression=Attr('feedback_type').exists(),
-                    ExclusiveStartKey={
-                        'pk_message_id': last_evaluated_key['pk_message_id'],
-                        'sk_session_id': last_evaluated_key['sk_session_id']
-                    }
-                )
-            else: 
-                response = messages_table.scan(
-                    FilterExpression=Attr('feedback_type').exists()
-                )
-        else: 
-            response = messages_table.scan(
-                FilterExpression=Attr('feedback_type').exists()
-            )
+        response = sessions_table.query(**query_params)
+        items.extend(response.get('Items', []))
         last_evaluated_key = response.get('LastEvaluatedKey')
-        
-        scan_items = response.get('Items', [])
-        session_id_set = set([item["sk_session_id"] for item in scan_items])
-        sessions_with_feedback.update(session_id_set)
-        
-        if not last_evaluated_key:
+        if not last_evaluated_key or (limit and len(items) >= limit):
             break
+        query_params['ExclusiveStartKey'] = last_evaluated_key
+    return items
 
-    # Get list of session IDs that have at least 1 review
-    sessions_with_review = {}
-    while True:
-        if last_evaluated_key:
-            response = reviews_table.scan(
-                FilterExpression=Attr('reviewed_by').eq(user_id),
-                ExclusiveStartKey=last_evaluated_key
+
+def _format_session_summary(item, review_ids):
+    """Summary row for an admin; has_review and review_id describe that admin's own review"""
+    return {
+        "session_id": item["pk_session_id"],
+        "title": item["title"].strip(),
+        "time_stamp": item["created_at"],
+        "has_feedback": "Yes" if item.get("has_feedback") else "No",
+        "has_review": "Yes" if item["pk_session_id"] in review_ids else "No",
+        "review_id": review_ids.get(item["pk_session_id"], "")
+    }
+
+
+def list_all_sessions(start_time, end_time, has_feedback, has_review, user_id, limit=10000):
+    """
+    List sessions created in [start_time, end_time] for admin review.
+
+    Feedback status is read from the summary attributes kept on each session item, and
+    the date range is answered by one CreatedDateIndex query per day, so the cost tracks
+    the number of sessions returned rather than table size. has_review and review_id
+    report the calling admin's own review, resolved through ReviewerIndex.
+    """
+    filter_expression = _summary_filter_expression(has_feedback, has_review)
+    review_ids = _reviewer_review_ids(user_id)
+    date_buckets = _date_buckets_in_range(start_time, end_time)
+
+    items = []
+    # Walk the days newest-first so the limit keeps the latest sessions
+    date_buckets.reverse()
+    for offset in range(0, len(date_buckets), SESSION_QUERY_WORKERS):
+        day_batch = date_buckets[offset:offset + SESSION_QUERY_WORKERS]
+        with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+            results = executor.map(
+                lambda day: _query_sessions_for_day(day, start_time, end_time, filter_expression, limit),
+                day_batch
             )
-        else: 
-            response = reviews_table.scan(
-                FilterExpression=Attr('reviewed_by').eq(user_id)
+            for day_items in results:
+                items.extend(_reviewed_by_caller(day_items, has_review, review_ids))
+        if len(items) >= limit:
+            log.warning("Limit restricts the number of sessions retrieved, increase limit to retrieve all items", limit=limit)
+            break
+
+    sorted_items = sorted(items, key=lambda x: x['created_at'], reverse=True)[:limit]
+    return [_format_session_summary(item, review_ids) for item in sorted_items]
+
+
+def _query_sessions_page_for_day(date_bucket, start_time, end_time, filter_expression, limit, exclusive_start_key=None):
+    """
+    One CreatedDateIndex query for a day. Returns (items, last_evaluated_key).
+    """
+    query_params = {
+        'IndexName': 'CreatedDateIndex',
+        'KeyConditionExpression': Key('created_date').eq(date_bucket) & Key('created_at').between(start_time, end_time),
+        'ProjectionExpression': 'pk_session_id, created_date, created_at, title, has_feedback, has_review',
+        'ScanIndexForward': False,
+        'Limit': limit
+    }
+    if filter_expression is not None:
+        query_params['FilterExpression'] = filter_expression
+    if exclusive_start_key:
+        query_params['ExclusiveStartKey'] = exclusive_start_key
+    response = sessions_table.query(**query_params)
+    return response.get('Items', []), response.get('LastEvaluatedKey')
+
+
+def list_all_sessions_page(start_time, end_time, has_feedback, has_review, user_id, page_size=None, cursor=None):
+    """
+    One page of at most page_size sessions created in [start_time, end_time], newest
+    first, with the feedback filter applied by DynamoDB. has_review matches the calling
+    admin's own reviews, resolved through ReviewerIndex.
+
+    The cursor records the day being read and the CreatedDateIndex key to resume from.
+    Upcoming days are probed in parallel, SESSION_QUERY_WORKERS at a time, so ranges
+    with many empty days still take a handful of round trips.
+    """
+    try:
+        page_size = min(max(1, int(page_size or DEFAULT_SESSION_PAGE_SIZE)), MAX_SESSION_PAGE_SIZE)
+        scope = f"list_all_sessions:{user_id}:{start_time}:{end_time}:{has_feedback}:{has_review}"
+        position = _verify_cursor(cursor, scope) or {}
+        filter_expression = _summary_filter_expression(has_feedback, has_review)
+        review_ids = _reviewer_review_ids(user_id)
+
+        date_buckets = _date_buckets_in_range(start_time, end_time)
+        date_buckets.reverse()
+        if position.get('day'):
+            date_buckets = [day for day in date_buckets if day <= position['day']]
+
+        items = []
+        next_position = None
+        resume_key = position.get('key')
+        day_index = 0
+        while day_index < len(date_buckets) and next_position is None:
+            day_batch = date_buckets[day_index:day_index + SESSION_QUERY_WORKERS]
+            with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+                results = list(executor.map(
+                    lambda day: _query_sessions_page_for_day(
+                        day, start_time, end_time, filter_expression, page_size,
+                        resume_key if day == position.get('day') else None
+                    ),
+                    day_batch
+                ))
+
+            for day, (day_items, last_evaluated_key) in zip(day_batch, results):
+                while True:
+                    day_items = _reviewed_by_caller(day_items, has_review, review_ids)
+                    remaining = page_size - len(items)
+                    if len(day_items) > remaining:
+                        # Page fills part way through these results: resume after the last kept item
+                        last_item = day_items[remaining - 1]
+                        items.extend(day_items[:remaining])
+                        next_position = {'day': day, 'key': {
+                            'pk_session_id': last_item['pk_session_id'],
+                            'created_date': day,
+                            'created_at': last_item['created_at']
+                        }}
+                        break
+                    items.extend(day_items)
+                    if not last_evaluated_key:
+                        break
+                    if len(items) == page_size:
+                        next_position = {'day': day, 'key': last_evaluated_key}
+                        break
+                    day_items, last_evaluated_key = _query_sessions_page_for_day(
+                        day, start_time, end_time, filter_expression, page_size, last_evaluated_key
+                    )
+                if next_position is not None:
+                    break
+                if len(items) == page_size:
+                    # This day is exhausted; the next page starts at the following day
+                    following = date_buckets.index(day) + 1
+                    if following < len(date_buckets):
+                        next_position = {'day': date_buckets[following], 'key': None}
+                    break
+            day_index += SESSION_QUERY_WORKERS
+
+        return _response(200, {
+            'sessions': [_format_session_summary(item, review_ids) for item in items],
+            'next_cursor': _sign_cursor(next_position, scope)
+        })
+    except ValueError as error:
+        return _response(400, str(error))
+    except ClientError as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def backfill_session_summaries(cursor=None, limit=500):
+    """
+    Populate created_date, has_feedback, feedback_count and has_review on sessions
+    written before those attributes were maintained. Processes up to `limit`
+    sessions per call and returns a cursor to continue from.
+    """
+    try:
+        scan_params = {'Limit': limit}
+        exclusive_start_key = _verify_cursor(cursor, "backfill_session_summaries")
+        if exclusive_start_key:
+            scan_params['ExclusiveStartKey'] = exclusive_start_key
+        response = sessions_table.scan(**scan_params)
+        sessions = response.get('Items', [])
+
+        def backfill(session):
+            session_id = session['pk_session_id']
+            feedback_count = 0
+            query_params = {
+                'IndexName': 'SessionMessagesIndex',
+                'KeyConditionExpression': Key('sk_session_id').eq(session_id),
+                'FilterExpression': Attr('feedback_type').exists(),
+                'Select': 'COUNT'
+            }
+            while True:
+                messages_response = messages_table.query(**query_params)
+                feedback_count += messages_response.get('Count', 0)
+                if not messages_response.get('LastEvaluatedKey'):
+                    break
+                query_params['ExclusiveStartKey'] = messages_response['LastEvaluatedKey']
+
+            sessions_table.update_item(
+                Key={'pk_session_id': session_id},
+                UpdateExpression="SET created_date = :created_date, has_feedback = :has_feedback, "
+                                 "feedback_count = :feedback_count, has_review = :has_review REMOVE review_id, reviewed_by",
+                ExpressionAttributeValues={
+                    ':created_date': _date_bucket(session['created_at']),
+                    ':has_feedback': feedback_count > 0,
+                    ':feedback_count': feedback_count,
+                    ':has_review': bool(_get_review_for_session(session_id))
+                }
             )
-        last_evaluated_key = response.get('LastEvaluatedKey')
 
-        scan_items = response.get('Items', [])
-        for item in scan_items:
-            sessions_with_review[item["session_id"]] = item["pk_review_id"]
-        if not last_evaluated_key:
-            break
+        with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+            list(executor.map(backfill, sessions))
 
-    # Sort items by created_at in descending order to get the latest sessions
-    sorted_items = sorted(items, key=lambda x: x['created_at'], reverse=True)
+        return _response(200, {
+            'processed': len(sessions),
+            'next_cursor': _sign_cursor(response.get('LastEvaluatedKey'), "backfill_session_summaries")
+        })
+    except ValueError as error:
+        return _response(400, str(error))
+    except ClientError as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
 
-    # Limit the results to the specified limit
-    limited_items = sorted_items[:limit]
 
-    # Format the limited items
-    formatted_items = [
-        {
-            "session_id": item["pk_session_id"],
-            "title": item["title"].strip(),
-            "time_stamp": item["created_at"],
-            "has_feedback": ("Yes" if item["pk_session_id"] in sessions_with_feedback else "No"),
-            "has_review": ("Yes" if item["pk_session_id"] in sessions_with_review else "No"),
-            "review_id": sessions_with_review.get(item["pk_session_id"],"")
+def backfill_daily_users(cursor=None, limit=1000):
+    """
+    Record the creators of existing sessions in the per-day distinct-user rollups. Rollups
+    ignore users they already hold, so this can be re-run. Processes up to `limit` sessions
+    per call and returns a cursor to continue from.
+    """
+    try:
+        scan_params = {'Limit': limit, 'ProjectionExpression': 'user_id, created_at'}
+        exclusive_start_key = _verify_cursor(cursor, "backfill_daily_users")
+        if exclusive_start_key:
+            scan_params['ExclusiveStartKey'] = exclusive_start_key
+        response = sessions_table.scan(**scan_params)
+        sessions = response.get('Items', [])
+
+        users_by_day = defaultdict(set)
+        for session in sessions:
+            if session.get('user_id') and session.get('created_at'):
+                users_by_day[_date_bucket(session['created_at'])].add(session['user_id'])
+        with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+            list(executor.map(lambda day: record_users(daily_users_table, day, users_by_day[day]), users_by_day))
+
+        return _response(200, {
+            'processed': len(sessions),
+            'days': len(users_by_day),
+            'next_cursor': _sign_cursor(response.get('LastEvaluatedKey'), "backfill_daily_users")
+        })
+    except ValueError as error:
+        return _response(400, str(error))
+    except (ClientError, RuntimeError) as error:
+        log.error("Daily user backfill failed", error=str(error))
+        return _response(500, str(error))
+
+
+def backfill_message_attributes(cursor=None, limit=1000):
+    """
+    Fill in the attributes messages written before they were maintained: user_id, copied
+    from the session, and created_date, the CreatedDateIndex day bucket. Scans up to
+    `limit` messages per call and returns a cursor to continue from.
+    """
+    try:
+        scan_params = {
+            'Limit': limit,
+            'FilterExpression': Attr('user_id').not_exists() | (Attr('created_at').exists() & Attr('created_date').not_exists()),
+            'ProjectionExpression': 'pk_message_id, sk_session_id, user_id, created_at, created_date'
         }
-        for item in limited_items
-    ]
-    
-    if has_feedback in {"yes", "no"}:
-        formatted_items = [
-            item for item in formatted_items if item["has_feedback"].lower() == has_feedback 
-        ]
-
-    if has_review in {"yes", "no"}:
-        formatted_items = [
-            item for item in formatted_items if item["has_review"].lower() == has_review
-        ]
+        exclusive_start_key = _verify_cursor(cursor, "backfill_message_attributes")
+        if exclusive_start_key:
+            scan_params['ExclusiveStartKey'] = exclusive_start_key
+        response = messages_table.scan(**scan_params)
+        messages = response.get('Items', [])
 
-    return formatted_items
+        session_ids = list({message['sk_session_id'] for message in messages if not message.get('user_id')})
+        sessions = {}
+        for offset in range(0, len(session_ids), MAX_SESSION_BATCH_SIZE):
+            sessions.update(_batch_get_sessions(session_ids[offset:offset + MAX_SESSION_BATCH_SIZE], projection='pk_session_id, user_id'))
+
+        def backfill(message):
+            updates = {}
+            user_id = sessions.get(message['sk_session_id'], {}).get('user_id')
+            if not message.get('user_id') and user_id:
+                updates['user_id'] = user_id
+            if message.get('created_at') and not message.get('created_date'):
+                updates['created_date'] = _date_bucket(message['created_at'])
+            if not updates:
+                return False
+            try:
+                messages_table.update_item(
+                    Key={'pk_message_id': message['pk_message_id'], 'sk_session_id': message['sk_session_id']},
+                    UpdateExpression="SET " + ", ".join(f"{name} = :{name}" for name in updates),
+                    ConditionExpression="attribute_exists(pk_message_id)",
+                    ExpressionAttributeValues={f":{name}": value for name, value in updates.items()}
+                )
+                return True
+            except ClientError as error:
+                # Deleted since the scan
+                if error.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                return False
+
+        with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+            updated = sum(executor.map(backfill, messages))
+
+        return _response(200, {
+            'processed': len(messages),
+            'updated': updated,
+            'next_cursor': _sign_cursor(response.get('LastEvaluatedKey'), "backfill_message_attributes")
+        })
+    except ValueError as error:
+        return _response(400, str(error))
+    except (ClientError, RuntimeError) as error:
+        log.error("Message attribute backfill failed", error=str(error))
+        return _response(500, str(error))
+
+
+def _rebuild_latency_day(day):
+    """
+    Recompute one day's hourly latency rollups from its messages (read through the messages
+    CreatedDateIndex) and overwrite them, deleting hours that no longer have messages
+    """
+    sketches = defaultdict(LatencySketch)
+    query_params = {
+        'IndexName': 'CreatedDateIndex',
+        'KeyConditionExpression': Key('created_date').eq(day),
+        'ProjectionExpression': 'created_at, response_time'
+    }
+    while True:
+        response = messages_table.query(**query_params)
+        for message in response.get('Items', []):
+            response_time = float(message.get('response_time', 0))
+            if response_time > 0:
+                sketches[message['created_at'][11:13]].add(response_time)
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    stale_hours = {
+        item['sk_hour'] for item in response_time_rollup_table.query(
+            KeyConditionExpression=Key('pk_date').eq(day),
+            ProjectionExpression='sk_hour'
+        ).get('Items', [])
+    } - set(sketches)
+    with response_time_rollup_table.batch_writer() as batch:
+        for hour, sketch in sketches.items():
+            batch.put_item(Item={'pk_date': day, 'sk_hour': hour, **sketch.item_attributes()})
+        for hour in stale_hours:
+            batch.delete_item(Key={'pk_date': day, 'sk_hour': hour})
+    return sum(sketch.count for sketch in sketches.values())
+
+
+def rebuild_latency_rollups(start_date, end_date):
+    """
+    Recompute the hourly latency rollups of the days from start_date to end_date (YYYY-MM-DD,
+    at most MAX_LATENCY_REBUILD_DAYS, ending before today). Rollups are overwritten rather than
+    added to, so a rebuild can be re-run; today is excluded because it is still being written.
+    """
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        if end < start:
+            raise ValueError("end_date must not be before start_date")
+        if end >= datetime.now().date():
+            raise ValueError("Only days before today can be rebuilt")
+        day_count = (end - start).days + 1
+        if day_count > MAX_LATENCY_REBUILD_DAYS:
+            raise ValueError(f"At most {MAX_LATENCY_REBUILD_DAYS} days can be rebuilt per call")
+        days = [(start + timedelta(days=offset)).isoformat() for offset in range(day_count)]
+
+        with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+            counts = list(executor.map(_rebuild_latency_day, days))
+
+        return _response(200, {
+            'days': len(days),
+            'responses': sum(counts)
+        })
+    except (ValueError, TypeError) as error:
+        return _response(400, str(error))
+    except ClientError as error:
+        log.error("Latency rollup rebuild failed", error=str(error))
+        return _response(500, str(error))
 
 
 def update_review_session(review_id, session_id, user_id):
     """
     Create or update review session by an admin user.
-    Each entry can be uniquely identified by session id + user id
+    Each entry can be uniquely identified by session id + user id, so the caller's own
+    review of the session is updated whichever review_id is passed in; another admin's
+    review is never taken over.
     """
     
     try:
-        if review_id:
+        own_review = _get_review_for_session(session_id, reviewed_by=user_id)
+        if own_review:
+            review_id = own_review['pk_review_id']
             reviews_table.update_item(
                 Key={'pk_review_id': review_id},
-                UpdateExpression="SET reviewed_by = :reviewed_by, reviewed_at = :reviewed_at",
-                ExpressionAttributeValues={
-                    ':reviewed_by': user_id,
-                    ':reviewed_at': datetime.now().isoformat()
-                }
+                UpdateExpression="SET reviewed_at = :reviewed_at",
+                ExpressionAttributeValues={':reviewed_at': datetime.now().isoformat()}
             )
         else:
             review_id = _generate_review_id()
@@ -434,335 +1866,1145 @@ def update_review_session(review_id, session_id, user_id):
                 }
             )
 
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps({
-                "review_id": review_id,
-                "session_id": session_id
-            })
-        }
+        # has_review on the session item means any admin reviewed it; list_all_sessions
+        # resolves each admin's own review. Don't create a stub item if the session is gone.
+        try:
+            sessions_table.update_item(
+                Key={'pk_session_id': session_id},
+                UpdateExpression="SET has_review = :has_review REMOVE review_id, reviewed_by",
+                ConditionExpression=Attr('pk_session_id').exists(),
+                ExpressionAttributeValues={':has_review': True}
+            )
+        except ClientError as error:
+            if error.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+        return _response(200, {
+            "review_id": review_id,
+            "session_id": session_id
+        })
 
     except ClientError as error:
-        print(f"Error adding message to session {session_id}: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
-        }
+        log.error("Error adding message to session", session_id=session_id, error=str(error))
+        return _response(500, str(error))
 
 
 def delete_review_session(review_id, session_id, user_id):
     try:
         if review_id:
             reviews_table.delete_item(Key={'pk_review_id': review_id})
-        
-        return {
-            'statusCode': 200,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(f"Review {review_id} deleted.")
-        }
+
+            # Other admins' reviews keep the session marked as reviewed. The index is
+            # eventually consistent, so the deleted review is left out explicitly.
+            remaining = [
+                review for review in _get_session_reviews(session_id)
+                if review['pk_review_id'] != review_id
+            ]
+            try:
+                sessions_table.update_item(
+                    Key={'pk_session_id': session_id},
+                    UpdateExpression="SET has_review = :has_review REMOVE review_id, reviewed_by",
+                    ConditionExpression=Attr('pk_session_id').exists(),
+                    ExpressionAttributeValues={':has_review': bool(remaining)}
+                )
+            except ClientError as error:
+                if error.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+
+        return _response(200, f"Review {review_id} deleted.")
     except ClientError as error:
-        print(f"DynamoDB ClientError: {error}")
-        return {
-            'statusCode': 500,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(str(error))
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def _utc_isoformat(timestamp):
+    """Naive UTC isoformat, the form stored timestamps use, of an ISO timestamp that may carry Z or an offset"""
+    parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat(timespec='microseconds')
+
+
+def _inclusive_end_bound(end_time):
+    """
+    Upper bound for a between() on isoformat timestamps that keeps all of end_time's last
+    unit: reviewed_at carries microseconds, so a date is padded to the end of its day and a
+    time to the end of its second (or minute). A Z or ±HH:MM offset is split off before
+    padding and the padded bound converted to naive UTC.
+    """
+    offset = ''
+    match = TIMESTAMP_OFFSET_PATTERN.search(end_time) if 'T' in end_time else None
+    if match:
+        end_time, offset = end_time[:match.start()], match.group(0)
+    if len(end_time) == 10:
+        end_time += "T23:59:59.999999"
+    elif len(end_time) == 16:
+        end_time += ":59.999999"
+    elif '.' not in end_time:
+        end_time += ".999999"
+    else:
+        end_time = end_time.ljust(26, '9')
+    return _utc_isoformat(end_time + offset) if offset else end_time
+
+
+def list_reviews_by_reviewer(reviewer_id, page_size=None, cursor=None, start_time=None, end_time=None):
+    """
+    One page of the reviews written by an admin, newest first, read from ReviewerIndex
+    (reviewed_by + reviewed_at) so the cost tracks the page rather than the reviews table.
+    start_time/end_time optionally bound reviewed_at, both inclusive; an end date covers its
+    whole day. next_cursor is a signed token for the following page, or null after the oldest review.
+    """
+    try:
+        page_size = min(max(1, int(page_size or DEFAULT_REVIEW_PAGE_SIZE)), MAX_REVIEW_PAGE_SIZE)
+        scope = f"list_reviews_by_reviewer:{reviewer_id}:{start_time}:{end_time}"
+        key_condition = Key('reviewed_by').eq(reviewer_id)
+        if start_time or end_time:
+            key_condition = key_condition & Key('reviewed_at').between(
+                _utc_isoformat(start_time) if start_time else "0000-01-01T00:00:00",
+                _inclusive_end_bound(end_time or "9999-12-31")
+            )
+        query_params = {
+            'IndexName': 'ReviewerIndex',
+            'KeyConditionExpression': key_condition,
+            'ScanIndexForward': False,
+            'Limit': page_size
         }
-    
+        exclusive_start_key = _verify_cursor(cursor, scope)
+        if exclusive_start_key:
+            query_params['ExclusiveStartKey'] = exclusive_start_key
+
+        response = reviews_table.query(**query_params)
+        reviews = response.get('Items', [])
+        session_ids = list(dict.fromkeys(review['session_id'] for review in reviews))
+        sessions = _batch_get_sessions(session_ids, 'pk_session_id, title, created_at') if session_ids else {}
+        return _response(200, {
+            'reviews': [
+                {
+                    'review_id': review['pk_review_id'],
+                    'session_id': review['session_id'],
+                    'title': sessions.get(review['session_id'], {}).get('title', '').strip(),
+                    'time_stamp': sessions.get(review['session_id'], {}).get('created_at', ''),
+                    'comments': review.get('comments', ''),
+                    'reviewed_at': review.get('reviewed_at', '')
+                }
+                for review in reviews
+            ],
+            'next_cursor': _sign_cursor(response.get('LastEvaluatedKey'), scope)
+        })
+    except ValueError as error:
+        return _response(400, str(error))
+    except (ClientError, RuntimeError) as error:
+        log.error("DynamoDB ClientError", error=str(error))
+        return _response(500, str(error))
+
+
+def _assemble_budgeted_chat_history(session_id, max_turns=None, max_chars=None):
+    """
+    Most recent turns of a session that fit within max_turns and max_chars (user prompt
+    plus bot response), oldest-first in the plain shape the model adapters consume.
+    Reads newest-first and stops as soon as either budget is spent.
+    """
+    query_params = {
+        'IndexName': 'SessionMessagesIndex',
+        'KeyConditionExpression': Key('sk_session_id').eq(session_id),
+        'ProjectionExpression': 'user_prompt, bot_response, sources',
+        'ScanIndexForward': False
+    }
+    turns = []
+    used_chars = 0
+    while max_turns is None or len(turns) < max_turns:
+        remaining_turns = CHAT_HISTORY_PAGE_SIZE if max_turns is None else max_turns - len(turns)
+        query_params['Limit'] = min(remaining_turns, CHAT_HISTORY_PAGE_SIZE)
+        response = messages_table.query(**query_params)
+        for message in response.get('Items', []):
+            user_prompt = message.get("user_prompt") or ""
+            bot_response = message.get("bot_response") or ""
+            turn_chars = len(user_prompt) + len(bot_response)
+            if max_chars is not None and used_chars + turn_chars > max_chars:
+                turns.reverse()
+                return turns
+            used_chars += turn_chars
+            turns.append({
+                "user": user_prompt,
+                "chatbot": bot_response,
+                "metadata": json.dumps(message.get("sources", []), cls=DecimalEncoder)
+            })
+        if not response.get('LastEvaluatedKey'):
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    turns.reverse()
+    return turns
 
-def assemble_chat_history(session_id):
+
+def assemble_chat_history(session_id, max_turns=None, max_chars=None):
     """
     Assemble chat history for a given session ID by retrieving messages
     from the messages table and formatting them as required.
+
+    With max_turns and/or max_chars the most recent turns within that budget are
+    returned as plain JSON ({"user", "chatbot", "metadata"}), so prompt-building reads
+    stay bounded. Without them every turn is returned in the DynamoDB JSON shape, read
+    the same way with no budget.
     """
     try:
-        response = messages_table.query(
-            IndexName='SessionMessagesIndex',
-            KeyConditionExpression="sk_session_id = :sid",
-            ExpressionAttributeValues={':sid': session_id},
-            ScanIndexForward=True
+        turns = _assemble_budgeted_chat_history(
+            session_id,
+            max_turns=max(0, int(max_turns)) if max_turns is not None else None,
+            max_chars=max(0, int(max_chars)) if max_chars is not None else None
         )
-        
-        # Extract and format messages
-        messages = response.get('Items', [])
-        chat_history = []
-        for message in messages:
-            chat_history.append({
+        if max_turns is not None or max_chars is not None:
+            return turns
+
+        return [
+            {
                 "M": {
-                    "user": {"S": message.get("user_prompt", "")},
-                    "chatbot": {"S": message.get("bot_response", "")},
-                    "metadata": {"S": json.dumps(message.get("metadata", []))}
+                    "user": {"S": turn["user"]},
+                    "chatbot": {"S": turn["chatbot"]},
+                    "metadata": {"S": turn["metadata"]}
                 }
-            })
-        
-        return chat_history
+            }
+            for turn in turns
+        ]
     except ClientError as error:
-        print(f"Error assembling chat history for session {session_id}: {error}")
+        log.error("Error assembling chat history", session_id=session_id, error=str(error))
         return []
 
-def download_all_sessions_csv(start_time=None, end_time=None, job_id=None):
+SESSION_CSV_COLUMNS = [
+    # Session information
+    "SessionID", "UserID", "Title", "CreatedAt", "UpdatedAt", "MessageCount",
+    # Message information
+    "MessageID", "UserPrompt", "BotResponse", "MessageCreatedAt", "ResponseTime",
+    # Feedback information
+    "FeedbackType", "FeedbackCategory", "FeedbackMessage", "FeedbackRank", "FeedbackCreatedAt",
+    # Review information
+    "ReviewID", "ReviewedBy", "ReviewComments", "ReviewedAt"
+]
+
+
+def _session_csv_rows(session, messages, review):
+    """
+    Build the export rows for one session: one row per message, or a single
+    row with empty message fields when the session has no messages.
+    """
+    session_fields = [
+        session.get('pk_session_id', ''),
+        session.get('user_id', ''),
+        session.get('title', ''),
+        session.get('created_at', ''),
+        session.get('updated_at', ''),
+        session.get('message_count', '')
+    ]
+    review_fields = [
+        review.get('pk_review_id', ''),
+        review.get('reviewed_by', ''),
+        review.get('comments', ''),
+        review.get('reviewed_at', '')
+    ]
+    if not messages:
+        return [session_fields + [''] * 10 + review_fields]
+
+    return [
+        session_fields + [
+            # Message information
+            message.get('pk_message_id', ''),
+            message.get('user_prompt', ''),
+            message.get('bot_response', ''),
+            message.get('created_at', ''),
+            message.get('response_time', ''),
+            # Feedback information
+            message.get('feedback_type', ''),
+            message.get('feedback_category', ''),
+            message.get('feedback_message', ''),
+            message.get('feedback_rank', ''),
+            message.get('feedback_created_at', '')
+        ] + review_fields
+        for message in messages
+    ]
+
+
+def _get_session_reviews(session_id, reviewed_by=None):
+    """
+    All reviews of a single session from SessionReviewIndex, optionally only one admin's
+    """
+    reviews = []
+    query_params = {
+        'IndexName': 'SessionReviewIndex',
+        'KeyConditionExpression': Key('session_id').eq(session_id)
+    }
+    if reviewed_by:
+        query_params['FilterExpression'] = Attr('reviewed_by').eq(reviewed_by)
+    while True:
+        response = reviews_table.query(**query_params)
+        reviews.extend(response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    return reviews
+
+
+def _get_review_for_session(session_id, reviewed_by=None):
+    """
+    Get the latest review for a single session from SessionReviewIndex, optionally the
+    latest by one admin
+    """
+    reviews = _get_session_reviews(session_id, reviewed_by)
+    if not reviews:
+        return {}
+    return max(reviews, key=lambda review: review.get('reviewed_at', ''))
+
+
+def _get_reviews_for_sessions(session_ids):
+    """
+    Resolve the reviews for one page of sessions with concurrent SessionReviewIndex
+    queries. Returns {session_id: review}, with {} for sessions that have no review.
+    """
+    def lookup(session_id):
+        try:
+            return session_id, _get_review_for_session(session_id)
+        except ClientError as e:
+            log.error("Error getting review for session", session_id=session_id, error=str(e))
+            return session_id, {}
+
+    with ThreadPoolExecutor(max_workers=EXPORT_REVIEW_WORKERS) as executor:
+        return dict(executor.map(lookup, session_ids))
+
+
+def _export_session_segment(segment, total_segments, start_time, end_time, writer, job_state, high_water_mark=None):
+    """
+    Scan one segment of the sessions table and stream its sessions into the writer.
+
+    Progress is recorded in job_state['segments'][segment] after every page, so the
+    segment can be resumed from its last key. Stops early, at a page boundary, when
+    job_state['stop'] is set. Messages created after high_water_mark are left out; the
+    export cache appends them on a later refresh.
+    """
+    segment_state = job_state['segments'][segment]
+    scan_params = {
+        'FilterExpression': Key('created_at').between(start_time, end_time),
+        # Leaves out the snapshot attributes older session items may still carry
+        'ProjectionExpression': 'pk_session_id, user_id, title, created_at, updated_at, message_count',
+        'Segment': segment,
+        'TotalSegments': total_segments
+    }
+    if segment_state.get('last_evaluated_key'):
+        scan_params['ExclusiveStartKey'] = segment_state['last_evaluated_key']
+
+    while not segment_state.get('done') and not job_state['stop'].is_set():
+        response = sessions_table.scan(**scan_params)
+        sessions = response.get('Items', [])
+        reviews_by_session = _get_reviews_for_sessions([session['pk_session_id'] for session in sessions])
+        page_first_created_at = min((session['created_at'] for session in sessions), default=None)
+        page_messages = 0
+        for session in sessions:
+            session_id = session['pk_session_id']
+            messages, _ = _query_session_messages(session_id)
+            if high_water_mark:
+                messages = [message for message in messages if message.get('created_at', '') <= high_water_mark]
+            review = reviews_by_session.get(session_id, {})
+            writer.write_rows(_session_csv_rows(session, messages, review))
+            page_messages += len(messages)
+
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        with job_state['lock']:
+            job_state['sessions_processed'] += len(sessions)
+            job_state['messages_processed'] += page_messages
+            if page_first_created_at and (not job_state['first_created_at'] or page_first_created_at < job_state['first_created_at']):
+                job_state['first_created_at'] = page_first_created_at
+            segment_state['last_evaluated_key'] = last_evaluated_key
+            segment_state['done'] = not last_evaluated_key
+        if last_evaluated_key:
+            scan_params['ExclusiveStartKey'] = last_evaluated_key
+
+    log.info("Export segment stopped", segment=segment, total_segments=total_segments, done=bool(segment_state.get('done')))
+
+
+def _export_job_key(job_id):
+    return f"{EXPORT_JOB_PREFIX}{job_id}.json"
+
+
+def _export_pending_key(job_id):
+    return f"{EXPORT_JOB_PREFIX}{job_id}.pending.csv"
+
+
+def _load_export_job(s3, bucket, job_id):
+    try:
+        response = s3.get_object(Bucket=bucket, Key=_export_job_key(job_id))
+    except ClientError as error:
+        if error.response['Error']['Code'] in ('NoSuchKey', '404'):
+            return None
+        raise
+    return json.loads(response['Body'].read())
+
+
+def _save_export_job(s3, bucket, job):
+    job['updated_at'] = datetime.now().isoformat()
+    s3.put_object(
+        Bucket=bucket,
+        Key=_export_job_key(job['job_id']),
+        Body=json.dumps(job, cls=DecimalEncoder),
+        ContentType='application/json'
+    )
+
+
+def _export_job_status(s3, bucket, job):
+    """Format the client-facing view of an export job"""
+    body = {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'start_time': job['start_time'],
+        'end_time': job['end_time'],
+        'sessions_processed': job.get('sessions_processed', 0),
+        'messages_processed': job.get('messages_processed', 0),
+        'rows_written': job.get('rows_written', 0),
+        'segments_completed': job.get('segments_completed', 0),
+        'total_segments': len(job.get('segments', [])),
+        'invocations': job.get('invocations', 0),
+        'updated_at': job.get('updated_at')
+    }
+    if job['status'] == 'completed':
+        body['download_url'] = s3.generate_presigned_url(
+            'get_object',
+            Params={'Bucket': bucket, 'Key': job['file_name']},
+            ExpiresIn=3600
+        )
+    elif job['status'] == 'failed':
+        body['error'] = job.get('error', '')
+    return body
+
+
+def _append_export_rows(s3, bucket, source_key, key, rows):
+    """Write the export object at source_key followed by CSV rows to key, copying it server side"""
+    chunk = io.StringIO()
+    csv.writer(chunk, quoting=csv.QUOTE_ALL).writerows(rows)
+    copy_with_appended(s3, bucket, source_key, key, chunk.getvalue().encode('utf-8'))
+
+
+def _sessions_updated_since(first_day, start_time, end_time, since, limit):
+    """
+    Sessions created in [start_time, end_time] with activity after since, with one
+    CreatedDateIndex query per day from first_day (the oldest day the cached export holds)
+    on. Stops once more than limit sessions are found.
+    """
+    days = _date_buckets_in_range(max(start_time, first_day), end_time)
+    updated_since = Attr('updated_at').gt(since)
+    sessions = []
+    with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+        for day_sessions in executor.map(lambda day: _query_sessions_for_day(day, start_time, end_time, updated_since), days):
+            sessions.extend(day_sessions)
+            if len(sessions) > limit:
+                break
+    return sessions
+
+
+def _session_messages_between(session_id, since, until):
+    """Messages of a session created in (since, until]"""
+    query_params = {
+        'IndexName': 'SessionMessagesIndex',
+        'KeyConditionExpression': Key('sk_session_id').eq(session_id) & Key('created_at').gt(since)
+    }
+    messages = []
+    while True:
+        response = messages_table.query(**query_params)
+        messages.extend(item for item in response.get('Items', []) if item['created_at'] <= until)
+        if not response.get('LastEvaluatedKey'):
+            return messages
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _refresh_session_export(s3, bucket, manifest):
     """
-    Scan all sessions in the given time range (or all if not provided), write to a CSV, upload to S3, and return a presigned URL.
-    Uses parallel processing and efficient batch operations to minimize DynamoDB calls.
-    Supports polling mechanism for long-running exports.
+    Bring a cached session export up to date: the messages written since its high-water
+    mark are appended into a new copy of its CSV, and manifest is updated to point at it.
+    Returns the number of rows appended, or None when too many sessions changed (or the
+    manifest predates first_day) and a full export should run instead.
+    """
+    since = manifest['high_water_mark']
+    high_water_mark = export_high_water_mark()
+    if high_water_mark <= since:
+        return 0
+    if 'first_day' not in manifest:
+        return None
+
+    sessions = _sessions_updated_since(
+        manifest['first_day'], manifest['start_time'], min(manifest['end_time'], high_water_mark), since, EXPORT_CACHE_MAX_DELTA_SESSIONS
+    )
+    if len(sessions) > EXPORT_CACHE_MAX_DELTA_SESSIONS:
+        log.info("Export cache refresh too large, running a full export", file_name=manifest['file_name'], limit=EXPORT_CACHE_MAX_DELTA_SESSIONS)
+        return None
+
+    reviews_by_session = _get_reviews_for_sessions([session['pk_session_id'] for session in sessions])
+    rows = []
+    for session in sessions:
+        messages = _session_messages_between(session['pk_session_id'], since, high_water_mark)
+        if messages:
+            rows.extend(_session_csv_rows(session, messages, reviews_by_session.get(session['pk_session_id'], {})))
+    if rows:
+        file_name = export_cache_file_key(manifest['file_name'])
+        _append_export_rows(s3, bucket, manifest['file_name'], file_name, rows)
+        manifest['file_name'] = file_name
+
+    manifest['high_water_mark'] = high_water_mark
+    manifest['rows_written'] = manifest.get('rows_written', 0) + len(rows)
+    return len(rows)
+
+
+def download_all_sessions_csv(start_time=None, end_time=None, job_id=None, context=None):
+    """
+    Start an asynchronous export of all sessions in the given time range (or all if not provided).
+
+    A job manifest is written to the download bucket and the export itself runs in an
+    async self-invocation (see run_session_export_job). The response carries the job_id
+    to poll with get_export_status. Passing job_id returns that job's status instead.
+
+    When an earlier export of the same range is cached, the rows written since then are
+    appended to it and its download_url is returned right away.
     """
-    import csv
-    import io
-    import boto3
-    import os
-    from boto3.dynamodb.conditions import Key
-    from concurrent.futures import ThreadPoolExecutor
-    print(f"[download_all_sessions_csv] start_time: {start_time}, end_time: {end_time}, job_id: {job_id}")
+    log.info("download_all_sessions_csv", start_time=start_time, end_time=end_time, job_id=job_id)
+    if job_id:
+        return get_export_status(job_id)
+
     try:
         # Use the broadest possible range if not provided
         if not start_time:
             start_time = "0000-01-01T00:00:00"
         if not end_time:
             end_time = "9999-12-31T23:59:59"
-        print(f"[download_all_sessions_csv] Using range: {start_time} to {end_time}")
+    
+        s3 = boto3.client('s3')
+        S3_DOWNLOAD_BUCKET = os.environ["SESSION_S3_DOWNLOAD"]
+        cache_key = export_cache_key('sessions', {'start_time': start_time, 'end_time': end_time})
+        cached, cached_etag = load_export_cache(s3, S3_DOWNLOAD_BUCKET, cache_key)
+        if cached:
+            previous_file_name = cached['file_name']
+            rows_appended = _refresh_session_export(s3, S3_DOWNLOAD_BUCKET, cached)
+            if rows_appended is not None:
+                cached = swap_export_cache(s3, S3_DOWNLOAD_BUCKET, cache_key, cached, cached_etag, previous_file_name)
+                log.info("Served cached session export", file_name=cached['file_name'], rows_appended=rows_appended)
+                return _response(200, {
+                    'status': 'completed',
+                    'cached': True,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'rows_appended': rows_appended,
+                    'rows_written': cached['rows_written'],
+                    'download_url': s3.generate_presigned_url(
+                        'get_object',
+                        Params={'Bucket': S3_DOWNLOAD_BUCKET, 'Key': cached['file_name']},
+                        ExpiresIn=3600
+                    )
+                })
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'status': 'queued',
+            'start_time': start_time,
+            'end_time': end_time,
+            'file_name': f"all-sessions-{start_time}-{end_time}-{job_id}.csv",
+            'created_at': datetime.now().isoformat(),
+            'cache_key': cache_key,
+            'high_water_mark': export_high_water_mark(),
+            'sessions_processed': 0,
+            'messages_processed': 0,
+            'rows_written': 0,
+            'invocations': 0,
+            'segments': [{'done': False, 'last_evaluated_key': None} for _ in range(EXPORT_SCAN_SEGMENTS)],
+            'upload': None
+        }
+        _save_export_job(s3, S3_DOWNLOAD_BUCKET, job)
+        _start_export_worker(job_id, context)
+
+        return _response(202, _export_job_status(s3, S3_DOWNLOAD_BUCKET, job))
+    except Exception as e:
+        log.exception("Failed to start session export", error=str(e))
+        return _response(500, {'error': f'Failed to download sessions: {str(e)}'})
+
 
-        # Create S3 client first
+def _start_export_worker(job_id, context):
+    _invoke_self_async({'source': 'async', 'operation': 'run_session_export_job', 'job_id': job_id}, context)
+
+
+def get_export_status(job_id):
+    try:
         s3 = boto3.client('s3')
         S3_DOWNLOAD_BUCKET = os.environ["SESSION_S3_DOWNLOAD"]
-        file_name = f"all-sessions-{start_time}-{end_time}.csv"
-        
-        # If this is a status check, verify if the file exists
-        if job_id:
+        job = _load_export_job(s3, S3_DOWNLOAD_BUCKET, job_id)
+        if not job:
+            return _response(404, {'error': f'Export job {job_id} not found'})
+        return _response(200, _export_job_status(s3, S3_DOWNLOAD_BUCKET, job))
+    except ClientError as error:
+        log.error("Error reading export job", job_id=job_id, error=str(error))
+        return _response(500, str(error))
+
+
+def _record_export_progress(job, job_state, rows_written):
+    with job_state['lock']:
+        job['sessions_processed'] = job_state['sessions_processed']
+        job['messages_processed'] = job_state['messages_processed']
+        job['first_created_at'] = job_state['first_created_at']
+        job['segments_completed'] = sum(1 for segment in job_state['segments'] if segment.get('done'))
+    job['rows_written'] = rows_written
+
+
+def run_session_export_job(job_id, context):
+    """
+    Async worker for a session export job.
+
+    Runs the parallel segmented scan, streaming rows into the job's multipart upload and
+    publishing progress to the manifest. When the invocation nears its timeout the segments
+    stop at a page boundary, the scan cursors, uploaded parts and not-yet-uploaded rows are
+    checkpointed, and the job re-invokes itself to continue.
+    """
+    s3 = boto3.client('s3')
+    S3_DOWNLOAD_BUCKET = os.environ["SESSION_S3_DOWNLOAD"]
+    job = _load_export_job(s3, S3_DOWNLOAD_BUCKET, job_id)
+    if not job or job['status'] in ('completed', 'failed'):
+        log.info("Export job has nothing to do", job_id=job_id)
+        return
+
+    job['status'] = 'running'
+    job['invocations'] = job.get('invocations', 0) + 1
+    writer = None
+    try:
+        upload = job.get('upload')
+        if upload:
+            pending = s3.get_object(Bucket=S3_DOWNLOAD_BUCKET, Key=_export_pending_key(job_id))['Body'].read().decode('utf-8')
+            writer = S3MultipartCsvWriter(
+                s3, S3_DOWNLOAD_BUCKET, job['file_name'],
+                upload_id=upload['upload_id'],
+                parts=upload['parts'],
+                next_part_number=upload['next_part_number'],
+                pending=pending,
+                part_size=EXPORT_PART_SIZE,
+                quoting=csv.QUOTE_ALL
+            )
+        else:
+            writer = S3MultipartCsvWriter(
+                s3, S3_DOWNLOAD_BUCKET, job['file_name'], SESSION_CSV_COLUMNS,
+                part_size=EXPORT_PART_SIZE,
+                quoting=csv.QUOTE_ALL
+            )
+        rows_before = job.get('rows_written', 0)
+        _save_export_job(s3, S3_DOWNLOAD_BUCKET, job)
+
+        job_state = {
+            'lock': threading.Lock(),
+            'stop': threading.Event(),
+            # Live scan cursors, only copied back into the manifest together with the
+            # matching upload checkpoint so a retried invocation never skips rows
+            'segments': copy.deepcopy(job['segments']),
+            'sessions_processed': job.get('sessions_processed', 0),
+            'messages_processed': job.get('messages_processed', 0),
+            # Oldest session exported, where refreshes of the cached export start querying
+            'first_created_at': job.get('first_created_at')
+        }
+        total_segments = len(job['segments'])
+        high_water_mark = job.get('high_water_mark')
+        with ThreadPoolExecutor(max_workers=total_segments) as executor:
+            futures = [
+                executor.submit(_export_session_segment, segment, total_segments,
+                                job['start_time'], min(job['end_time'], high_water_mark or job['end_time']),
+                                writer, job_state, high_water_mark)
+                for segment in range(total_segments)
+            ]
+            while True:
+                _, not_done = wait(futures, timeout=EXPORT_PROGRESS_INTERVAL_SECONDS)
+                if not not_done:
+                    break
+                _record_export_progress(job, job_state, rows_before + writer.rows_written)
+                _save_export_job(s3, S3_DOWNLOAD_BUCKET, job)
+                if context and context.get_remaining_time_in_millis() < EXPORT_CHECKPOINT_MARGIN_MS:
+                    job_state['stop'].set()
+            for future in futures:
+                future.result()
+
+        _record_export_progress(job, job_state, rows_before + writer.rows_written)
+        job['segments'] = job_state['segments']
+
+        if all(segment.get('done') for segment in job['segments']):
+            writer.complete()
+            job['status'] = 'completed'
+            job['completed_at'] = datetime.now().isoformat()
+            _save_export_job(s3, S3_DOWNLOAD_BUCKET, job)
+            if job.get('cache_key'):
+                save_export_cache(s3, S3_DOWNLOAD_BUCKET, job['cache_key'], {
+                    'export_type': 'sessions',
+                    'start_time': job['start_time'],
+                    'end_time': job['end_time'],
+                    'file_name': job['file_name'],
+                    'high_water_mark': high_water_mark,
+                    'first_day': _date_bucket(job['first_created_at'] or high_water_mark),
+                    'built_at': job['created_at'],
+                    'rows_written': job['rows_written']
+                })
+            if upload:
+                s3.delete_object(Bucket=S3_DOWNLOAD_BUCKET, Key=_export_pending_key(job_id))
+            log.info("Export job completed", job_id=job_id, sessions=job['sessions_processed'], messages=job['messages_processed'])
+            return
+
+        # Out of time: checkpoint and continue in a fresh invocation
+        job['upload'], pending = writer.checkpoint()
+        s3.put_object(Bucket=S3_DOWNLOAD_BUCKET, Key=_export_pending_key(job_id), Body=pending.encode('utf-8'))
+        job['status'] = 'queued'
+        _save_export_job(s3, S3_DOWNLOAD_BUCKET, job)
+        log.info("Export job checkpointed, re-invoking", job_id=job_id, sessions=job['sessions_processed'])
+        _start_export_worker(job_id, context)
+
+    except Exception as e:
+        log.exception("Export job failed", job_id=job_id, error=str(e))
+        if writer and not writer.abort():
+            log.warning("Failed to abort multipart upload", upload_id=writer.upload_id)
+        job['status'] = 'failed'
+        job['error'] = str(e)
+        _save_export_job(s3, S3_DOWNLOAD_BUCKET, job)
+
+
+def _ingest_created_at(record):
+    """Normalize a producer timestamp (e.g. JS toISOString) to the naive UTC isoformat used elsewhere"""
+    if not record.get('created_at'):
+        return datetime.now().isoformat()
+    return _utc_isoformat(record['created_at'])
+
+
+def _ingest_appends(session_id, records, user_id):
+    """
+    Append queued messages in transactions of MAX_TRANSACT_MESSAGES. Messages that were
+    already written (queue redeliveries) cancel the transaction; they are dropped and the
+    rest retried, so message_count is only bumped for new messages.
+    """
+    for offset in range(0, len(records), MAX_TRANSACT_MESSAGES):
+        chunk = records[offset:offset + MAX_TRANSACT_MESSAGES]
+        while chunk:
+            message_items = [
+                _build_message_item(session_id, record['message_id'], record['new_chat_entry'], record['created_at'], user_id)
+                for record in chunk
+            ]
+            transact_items = []
+            for message_item in message_items:
+                transact_items.extend(_message_puts(message_item, only_if_new=True))
+            transact_items.append(_session_counter_update(session_id, len(chunk), chunk[-1]['created_at']))
             try:
-                s3.head_object(Bucket=S3_DOWNLOAD_BUCKET, Key=file_name)
-                # File exists, generate presigned URL
-                presigned_url = s3.generate_presigned_url(
-                    'get_object',
-                    Params={'Bucket': S3_DOWNLOAD_BUCKET, 'Key': file_name},
-                    ExpiresIn=3600
-                )
-                return {
-                    'headers': {'Access-Control-Allow-Origin': '*'},
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'status': 'completed',
-                        'download_url': presigned_url
-                    })
-                }
-            except:
-                # File doesn't exist yet
-                return {
-                    'headers': {'Access-Control-Allow-Origin': '*'},
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'status': 'processing'
-                    })
+                _transact_write(transact_items)
+                _record_response_times(message_items)
+                break
+            except dynamodb.meta.client.exceptions.TransactionCanceledException as error:
+                reasons = error.response.get('CancellationReasons', [])
+                duplicates = {
+                    index // 2 for index, reason in enumerate(reasons[:2 * len(chunk)])
+                    if index % 2 == 0 and reason.get('Code') == 'ConditionalCheckFailed'
                 }
+                if not duplicates:
+                    raise
+                log.info("Skipping already written messages", session_id=session_id, duplicates=len(duplicates))
+                chunk = [record for index, record in enumerate(chunk) if index not in duplicates]
 
-        # Create a temporary file to stream the CSV
-        temp_file = io.StringIO()
-        writer = csv.writer(temp_file, quoting=csv.QUOTE_ALL)
-        
-        # Write header
-        columns = [
-            # Session information
-            "SessionID", "UserID", "Title", "CreatedAt", "UpdatedAt", "MessageCount",
-            # Message information
-            "MessageID", "UserPrompt", "BotResponse", "MessageCreatedAt", "ResponseTime",
-            # Feedback information
-            "FeedbackType", "FeedbackCategory", "FeedbackMessage", "FeedbackRank", "FeedbackCreatedAt",
-            # Review information
-            "ReviewID", "ReviewedBy", "ReviewComments", "ReviewedAt"
-        ]
-        writer.writerow(columns)
 
-        def get_messages_for_session(session_id):
-            """Get messages for a single session"""
-            try:
-                response = messages_table.query(
-                    IndexName='SessionMessagesIndex',
-                    KeyConditionExpression="sk_session_id = :sid",
-                    ExpressionAttributeValues={':sid': session_id},
-                    Limit=100
-                )
-                return session_id, response.get('Items', [])
-            except Exception as e:
-                print(f"Error getting messages for session {session_id}: {e}")
-                return session_id, []
+def _ingest_session_records(session_id, records):
+    """
+    Persist one session's queued chat entries in message ID (creation) order. A queued
+    new-session entry creates the session unless it already exists, in which case it is
+    appended like any other entry.
+    """
+    records = sorted(records, key=lambda record: record['message_id'])
+    new_session = next(
+        (record for record in records if record.get('operation') == 'add_new_session_with_first_message'),
+        None
+    )
+    # Older producers did not send user_id with appends
+    user_id = next((record['user_id'] for record in records if record.get('user_id')), None) or _session_user_id(session_id)
+    if new_session is not None:
+        records.remove(new_session)
+        message_item = _build_message_item(session_id, new_session['message_id'], new_session['new_chat_entry'], new_session['created_at'], new_session['user_id'])
+        try:
+            _transact_write([
+                {'Put': {
+                    'TableName': SESSIONS_TABLE,
+                    'Item': _new_session_item(session_id, new_session['user_id'], new_session['title'], new_session['created_at']),
+                    'ConditionExpression': 'attribute_not_exists(pk_session_id)'
+                }},
+                *_message_puts(message_item, only_if_new=True),
+                _snapshot_put(message_item)
+            ])
+            _record_daily_user(new_session['user_id'], new_session['created_at'])
+            _record_response_times([message_item])
+        except dynamodb.meta.client.exceptions.TransactionCanceledException:
+            records.insert(0, new_session)
+    _ingest_appends(session_id, records, user_id)
+
+
+def ingest_queued_messages(event):
+    """
+    Write-behind persistence for the chat path. The chat function queues each finished
+    turn (with a message ID it generated) on a FIFO queue grouped by session, and this
+    consumes SQS batches: records are de-duplicated by message ID, grouped by session
+    and written in grouped transactions, sessions in parallel. Records of sessions that
+    failed are returned as batchItemFailures so only they are redelivered.
+    """
+    sessions = {}
+    receipt_ids = {}
+    failures = []
+    for record in event.get('Records', []):
+        try:
+            body = json.loads(record['body'])
+            if not _is_ulid_id(body.get('message_id', ''), "MESSAGE-"):
+                raise ValueError(f"Invalid message_id {body.get('message_id')}")
+            body['created_at'] = _ingest_created_at(body)
+        except (ValueError, KeyError, TypeError) as error:
+            log.warning("Rejecting queued record", message_id=record.get('messageId'), error=str(error))
+            failures.append(record['messageId'])
+            continue
+        session_records = sessions.setdefault(body['session_id'], {})
+        session_records.setdefault(body['message_id'], body)
+        receipt_ids.setdefault(body['session_id'], []).append(record['messageId'])
+
+    def ingest(session_id):
+        try:
+            _ingest_session_records(session_id, list(sessions[session_id].values()))
+            return []
+        except (ClientError, KeyError) as error:
+            log.error("Failed to persist queued messages", session_id=session_id, error=str(error))
+            return receipt_ids[session_id]
+
+    with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+        for failed in executor.map(ingest, list(sessions)):
+            failures.extend(failed)
+
+    log.info("Ingested queued messages", records=len(event.get('Records', [])), sessions=len(sessions), failed=len(failures))
+    return {'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]}
+
+
+def _archive_pointer_key(session_id):
+    return f"{ARCHIVE_PREFIX}index/{session_id}.json"
+
+
+def _archive_state_key():
+    return f"{ARCHIVE_PREFIX}_state.json"
+
+
+def _oldest_session_day():
+    """Smallest created_date in CreatedDateIndex, only needed on the first archive run"""
+    scan_params = {'IndexName': 'CreatedDateIndex', 'ProjectionExpression': 'created_date'}
+    oldest = None
+    while True:
+        response = sessions_table.scan(**scan_params)
+        for item in response.get('Items', []):
+            if oldest is None or item['created_date'] < oldest:
+                oldest = item['created_date']
+        if not response.get('LastEvaluatedKey'):
+            return oldest
+        scan_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+
+def _session_ids_for_day(date_bucket):
+    query_params = {
+        'IndexName': 'CreatedDateIndex',
+        'KeyConditionExpression': Key('created_date').eq(date_bucket),
+        'ProjectionExpression': 'pk_session_id'
+    }
+    session_ids = []
+    while True:
+        response = sessions_table.query(**query_params)
+        session_ids.extend(item['pk_session_id'] for item in response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            return session_ids
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-        def get_review_for_session(session_id):
-            """Get review for a single session"""
-            try:
-                response = reviews_table.scan(
-                    FilterExpression=Attr('session_id').eq(session_id),
-                    Limit=1
-                )
-                return session_id, response.get('Items', [{}])[0] if response.get('Items') else {}
-            except Exception as e:
-                print(f"Error getting review for session {session_id}: {e}")
-                return session_id, {}
 
-        # Process sessions in batches
-        batch_size = 100  # Process 100 sessions at a time
-        last_evaluated_key = None
-        total_sessions = 0
-        total_messages = 0
+def _archive_member(session):
+    """
+    One session as a standalone gzip member of JSONL lines: the session item, then its
+    messages and reviews. Members concatenate into a valid .jsonl.gz part, and a single
+    member can be fetched with a ranged GET.
+    """
+    session_id = session['pk_session_id']
+    _strip_legacy_snapshot(session)
+    messages, _ = _query_session_messages(session_id)
+    reviews = []
+    query_params = {'IndexName': 'SessionReviewIndex', 'KeyConditionExpression': Key('session_id').eq(session_id)}
+    while True:
+        response = reviews_table.query(**query_params)
+        reviews.extend(response.get('Items', []))
+        if not response.get('LastEvaluatedKey'):
+            break
+        query_params['ExclusiveStartKey'] = response['LastEvaluatedKey']
 
-        while True:
-            # Get batch of sessions
-            if last_evaluated_key:
-                response = sessions_table.scan(
-                    FilterExpression=Key('created_at').between(start_time, end_time),
-                    ExclusiveStartKey=last_evaluated_key,
-                    Limit=batch_size
-                )
-            else:
-                response = sessions_table.scan(
-                    FilterExpression=Key('created_at').between(start_time, end_time),
-                    Limit=batch_size
-                )
-            
-            sessions = response.get('Items', [])
-            if not sessions:
-                break
+    lines = [json.dumps({'type': 'session', 'item': session}, cls=DecimalEncoder)]
+    lines.extend(json.dumps({'type': 'message', 'item': message}, cls=DecimalEncoder) for message in messages)
+    lines.extend(json.dumps({'type': 'review', 'item': review}, cls=DecimalEncoder) for review in reviews)
+    return gzip.compress(("\n".join(lines) + "\n").encode('utf-8'))
 
-            total_sessions += len(sessions)
-            print(f"[download_all_sessions_csv] Processing batch of {len(sessions)} sessions. Total so far: {total_sessions}")
-
-            # Get all session IDs in this batch
-            session_ids = [session['pk_session_id'] for session in sessions]
-
-            # Parallel fetch of messages and reviews
-            messages_by_session = {}
-            reviews_by_session = {}
-            
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                # Fetch messages in parallel
-                message_futures = [executor.submit(get_messages_for_session, sid) for sid in session_ids]
-                for future in message_futures:
-                    session_id, messages = future.result()
-                    messages_by_session[session_id] = messages
-                    total_messages += len(messages)
-
-                # Fetch reviews in parallel
-                review_futures = [executor.submit(get_review_for_session, sid) for sid in session_ids]
-                for future in review_futures:
-                    session_id, review = future.result()
-                    reviews_by_session[session_id] = review
-
-            # Write data for this batch
-            for session in sessions:
-                session_id = session['pk_session_id']
-                messages = messages_by_session.get(session_id, [])
-                review = reviews_by_session.get(session_id, {})
-
-                if not messages:
-                    # Write session info with empty message fields
-                    writer.writerow([
-                        session.get('pk_session_id', ''),
-                        session.get('user_id', ''),
-                        session.get('title', ''),
-                        session.get('created_at', ''),
-                        session.get('updated_at', ''),
-                        session.get('message_count', ''),
-                        '', '', '', '', '',  # Message fields
-                        '', '', '', '', '',  # Feedback fields
-                        '', '', '', ''       # Review fields
-                    ])
-                else:
-                    for message in messages:
-                        writer.writerow([
-                            # Session information
-                            session.get('pk_session_id', ''),
-                            session.get('user_id', ''),
-                            session.get('title', ''),
-                            session.get('created_at', ''),
-                            session.get('updated_at', ''),
-                            session.get('message_count', ''),
-                            # Message information
-                            message.get('pk_message_id', ''),
-                            message.get('user_prompt', ''),
-                            message.get('bot_response', ''),
-                            message.get('created_at', ''),
-                            message.get('response_time', ''),
-                            # Feedback information
-                            message.get('feedback_type', ''),
-                            message.get('feedback_category', ''),
-                            message.get('feedback_message', ''),
-                            message.get('feedback_rank', ''),
-                            message.get('feedback_created_at', ''),
-                            # Review information
-                            review.get('pk_review_id', ''),
-                            review.get('reviewed_by', ''),
-                            review.get('comments', ''),
-                            review.get('reviewed_at', '')
-                        ])
-
-            # Get the next batch
-            last_evaluated_key = response.get('LastEvaluatedKey')
-            if not last_evaluated_key:
-                break
 
-            # Periodically upload to S3 to prevent memory issues
-            if total_sessions % 200 == 0:  # Every 200 sessions
-                print(f"[download_all_sessions_csv] Uploading intermediate results. Sessions: {total_sessions}, Messages: {total_messages}")
-                temp_file.seek(0)
-                s3.put_object(
-                    Bucket=S3_DOWNLOAD_BUCKET,
-                    Key=f"temp-{file_name}",
-                    Body=temp_file.getvalue()
-                )
-                temp_file = io.StringIO()
-                writer = csv.writer(temp_file, quoting=csv.QUOTE_ALL)
-                writer.writerow(columns)  # Write header again
+def _delete_archived_sessions(session_ids):
+    """
+    Delete sessions that are already in the archive from DynamoDB. Returns the IDs whose
+    delete failed, to be retried by the next run.
+    """
+    def delete(session_id):
+        try:
+            _cascade_delete_session(session_id, keep_archive=True)
+        except (ClientError, RuntimeError) as error:
+            log.error("Failed to delete archived session", session_id=session_id, error=str(error))
+            return session_id
+        return None
+
+    with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+        return [session_id for session_id in executor.map(delete, session_ids) if session_id]
 
-        print(f"[download_all_sessions_csv] Completed processing. Total sessions: {total_sessions}, Total messages: {total_messages}")
 
-        # Final upload to S3
-        temp_file.seek(0)
+def _retry_archived_deletes(s3, session_ids):
+    """
+    Retry the DynamoDB deletes of sessions archived by an earlier run. Sessions whose
+    pointer is gone were restored or deleted since and are left alone.
+    """
+    pending = []
+    for session_id in session_ids:
+        try:
+            s3.head_object(Bucket=SESSION_ARCHIVE_BUCKET, Key=_archive_pointer_key(session_id))
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('NoSuchKey', '404'):
+                continue
+            raise
+        pending.append(session_id)
+    return _delete_archived_sessions(pending)
+
+
+def _flush_archive_part(s3, date_bucket, members):
+    """
+    Upload one date-partitioned part, write a pointer per session, then delete the
+    sessions from DynamoDB. Deletes come last, so sessions are only removed once their
+    archive copy is complete. Returns the IDs whose delete failed.
+    """
+    if not members:
+        return []
+    part_key = f"{ARCHIVE_PREFIX}data/created_date={date_bucket}/part-{_generate_ulid()}.jsonl.gz"
+    s3.put_object(Bucket=SESSION_ARCHIVE_BUCKET, Key=part_key, Body=b"".join(member for _, member in members))
+
+    offset = 0
+    pointers = []
+    for session_id, member in members:
+        pointers.append((session_id, {'key': part_key, 'start': offset, 'end': offset + len(member) - 1, 'created_date': date_bucket}))
+        offset += len(member)
+    with ThreadPoolExecutor(max_workers=SESSION_QUERY_WORKERS) as executor:
+        list(executor.map(
+            lambda pointer: s3.put_object(
+                Bucket=SESSION_ARCHIVE_BUCKET,
+                Key=_archive_pointer_key(pointer[0]),
+                Body=json.dumps(pointer[1])
+            ),
+            pointers
+        ))
+    failed = _delete_archived_sessions([session_id for session_id, _ in members])
+    log.info("Archived sessions", sessions=len(members), created_date=date_bucket, part_key=part_key, delete_failures=len(failed))
+    return failed
+
+
+def archive_sessions(context=None):
+    """
+    Move sessions created more than ARCHIVE_AFTER_DAYS ago to S3, one day at a time,
+    oldest first, so table scans only cover the active window. Progress (the next day
+    to archive) is kept in S3; when the invocation nears its timeout it checkpoints and
+    continues in an async self-invocation. Runs daily from an EventBridge rule.
+
+    Archived sessions whose DynamoDB delete fails are kept in the state as
+    pending_deletes and retried first on the next run; they are already archived, so
+    their day is not revisited.
+    """
+    s3 = boto3.client('s3')
+    cutoff_day = (datetime.now() - timedelta(days=ARCHIVE_AFTER_DAYS)).strftime("%Y-%m-%d")
+    try:
+        state = json.loads(s3.get_object(Bucket=SESSION_ARCHIVE_BUCKET, Key=_archive_state_key())['Body'].read())
+    except s3.exceptions.NoSuchKey:
+        state = {'next_day': _oldest_session_day()}
+
+    pending_deletes = _retry_archived_deletes(s3, state.get('pending_deletes', []))
+
+    def save_state(next_day):
         s3.put_object(
-            Bucket=S3_DOWNLOAD_BUCKET,
-            Key=file_name,
-            Body=temp_file.getvalue()
+            Bucket=SESSION_ARCHIVE_BUCKET,
+            Key=_archive_state_key(),
+            Body=json.dumps({'next_day': next_day, 'pending_deletes': pending_deletes})
         )
-        temp_file.close()
 
-        # Generate presigned URL
-        presigned_url = s3.generate_presigned_url(
-            'get_object',
-            Params={'Bucket': S3_DOWNLOAD_BUCKET, 'Key': file_name},
-            ExpiresIn=3600
-        )
-        print(f"[download_all_sessions_csv] presigned_url: {presigned_url}")
-        
-        return {
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'statusCode': 200,
-            'body': json.dumps({
-                'status': 'completed',
-                'download_url': presigned_url
-            })
-        }
-    except Exception as e:
-        print(f"[download_all_sessions_csv] Exception: {e}")
-        import traceback
-        traceback.print_exc()
-        return {
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'statusCode': 500,
-            'body': json.dumps({'error': f'Failed to download sessions: {str(e)}'})
-        }
+    day = state.get('next_day')
+    if pending_deletes != state.get('pending_deletes', []):
+        save_state(day)
+    while day and day < cutoff_day:
+        members = []
+        members_bytes = 0
+        session_ids = _session_ids_for_day(day)
+        for offset in range(0, len(session_ids), MAX_SESSION_BATCH_SIZE):
+            sessions = _batch_get_sessions(session_ids[offset:offset + MAX_SESSION_BATCH_SIZE])
+            for session_id, session in sessions.items():
+                member = _archive_member(session)
+                members.append((session_id, member))
+                members_bytes += len(member)
+                if members_bytes >= ARCHIVE_PART_BYTES:
+                    pending_deletes.extend(_flush_archive_part(s3, day, members))
+                    members, members_bytes = [], 0
+            if context and context.get_remaining_time_in_millis() < ARCHIVE_CHECKPOINT_MARGIN_MS:
+                # Archived sessions are gone from the index, so this day simply resumes;
+                # pending deletes are still in it but are skipped by the retry instead
+                pending_deletes.extend(_flush_archive_part(s3, day, members))
+                save_state(day)
+                _invoke_self_async({'source': 'async', 'operation': 'archive_sessions'}, context)
+                return {'next_day': day, 'continued': True, 'pending_deletes': len(pending_deletes)}
+        pending_deletes.extend(_flush_archive_part(s3, day, members))
+        day = (datetime.fromisoformat(day) + timedelta(days=1)).strftime("%Y-%m-%d")
+        save_state(day)
+    return {'next_day': day, 'continued': False, 'pending_deletes': len(pending_deletes)}
+
+
+def _archived_number(value):
+    number = Decimal(value)
+    return int(number) if number == number.to_integral_value() else number
+
+
+def _read_archived_session(session_id):
+    """
+    Read an archived session back from S3: (pointer, session, messages, reviews), or
+    (None, None, [], []) if the session was never archived. Only the session's own gzip
+    member is downloaded. Numbers come back as int or Decimal so the items can be written
+    again; DecimalEncoder wrote integers such as message_count as floats.
+    """
+    if not SESSION_ARCHIVE_BUCKET:
+        return None, None, [], []
+    s3 = boto3.client('s3')
+    try:
+        pointer = json.loads(s3.get_object(Bucket=SESSION_ARCHIVE_BUCKET, Key=_archive_pointer_key(session_id))['Body'].read())
+    except s3.exceptions.NoSuchKey:
+        return None, None, [], []
+    member = s3.get_object(
+        Bucket=SESSION_ARCHIVE_BUCKET,
+        Key=pointer['key'],
+        Range=f"bytes={pointer['start']}-{pointer['end']}"
+    )['Body'].read()
+
+    session, messages, reviews = None, [], []
+    for line in gzip.decompress(member).decode('utf-8').splitlines():
+        record = json.loads(line, parse_float=_archived_number)
+        if record['type'] == 'session':
+            session = record['item']
+        elif record['type'] == 'message':
+            messages.append(record['item'])
+        elif record['type'] == 'review':
+            reviews.append(record['item'])
+    return pointer, session, messages, reviews
+
+
+def _rehydrate_archived_session(session_id):
+    """
+    Read-only view of an archived session: (session, messages), or (None, []) if the
+    session was never archived. restore_archived_session makes it writable again.
+    """
+    pointer, session, messages, _ = _read_archived_session(session_id)
+    if session is None:
+        return None, []
+    session['archived'] = True
+    log.info("Rehydrated archived session", session_id=session_id, part_key=pointer['key'])
+    return session, messages
+
+
+def restore_archived_session(session_id, user_id):
+    """
+    Move an archived session back into DynamoDB so it can be continued: its messages,
+    timeline rows and reviews are written first and the session item last, so a session
+    that exists always has its history. The archive pointer is then removed. Restoring a
+    session that is not archived, or was already restored, is a no-op.
+    """
+    try:
+        pointer, session, messages, reviews = _read_archived_session(session_id)
+        if session is None:
+            return _response(200, {'session_id': session_id, 'restored': False})
+        if session.get('user_id') != user_id:
+            return _response(403, 'Forbidden: session belongs to another user')
+
+        with messages_table.batch_writer(overwrite_by_pkeys=['pk_message_id', 'sk_session_id']) as batch:
+            for message in messages:
+                batch.put_item(Item=message)
+        with timeline_table.batch_writer(overwrite_by_pkeys=['pk_session_id', 'sk_message_id']) as batch:
+            for message in messages:
+                batch.put_item(Item=_build_timeline_item(message))
+        with reviews_table.batch_writer() as batch:
+            for review in reviews:
+                batch.put_item(Item=review)
+        try:
+            # The archive run does not revisit past days, so the session stays in DynamoDB
+            sessions_table.put_item(Item=session, ConditionExpression='attribute_not_exists(pk_session_id)')
+        except dynamodb.meta.client.exceptions.ConditionalCheckFailedException:
+            log.info("Archived session already restored", session_id=session_id)
+        boto3.client('s3').delete_object(Bucket=SESSION_ARCHIVE_BUCKET, Key=_archive_pointer_key(session_id))
+        _session_cache_evict(session_id)
+        _search_index_evict(user_id)
+        log.info("Restored archived session", session_id=session_id, messages=len(messages), reviews=len(reviews), part_key=pointer['key'])
+
+        return _response(200, {'session_id': session_id, 'restored': True})
+
+    except ClientError as error:
+        log.error("Error restoring archived session", session_id=session_id, error=str(error))
+        return _response(500, str(error))
+
+
+def _invoke_self_async(payload, context):
+    """Hand work to an async invocation of this function, same pattern as the Drive backfill"""
+    function_name = context.function_name if context else os.environ['AWS_LAMBDA_FUNCTION_NAME']
+    boto3.client('lambda').invoke(
+        FunctionName=function_name,
+        InvocationType='Event',
+        Payload=json.dumps(payload)
+    )
+
+
+def handle_async_operation(event, context):
+    operation = event.get('operation')
+    log.info("Async operation", operation=operation)
+    if operation == 'run_session_export_job':
+        return run_session_export_job(event['job_id'], context)
+    elif operation == 'archive_sessions':
+        return archive_sessions(context)
+    elif operation == 'delete_session':
+        # Raise on failure so Lambda retries the async invocation
+        return _cascade_delete_session(event['session_id'])
+    else:
+        log.error("Invalid async operation", operation=operation)
+
 
+# Operations only admins may call; checked once before dispatch
+ADMIN_OPERATIONS = {
+    'get_sessions_batch',
+    'backfill_session_summaries',
+    'backfill_daily_users',
+    'backfill_message_attributes',
+    'rebuild_latency_rollups',
+    'backfill_session_timeline',
+    'list_reviews_by_reviewer'
+}
+
+
+@log.handler
 def lambda_handler(event, context):
+    # Async self-invocations carry no API Gateway envelope
+    if event.get('source') == 'async':
+        return handle_async_operation(event, context)
+    # Batches from the session write queue
+    if event.get('Records') and event['Records'][0].get('eventSource') == 'aws:sqs':
+        return ingest_queued_messages(event)
+
     isAdmin = False
     try:
         request_context = event["requestContext"]["authorizer"]["jwt"]["claims"]
         if "Admin" in request_context["cognito:groups"]:
             isAdmin = True
     except:
-        print("Could not check for Admin role")
-        print(event)
+        log.warning("Could not check for Admin role")
+        log.debug("Request event", event=event)
 
     data = json.loads(event['body'])
     operation = data.get('operation')
-    print(f"[lambda_handler] operation: {operation}")
-    print(f"[lambda_handler] data: {data}")
+    log.info("Request", operation=operation, session_id=data.get('session_id'))
+    log.debug("Request body", body=data)
+
+    if operation in ADMIN_OPERATIONS and not isAdmin:
+        return _response(403, 'Forbidden: Admin access required')
 
     if operation == 'add_new_session_with_first_message':
         return add_new_session_with_first_message(
@@ -774,31 +3016,79 @@ def lambda_handler(event, context):
     elif operation == 'add_message_to_existing_session':
         return add_message_to_existing_session(
             data['session_id'],
-            data['new_chat_entry']
+            data['new_chat_entry'],
+            data.get('user_id')
+        )
+    elif operation == 'add_messages_to_existing_session':
+        return add_messages_to_existing_session(
+            data['session_id'],
+            data['new_chat_entries'],
+            data.get('user_id')
         )
     elif operation == 'get_session':
-        return get_session(data['session_id'], data['user_id'], isAdmin)
+        return get_session(
+            data['session_id'],
+            data['user_id'],
+            isAdmin,
+            page_size=data.get('page_size'),
+            cursor=data.get('cursor'),
+            last_n_turns=data.get('last_n_turns'),
+            include_archived=data.get('include_archived', True)
+        )
+    elif operation == 'restore_archived_session':
+        return restore_archived_session(data['session_id'], data['user_id'])
+    elif operation == 'get_sessions_batch':
+        return get_sessions_batch(data['session_ids'], isAdmin, data.get('last_n_turns'))
     elif operation == 'update_session':
         return update_session(data['session_id'], data['user_id'], data['new_chat_entry'])
     elif operation == 'list_sessions_by_user_id':
+        # page_size/cursor opt into paged responses; without them the first 15 are returned as a list
+        if 'page_size' in data or 'cursor' in data:
+            return list_sessions_page_by_user_id(data['user_id'], data.get('page_size'), data.get('cursor'))
         return list_sessions_by_user_id(data['user_id'])
+    elif operation == 'search_sessions':
+        return search_sessions(data['user_id'], data.get('query'), data.get('limit'))
     elif operation == 'list_all_sessions_by_user_id':
         return list_sessions_by_user_id(data['user_id'],limit=100)
     elif operation == 'list_all_sessions':
+        # page_size/cursor opt into paged responses
+        if 'page_size' in data or 'cursor' in data:
+            return list_all_sessions_page(
+                data['start_time'], data['end_time'], data['has_feedback'], data['has_review'],
+                data['user_id'], data.get('page_size'), data.get('cursor')
+            )
         return list_all_sessions(data['start_time'], data['end_time'], data['has_feedback'], data['has_review'], data['user_id'])
+    elif operation == 'backfill_session_summaries':
+        return backfill_session_summaries(data.get('cursor'), data.get('limit', 500))
+    elif operation == 'backfill_daily_users':
+        return backfill_daily_users(data.get('cursor'), data.get('limit', 1000))
+    elif operation == 'backfill_message_attributes':
+        return backfill_message_attributes(data.get('cursor'), data.get('limit', 1000))
+    elif operation == 'rebuild_latency_rollups':
+        return rebuild_latency_rollups(data.get('start_date'), data.get('end_date'))
+    elif operation == 'get_messages_after':
+        return get_messages_after(data['session_id'], data.get('after'), data.get('limit', MAX_MESSAGE_PAGE_SIZE))
+    elif operation == 'backfill_session_timeline':
+        return backfill_session_timeline(data.get('cursor'), data.get('limit', 1000))
     elif operation == 'delete_session':
-        return delete_session(data['session_id'], data['user_id'])
+        return delete_session(data['session_id'], data['user_id'], context)
     elif operation == 'assemble_chat_history':
-        return assemble_chat_history(data['session_id'])
+        return assemble_chat_history(data['session_id'], data.get('max_turns'), data.get('max_chars'))
     elif operation == 'update_review_session':
         return update_review_session(data['review_id'], data['session_id'], data['user_id'])
     elif operation == 'delete_review_session':
         return delete_review_session(data['review_id'], data['session_id'], data['user_id'])
+    elif operation == 'list_reviews_by_reviewer':
+        return list_reviews_by_reviewer(
+            data.get('reviewed_by', data['user_id']),
+            data.get('page_size'),
+            data.get('cursor'),
+            data.get('start_time'),
+            data.get('end_time')
+        )
     elif operation == 'download_all_sessions_csv':
-        return download_all_sessions_csv(data.get('start_time'), data.get('end_time'), data.get('job_id'))
+        return download_all_sessions_csv(data.get('start_time'), data.get('end_time'), data.get('job_id'), context)
+    elif operation == 'get_export_status':
+        return get_export_status(data['job_id'])
     else:
-        return {
-            'statusCode': 400,
-            'headers': {'Access-Control-Allow-Origin': '*'},
-            'body': json.dumps(f"Invalid operation: {operation}")
-        }
\ No newline at end of file
+        return _response(400, f"Invalid operation: {operation}")
\ No newline at end of file
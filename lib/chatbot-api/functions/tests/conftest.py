@@ -0,0 +1,118 @@
+"""
+Shared fixtures for the Python handler and layer tests. AWS is mocked with moto; the layers
+are put on sys.path the way Lambda mounts them under /opt/python.
+
+Run from lib/chatbot-api/functions:
+    pip install -r tests/requirements.txt
+    python -m pytest tests
+"""
+
+import importlib.util
+import os
+import sys
+
+import boto3
+import pytest
+from moto import mock_aws
+
+FUNCTIONS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYERS = ['logging-layer', 'daily-users-layer', 'latency-layer', 'csv-export-layer', 'dynamodb-batch-layer']
+for layer in LAYERS:
+    sys.path.insert(0, os.path.join(FUNCTIONS_DIR, layer, 'python'))
+
+REGION = 'us-east-1'
+
+
+def _index(name, partition_key, sort_key=None):
+    key_schema = [{'AttributeName': partition_key, 'KeyType': 'HASH'}]
+    if sort_key:
+        key_schema.append({'AttributeName': sort_key, 'KeyType': 'RANGE'})
+    return {'IndexName': name, 'KeySchema': key_schema, 'Projection': {'ProjectionType': 'ALL'}}
+
+
+# Key schemas and indexes of lib/chatbot-api/tables/tables.ts that the handlers query
+TABLES = {
+    'Sessions': {
+        'keys': [('pk_session_id', 'HASH')],
+        'indexes': [
+            _index('UserSessionsIndex', 'user_id', 'created_at'),
+            _index('CreatedDateIndex', 'created_date', 'created_at')
+        ]
+    },
+    'Messages': {
+        'keys': [('pk_message_id', 'HASH'), ('sk_session_id', 'RANGE')],
+        'indexes': [
+            _index('SessionMessagesIndex', 'sk_session_id', 'created_at'),
+            _index('CreatedDateIndex', 'created_date', 'created_at'),
+            _index('FeedbackDateIndex', 'feedback_date', 'feedback_created_at')
+        ]
+    },
+    'Reviews': {
+        'keys': [('pk_review_id', 'HASH')],
+        'indexes': [
+            _index('SessionReviewIndex', 'session_id'),
+            _index('ReviewerIndex', 'reviewed_by', 'reviewed_at')
+        ]
+    },
+    'Timeline': {'keys': [('pk_session_id', 'HASH'), ('sk_message_id', 'RANGE')], 'indexes': []},
+    'DailyUsers': {'keys': [('pk_date', 'HASH')], 'indexes': []},
+    'ResponseTimes': {'keys': [('pk_date', 'HASH'), ('sk_hour', 'RANGE')], 'indexes': []}
+}
+
+
+def _create_table(client, name, keys, indexes):
+    attributes = {attribute for attribute, _ in keys}
+    for index in indexes:
+        attributes.update(key['AttributeName'] for key in index['KeySchema'])
+    options = {'GlobalSecondaryIndexes': indexes} if indexes else {}
+    client.create_table(
+        TableName=name,
+        BillingMode='PAY_PER_REQUEST',
+        KeySchema=[{'AttributeName': attribute, 'KeyType': key_type} for attribute, key_type in keys],
+        AttributeDefinitions=[{'AttributeName': attribute, 'AttributeType': 'S'} for attribute in sorted(attributes)],
+        **options
+    )
+
+
+@pytest.fixture
+def aws(monkeypatch):
+    monkeypatch.setenv('AWS_DEFAULT_REGION', REGION)
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with mock_aws():
+        yield
+
+
+@pytest.fixture
+def tables(aws, monkeypatch):
+    client = boto3.client('dynamodb', region_name=REGION)
+    for name, schema in TABLES.items():
+        _create_table(client, name, schema['keys'], schema['indexes'])
+    secret_arn = boto3.client('secretsmanager', region_name=REGION).create_secret(
+        Name='cursor-signing-key', SecretString='test-signing-key'
+    )['ARN']
+    for variable, value in {
+        'SESSION_TABLE': 'Sessions',
+        'SESSIONS_TABLE': 'Sessions',
+        'MESSAGES_TABLE': 'Messages',
+        'REVIEW_TABLE': 'Reviews',
+        'TIMELINE_TABLE': 'Timeline',
+        'DAILY_USERS_TABLE': 'DailyUsers',
+        'RESPONSE_TIME_ROLLUP_TABLE': 'ResponseTimes',
+        'CURSOR_SECRET_ARN': secret_arn
+    }.items():
+        monkeypatch.setenv(variable, value)
+    return boto3.resource('dynamodb', region_name=REGION)
+
+
+def load_handler(directory, name):
+    """Import a handler's lambda_function.py as a fresh module, like a cold container"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(FUNCTIONS_DIR, directory, 'lambda_function.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def session_handler(tables):
+    return load_handler('session-handler', 'session_handler')
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+
+def _get_session_page(handler, session_id, cursor=None):
+    response = handler.lambda_handler({'body': json.dumps({
+        'operation': 'get_session',
+        'session_id': session_id,
+        'user_id': 'user-1',
+        'page_size': 2,
+        'cursor': cursor
+    })}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+def _create_session(handler, session_id, turns):
+    handler.add_new_session_with_first_message(
+        session_id, 'user-1', 'Title', {'user_prompt': "prompt 0", 'bot_response': "response"}
+    )
+    for number in range(1, turns):
+        handler.add_message_to_existing_session(
+            session_id, {'user_prompt': f"prompt {number}", 'bot_response': "response"}, 'user-1'
+        )
+
+
+def test_signed_cursor_round_trip(session_handler):
+    key = {'pk_session_id': 'session-1', 'created_at': '2024-05-01T10:00:00'}
+    cursor = session_handler._sign_cursor(key, 'scope-a')
+    assert session_handler._verify_cursor(cursor, 'scope-a') == key
+
+
+def test_empty_cursor_means_first_page(session_handler):
+    assert session_handler._sign_cursor(None, 'scope-a') is None
+    assert session_handler._verify_cursor(None, 'scope-a') is None
+    assert session_handler._verify_cursor('', 'scope-a') is None
+
+
+@pytest.mark.parametrize('tamper', [
+    lambda cursor: cursor[:-1] + ('A' if cursor[-1] != 'A' else 'B'),
+    lambda cursor: 'x' + cursor,
+    lambda cursor: cursor.rpartition('.')[0],
+    lambda cursor: cursor + 'é',
+    lambda cursor: 42
+])
+def test_tampered_cursor_is_rejected(session_handler, tamper):
+    cursor = session_handler._sign_cursor({'pk_session_id': 'session-1'}, 'scope-a')
+    with pytest.raises(ValueError):
+        session_handler._verify_cursor(tamper(cursor), 'scope-a')
+
+
+def test_cursor_is_rejected_outside_its_scope(session_handler):
+    cursor = session_handler._sign_cursor({'pk_session_id': 'session-1'}, 'scope-a')
+    with pytest.raises(ValueError):
+        session_handler._verify_cursor(cursor, 'scope-b')
+
+
+def test_message_pages_follow_the_cursor(session_handler):
+    _create_session(session_handler, 'session-1', 5)
+    prompts = []
+    status, body = _get_session_page(session_handler, 'session-1')
+    while True:
+        assert status == 200
+        prompts.extend(turn['user'] for turn in body['chat_history'])
+        if not body['next_cursor']:
+            break
+        status, body = _get_session_page(session_handler, 'session-1', body['next_cursor'])
+    assert prompts == [f"prompt {number}" for number in range(5)]
+
+
+def test_message_page_cursor_is_scoped_to_its_session(session_handler):
+    _create_session(session_handler, 'session-1', 3)
+    _create_session(session_handler, 'session-2', 3)
+    _, body = _get_session_page(session_handler, 'session-1')
+
+    status, _ = _get_session_page(session_handler, 'session-2', body['next_cursor'])
+    assert status == 400
+
+
+def test_forged_cursor_is_a_bad_request(session_handler):
+    _create_session(session_handler, 'session-1', 3)
+    forged = session_handler._encode_cursor({'pk_message_id': 'x', 'sk_session_id': 'session-1', 'created_at': 'z'})
+
+    status, _ = _get_session_page(session_handler, 'session-1', forged + '.c2lnbmF0dXJl')
+    assert status == 400
@@ -0,0 +1,66 @@
+import boto3
+import pytest
+
+from daily_users import EXACT_USERS_MAX, HyperLogLog, distinct_users, load_days, record_users
+
+
+@pytest.fixture
+def rollup_table(tables):
+    return tables.Table('DailyUsers')
+
+
+def _load(day):
+    return load_days(boto3.resource('dynamodb'), 'DailyUsers', [day])[day]
+
+
+def test_day_stays_an_exact_set_up_to_the_limit(rollup_table):
+    record_users(rollup_table, '2024-05-01', [f"user-{number}" for number in range(EXACT_USERS_MAX)])
+    record_users(rollup_table, '2024-05-01', ['user-0', 'user-1'])
+
+    item = _load('2024-05-01')
+    assert 'sketch' not in item
+    assert len(item['users']) == EXACT_USERS_MAX
+    assert distinct_users([item]) == EXACT_USERS_MAX
+
+
+def test_day_is_promoted_to_a_sketch_past_the_limit(rollup_table):
+    record_users(rollup_table, '2024-05-01', [f"user-{number}" for number in range(EXACT_USERS_MAX + 1)])
+
+    item = _load('2024-05-01')
+    assert 'users' not in item
+    assert 'sketch' in item
+    assert distinct_users([item]) == pytest.approx(EXACT_USERS_MAX + 1, rel=0.05)
+
+
+def test_sketch_keeps_counting_after_promotion(rollup_table):
+    for offset in range(0, 2000, 250):
+        record_users(rollup_table, '2024-05-01', [f"user-{number}" for number in range(offset, offset + 250)])
+    record_users(rollup_table, '2024-05-01', ['user-0', 'user-1999'])
+
+    assert distinct_users([_load('2024-05-01')]) == pytest.approx(2000, rel=0.05)
+
+
+def test_exact_and_sketch_days_merge_without_double_counting(rollup_table):
+    record_users(rollup_table, '2024-05-01', [f"user-{number}" for number in range(500)])
+    record_users(rollup_table, '2024-05-02', [f"user-{number}" for number in range(450, 510)])
+    record_users(rollup_table, '2024-05-03', ['user-0', 'user-new'])
+
+    items = load_days(boto3.resource('dynamodb'), 'DailyUsers', ['2024-05-01', '2024-05-02', '2024-05-03', '2024-05-04'])
+    assert set(items) == {'2024-05-01', '2024-05-02', '2024-05-03'}
+    assert distinct_users(items.values()) == pytest.approx(511, rel=0.05)
+
+
+def test_exact_days_merge_exactly(rollup_table):
+    record_users(rollup_table, '2024-05-01', ['a', 'b', 'c'])
+    record_users(rollup_table, '2024-05-02', ['b', 'c', 'd'])
+
+    items = load_days(boto3.resource('dynamodb'), 'DailyUsers', ['2024-05-01', '2024-05-02'])
+    assert distinct_users(items.values()) == 4
+
+
+def test_hyperloglog_estimate_is_within_its_error():
+    sketch = HyperLogLog()
+    for number in range(50000):
+        sketch.add(f"user-{number}")
+    assert sketch.count() == pytest.approx(50000, rel=0.05)
+    assert HyperLogLog.from_bytes(sketch.to_bytes()).count() == sketch.count()
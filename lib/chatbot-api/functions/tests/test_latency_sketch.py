@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from latency_sketch import RELATIVE_ACCURACY, LatencySketch, rollup_update
+
+
+def _exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.mark.parametrize('distribution', [
+    lambda rng: rng.lognormvariate(0.5, 0.8),
+    lambda rng: rng.uniform(0.2, 30),
+    lambda rng: rng.expovariate(0.5) + 0.05
+])
+def test_quantiles_are_within_the_relative_accuracy(distribution):
+    rng = random.Random(7)
+    values = [distribution(rng) for _ in range(20000)]
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.01, 0.25, 0.5, 0.9, 0.99, 1.0):
+        exact = _exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= RELATIVE_ACCURACY * exact
+
+
+def test_merged_hours_match_one_sketch_of_all_values():
+    rng = random.Random(11)
+    hours = [[rng.lognormvariate(0, 1) for _ in range(500)] for _ in range(24)]
+    merged = LatencySketch()
+    whole = LatencySketch()
+    for values in hours:
+        hour = LatencySketch()
+        for value in values:
+            hour.add(value)
+            whole.add(value)
+        merged.merge(hour)
+
+    assert merged.count == whole.count == 24 * 500
+    for q in (0.5, 0.9, 0.99):
+        assert merged.quantile(q) == whole.quantile(q)
+
+
+def test_rollup_item_round_trip():
+    values = [0.0005, 0.4, 1.8, 2.4, 2.4, 45.0]
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+
+    restored = LatencySketch.from_item(sketch.item_attributes())
+    assert restored.buckets == sketch.buckets
+    assert restored.summary() == sketch.summary()
+
+
+def test_rollup_update_adds_one_per_bucket():
+    update = rollup_update([1.0, 1.0, 3.0])
+    assert update['ExpressionAttributeValues'][':count'] == 3
+    bucket_counts = [
+        value for name, value in update['ExpressionAttributeValues'].items() if name not in (':count', ':sum')
+    ]
+    assert sorted(bucket_counts) == [1, 2]
+
+
+def test_empty_sketch_has_no_quantiles():
+    assert LatencySketch().summary() == {'count': 0, 'mean': None, 'p50': None, 'p90': None, 'p99': None}
@@ -0,0 +1,82 @@
+import boto3
+import pytest
+
+import s3_csv_export
+from s3_csv_export import MIN_PART_SIZE, copy_with_appended
+
+BUCKET = 'exports'
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def s3(aws):
+    client = boto3.client('s3')
+    client.create_bucket(Bucket=BUCKET)
+    return client
+
+
+@pytest.fixture
+def copied_ranges(s3, monkeypatch):
+    """CopySourceRange of every UploadPartCopy call, in part order"""
+    ranges = []
+    upload_part_copy = s3.upload_part_copy
+
+    def record(**kwargs):
+        ranges.append(kwargs['CopySourceRange'])
+        return upload_part_copy(**kwargs)
+    monkeypatch.setattr(s3, 'upload_part_copy', record)
+    return ranges
+
+
+def _body(size):
+    line = b"session,user,prompt,response\n"
+    return (line * (size // len(line) + 1))[:size]
+
+
+def _read(s3, key):
+    return s3.get_object(Bucket=BUCKET, Key=key)['Body'].read()
+
+
+def test_small_object_is_rewritten_in_one_put(s3, copied_ranges):
+    s3.put_object(Bucket=BUCKET, Key='source.csv', Body=b"header\nrow 1\n")
+
+    etag = copy_with_appended(s3, BUCKET, 'source.csv', 'refreshed.csv', b"row 2\n")
+    assert _read(s3, 'refreshed.csv') == b"header\nrow 1\nrow 2\n"
+    assert etag == s3.head_object(Bucket=BUCKET, Key='refreshed.csv')['ETag']
+    assert copied_ranges == []
+
+
+def test_large_object_is_copied_server_side_in_one_part(s3, copied_ranges):
+    existing = _body(MIN_PART_SIZE + 123)
+    s3.put_object(Bucket=BUCKET, Key='source.csv', Body=existing)
+
+    copy_with_appended(s3, BUCKET, 'source.csv', 'refreshed.csv', b"new row\n")
+    assert _read(s3, 'refreshed.csv') == existing + b"new row\n"
+    assert copied_ranges == [f"bytes=0-{len(existing) - 1}"]
+
+
+def test_object_over_the_copy_part_size_is_split_into_even_parts(s3, copied_ranges, monkeypatch):
+    monkeypatch.setattr(s3_csv_export, 'MAX_COPY_PART_SIZE', 6 * MB)
+    existing = _body(17 * MB + 5)
+    s3.put_object(Bucket=BUCKET, Key='source.csv', Body=existing)
+
+    etag = copy_with_appended(s3, BUCKET, 'source.csv', 'refreshed.csv', b"new row\n")
+    assert _read(s3, 'refreshed.csv') == existing + b"new row\n"
+    assert etag.strip('"').endswith('-4')
+
+    bounds = [tuple(int(byte) for byte in byte_range[len('bytes='):].split('-')) for byte_range in copied_ranges]
+    assert len(bounds) == 3
+    assert bounds[0][0] == 0 and bounds[-1][1] == len(existing) - 1
+    assert all(first == previous_last + 1 for (_, previous_last), (first, _) in zip(bounds, bounds[1:]))
+    sizes = [last - first + 1 for first, last in bounds]
+    assert max(sizes) <= 6 * MB
+    assert min(sizes) >= MIN_PART_SIZE
+    assert max(sizes) - min(sizes) < len(sizes)
+
+
+def test_source_object_is_left_unchanged(s3):
+    existing = _body(MIN_PART_SIZE + 1)
+    s3.put_object(Bucket=BUCKET, Key='source.csv', Body=existing)
+
+    copy_with_appended(s3, BUCKET, 'source.csv', 'refreshed.csv', b"new row\n")
+    assert _read(s3, 'source.csv') == existing
@@ -0,0 +1,114 @@
+import json
+
+from conftest import load_handler
+
+
+def _entry(number):
+    return {'user_prompt': f"prompt {number}", 'bot_response': f"response {number}", 'sources': []}
+
+
+def _create_session(handler, session_id, turns):
+    handler.add_new_session_with_first_message(session_id, 'user-1', 'Title', _entry(0))
+    for number in range(1, turns):
+        handler.add_message_to_existing_session(session_id, _entry(number), 'user-1')
+
+
+def _history(handler, session_id, **options):
+    body = json.loads(handler.get_session(session_id, 'user-1', False, **options)['body'])
+    return [turn['user'] for turn in body.get('chat_history', [])]
+
+
+def _snapshot_row(handler, session_id):
+    return handler.timeline_table.get_item(
+        Key={'pk_session_id': session_id, 'sk_message_id': handler.SNAPSHOT_SORT_KEY}
+    )['Item']
+
+
+def _fail_index_reads(handler, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("history should not be read from SessionMessagesIndex")
+    monkeypatch.setattr(handler, '_query_session_messages', fail)
+
+
+def test_warm_read_is_served_from_the_cache(session_handler, monkeypatch):
+    _create_session(session_handler, 'session-1', 3)
+    assert _history(session_handler, 'session-1') == ['prompt 0', 'prompt 1', 'prompt 2']
+
+    _fail_index_reads(session_handler, monkeypatch)
+    hits = session_handler._session_cache_stats['hits']
+    assert _history(session_handler, 'session-1') == ['prompt 0', 'prompt 1', 'prompt 2']
+    assert session_handler._session_cache_stats['hits'] == hits + 1
+
+
+def test_own_appends_advance_the_cached_entry(session_handler):
+    _create_session(session_handler, 'session-1', 2)
+    _history(session_handler, 'session-1')
+
+    session_handler.add_message_to_existing_session('session-1', _entry(2), 'user-1')
+    entry = session_handler._session_cache['session-1']
+    session = session_handler.sessions_table.get_item(Key={'pk_session_id': 'session-1'})['Item']
+    assert entry['message_count'] == session['message_count'] == len(entry['messages']) == 3
+    assert _history(session_handler, 'session-1') == ['prompt 0', 'prompt 1', 'prompt 2']
+
+
+def test_appends_from_another_container_are_read_from_the_timeline(session_handler, monkeypatch):
+    _create_session(session_handler, 'session-1', 2)
+    _history(session_handler, 'session-1')
+
+    other_container = load_handler('session-handler', 'other_session_handler')
+    other_container.add_message_to_existing_session('session-1', _entry(2), 'user-1')
+    other_container.add_message_to_existing_session('session-1', _entry(3), 'user-1')
+
+    _fail_index_reads(session_handler, monkeypatch)
+    assert _history(session_handler, 'session-1') == ['prompt 0', 'prompt 1', 'prompt 2', 'prompt 3']
+    assert session_handler._session_cache['session-1']['message_count'] == 4
+
+
+def test_deleted_session_is_not_served_from_the_cache(session_handler):
+    _create_session(session_handler, 'session-1', 2)
+    _history(session_handler, 'session-1')
+
+    load_handler('session-handler', 'other_session_handler').delete_session('session-1', 'user-1')
+    assert _history(session_handler, 'session-1') == []
+    assert 'session-1' not in session_handler._session_cache
+
+
+def test_cache_is_bounded_by_entries(session_handler, monkeypatch):
+    monkeypatch.setattr(session_handler, 'SESSION_CACHE_MAX_ENTRIES', 2)
+    for number in range(3):
+        _create_session(session_handler, f"session-{number}", 1)
+        _history(session_handler, f"session-{number}")
+    assert list(session_handler._session_cache) == ['session-1', 'session-2']
+
+
+def test_new_session_snapshot_matches_message_count(session_handler):
+    _create_session(session_handler, 'session-1', 1)
+    snapshot = _snapshot_row(session_handler, 'session-1')
+    assert snapshot['snapshot_message_count'] == 1
+    assert snapshot['snapshot_complete'] is True
+
+
+def test_stale_snapshot_is_advanced_to_the_session_message_count(session_handler):
+    _create_session(session_handler, 'session-1', 4)
+    assert _snapshot_row(session_handler, 'session-1')['snapshot_message_count'] == 1
+
+    assert _history(session_handler, 'session-1', last_n_turns=2) == ['prompt 2', 'prompt 3']
+    snapshot = _snapshot_row(session_handler, 'session-1')
+    session = session_handler.sessions_table.get_item(Key={'pk_session_id': 'session-1'})['Item']
+    assert snapshot['snapshot_message_count'] == session['message_count'] == 4
+    assert [turn['user_prompt'] for turn in session_handler._decode_snapshot(snapshot)] == [
+        'prompt 0', 'prompt 1', 'prompt 2', 'prompt 3'
+    ]
+
+
+def test_trimmed_snapshot_is_incomplete_and_longer_reads_fall_back(session_handler, monkeypatch):
+    monkeypatch.setattr(session_handler, 'SNAPSHOT_MAX_TURNS', 2)
+    _create_session(session_handler, 'session-1', 4)
+
+    assert _history(session_handler, 'session-1', last_n_turns=1) == ['prompt 3']
+    snapshot = _snapshot_row(session_handler, 'session-1')
+    assert snapshot['snapshot_message_count'] == 4
+    assert snapshot['snapshot_complete'] is False
+    assert len(session_handler._decode_snapshot(snapshot)) == 2
+
+    assert _history(session_handler, 'session-1', last_n_turns=3) == ['prompt 1', 'prompt 2', 'prompt 3']
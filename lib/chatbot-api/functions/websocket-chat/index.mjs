@@ -1,6 +1,8 @@
 import { ApiGatewayManagementApiClient, PostToConnectionCommand, DeleteConnectionCommand } from '@aws-sdk/client-apigatewaymanagementapi';
 import { BedrockAgentRuntimeClient, RetrieveCommand as KBRetrieveCommand } from "@aws-sdk/client-bedrock-agent-runtime";
 import { LambdaClient, InvokeCommand } from "@aws-sdk/client-lambda";
+import { SQSClient, SendMessageCommand } from "@aws-sdk/client-sqs";
+import { randomBytes } from "crypto";
 import ClaudeModel from "./models/claude3Sonnet.mjs";
 import Mistral7BModel from "./models/mistral7b.mjs"
 import { GetObjectCommand, S3Client } from '@aws-sdk/client-s3'
@@ -12,8 +14,36 @@ const s3Client = new S3Client({});
 const ENDPOINT = process.env.WEBSOCKET_API_ENDPOINT;
 const promptDataBucketName = process.env.PROMPT_DATA_BUCKET_NAME
 const wsConnectionClient = new ApiGatewayManagementApiClient({ endpoint: ENDPOINT });
+const sqsClient = new SQSClient({});
+const SESSION_WRITE_QUEUE_URL = process.env.SESSION_WRITE_QUEUE_URL;
 let admin = false;
 
+/* Time-ordered message ID in the same MESSAGE-<ULID> format the session handler generates */
+const CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ";
+function generateMessageId() {
+  let value = (BigInt(Date.now()) << 80n) | BigInt('0x' + randomBytes(10).toString('hex'));
+  let ulid = '';
+  for (let i = 0; i < 26; i++) {
+    ulid = CROCKFORD_BASE32[Number(value & 31n)] + ulid;
+    value >>= 5n;
+  }
+  return `MESSAGE-${ulid}`;
+}
+
+/* Hands a finished turn to the session write queue instead of waiting for it to be
+persisted. The queue is FIFO per session and de-duplicates on the message ID, which is
+generated here so it can be sent to the client straight away. */
+async function queueChatEntry(record) {
+  const messageId = generateMessageId();
+  await sqsClient.send(new SendMessageCommand({
+    QueueUrl: SESSION_WRITE_QUEUE_URL,
+    MessageBody: JSON.stringify({ ...record, message_id: messageId, created_at: new Date().toISOString() }),
+    MessageGroupId: record.session_id,
+    MessageDeduplicationId: messageId,
+  }));
+  return messageId;
+}
+
 /* This function takes a model stream from Bedrock and parses and sends each chunk
 to the client. */
 async function processBedrockStream(id, modelStream, model) {
@@ -205,11 +235,16 @@ const getUserResponse = async (id, requestJSON) => {
       const enhancedUserPrompt = await getPromptWithHistoricalContext(userMessage, chatHistory);
 
       // Get session data
+      // Only the session item is needed to tell a new session from an existing one,
+      // the chat history itself comes from the client, so skip reading messages.
+      // A first turn has no history and cannot continue an archived session.
       const sessionRequest = {
           body: JSON.stringify({
               "operation": "get_session",
               "session_id": sessionId,
-              "user_id": userId
+              "user_id": userId,
+              "last_n_turns": 0,
+              "include_archived": chatHistory.length > 0
           })
       };
       const client = new LambdaClient({});
@@ -257,7 +292,28 @@ const getUserResponse = async (id, requestJSON) => {
           response_time: responseTimeSeconds // Track response time for KPI
       };
 
-      if (!sessionData.pk_session_id) {
+      // Continuing an archived session moves it back into DynamoDB first, so the new
+      // turn is appended to its full history
+      if (sessionData.archived) {
+        const restoreCommand = new InvokeCommand({
+            FunctionName: process.env.SESSION_HANDLER,
+            Payload: JSON.stringify({ body: JSON.stringify({
+              "operation": "restore_archived_session",
+              "session_id": sessionId,
+              "user_id": userId
+            }) }),
+        });
+        const { Payload } = await client.send(restoreCommand);
+        const restoreResult = JSON.parse(Buffer.from(Payload).toString());
+        if (restoreResult.statusCode !== 200) {
+          throw new Error(`Could not restore archived session: ${restoreResult.body}`);
+        }
+      }
+
+      // With queued writes the first turn's session may not be persisted yet when the
+      // next turn arrives, so a turn that carries history always continues the session
+      const isNewSession = !sessionData.pk_session_id && chatHistory.length === 0;
+      if (isNewSession) {
         // Generate the session title
         const titleModel = new Mistral7BModel();
         const CONTEXT_COMPLETION_INSTRUCTIONS = `
@@ -271,24 +327,27 @@ const getUserResponse = async (id, requestJSON) => {
         title = title.replaceAll('"', '').trim();
 
         // Add new session
-        const addSessionRequest = {
-            body: JSON.stringify({
-                "operation": "add_new_session_with_first_message",
-                "session_id": sessionId,
-                "user_id": userId,
-                "title": title,
-                "new_chat_entry": newChatEntry
-            })
+        const addSessionEntry = {
+            "operation": "add_new_session_with_first_message",
+            "session_id": sessionId,
+            "user_id": userId,
+            "title": title,
+            "new_chat_entry": newChatEntry
         };
 
-        const addCommand = new InvokeCommand({
-            FunctionName: process.env.SESSION_HANDLER,
-            Payload: JSON.stringify(addSessionRequest),
-        });
-        const { Payload } = await client.send(addCommand);
-        const PayloadString = Buffer.from(Payload).toString();
-        let MessageId = JSON.parse(PayloadString).body;
-        MessageId = JSON.parse(MessageId).message_id;
+        let MessageId;
+        if (SESSION_WRITE_QUEUE_URL) {
+          MessageId = await queueChatEntry(addSessionEntry);
+        } else {
+          const addCommand = new InvokeCommand({
+              FunctionName: process.env.SESSION_HANDLER,
+              Payload: JSON.stringify({ body: JSON.stringify(addSessionEntry) }),
+          });
+          const { Payload } = await client.send(addCommand);
+          const PayloadString = Buffer.from(Payload).toString();
+          MessageId = JSON.parse(PayloadString).body;
+          MessageId = JSON.parse(MessageId).message_id;
+        }
         console.log("Message metadata (existing session):");
         console.log(MessageId);
 
@@ -307,22 +366,26 @@ const getUserResponse = async (id, requestJSON) => {
         }
       } else {
         // Add message to existing session
-        const addMessageRequest = {
-            body: JSON.stringify({
-                "operation": "add_message_to_existing_session",
-                "session_id": sessionId,
-                "new_chat_entry": newChatEntry
-            })
+        const addMessageEntry = {
+            "operation": "add_message_to_existing_session",
+            "session_id": sessionId,
+            "user_id": userId,
+            "new_chat_entry": newChatEntry
         };
 
-        const addCommand = new InvokeCommand({
-            FunctionName: process.env.SESSION_HANDLER,
-            Payload: JSON.stringify(addMessageRequest),
-        });
-        const { Payload } = await client.send(addCommand);
-        const PayloadString = Buffer.from(Payload).toString();
-        let MessageId = JSON.parse(PayloadString).body;
-        MessageId = JSON.parse(MessageId).message_id;
+        let MessageId;
+        if (SESSION_WRITE_QUEUE_URL) {
+          MessageId = await queueChatEntry(addMessageEntry);
+        } else {
+          const addCommand = new InvokeCommand({
+              FunctionName: process.env.SESSION_HANDLER,
+              Payload: JSON.stringify({ body: JSON.stringify(addMessageEntry) }),
+          });
+          const { Payload } = await client.send(addCommand);
+          const PayloadString = Buffer.from(Payload).toString();
+          MessageId = JSON.parse(PayloadString).body;
+          MessageId = JSON.parse(MessageId).message_id;
+        }
         console.log("Message metadata (existing session):");
         console.log(MessageId);
 
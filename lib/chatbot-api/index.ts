@@ -45,7 +45,11 @@ export class ChatBotApi extends Construct {
         sessionsTable: tables.sessionsTable,
         messagesTable: tables.messagesTable,
         reviewsTable: tables.reviewsTable,
+        timelineTable: tables.timelineTable,
+        dailyUsersTable: tables.dailyUsersTable,
+        responseTimeRollupTable: tables.responseTimeRollupTable,
         downloadBucket: buckets.downloadBucket,
+        sessionArchiveBucket: buckets.sessionArchiveBucket,
         knowledgeBucket: buckets.knowledgeBucket,
         driveSyncBucket: buckets.driveSyncBucket,
         knowledgeBase: knowledgeBase.knowledgeBase,
@@ -211,7 +215,15 @@ export class ChatBotApi extends Construct {
       authorizer: props.httpAuthorizer,
     });
 
-    // Daily users route (computed on-demand from sessions)
+    // Response-time percentiles merged from the hourly latency rollups
+    restBackend.restAPI.addRoutes({
+      path: "/chatbot-use/latency",
+      methods: [apigwv2.HttpMethod.GET],
+      integration: kpiAPIIntegration,
+      authorizer: props.httpAuthorizer,
+    });
+
+    // Daily users route (read from the per-day user rollups)
     restBackend.restAPI.addRoutes({
       path: "/daily-logins",
       methods: [apigwv2.HttpMethod.GET],
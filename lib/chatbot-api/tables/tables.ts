@@ -11,6 +11,9 @@ export class TableStack extends Stack {
   public readonly sessionsTable: Table;
   public readonly messagesTable: Table;
   public readonly reviewsTable: Table;
+  public readonly timelineTable: Table;
+  public readonly dailyUsersTable: Table;
+  public readonly responseTimeRollupTable: Table;
   public readonly evalResultsTable : Table;
   public readonly evalSummaryTable : Table;
   
@@ -31,6 +34,16 @@ export class TableStack extends Stack {
       projectionType: ProjectionType.ALL,
     });
 
+    // Date-bucketed GSI so admin views can Query a created_at range one day at a time
+    // instead of scanning the table. Only the fields the admin list renders are projected.
+    sessionsTable.addGlobalSecondaryIndex({
+      indexName: 'CreatedDateIndex',
+      partitionKey: { name: 'created_date', type: AttributeType.STRING },
+      sortKey: { name: 'created_at', type: AttributeType.STRING },
+      projectionType: ProjectionType.INCLUDE,
+      nonKeyAttributes: ['user_id', 'title', 'updated_at', 'message_count', 'has_feedback', 'feedback_count', 'has_review', 'review_id', 'reviewed_by'],
+    });
+
     // // Optional GSI on title for filtering sessions by title
     // sessionsTable.addGlobalSecondaryIndex({
     //   indexName: 'TitleIndex',
@@ -53,6 +66,27 @@ export class TableStack extends Stack {
       projectionType: ProjectionType.ALL,
     });
 
+    // Date-bucketed GSI so the KPI views Query a created_at range one day at a time instead of
+    // scanning the table. Only the fields of an interaction row are projected.
+    messagesTable.addGlobalSecondaryIndex({
+      indexName: 'CreatedDateIndex',
+      partitionKey: { name: 'created_date', type: AttributeType.STRING },
+      sortKey: { name: 'created_at', type: AttributeType.STRING },
+      projectionType: ProjectionType.INCLUDE,
+      nonKeyAttributes: ['user_id', 'user_prompt', 'bot_response', 'response_time'],
+    });
+
+    // Sparse date-bucketed GSI over the messages that carry feedback, so a cached feedback
+    // download is topped up by querying the days since its high-water mark instead of a scan.
+    // Only the fields of a feedback row are projected.
+    messagesTable.addGlobalSecondaryIndex({
+      indexName: 'FeedbackDateIndex',
+      partitionKey: { name: 'feedback_date', type: AttributeType.STRING },
+      sortKey: { name: 'feedback_created_at', type: AttributeType.STRING },
+      projectionType: ProjectionType.INCLUDE,
+      nonKeyAttributes: ['user_prompt', 'bot_response', 'feedback_message', 'feedback_category', 'feedback_type', 'feedback_rank'],
+    });
+
     // // Optional GSI for filtering messages based on feedback attributes (e.g., feedback_type)
     // messagesTable.addGlobalSecondaryIndex({
     //   indexName: 'FeedbackTypeIndex',
@@ -62,6 +96,15 @@ export class TableStack extends Stack {
 
     this.messagesTable = messagesTable;
 
+    // Messages keyed by session and time-ordered (ULID) message ID. Base-table Queries can be
+    // strongly consistent, which SessionMessagesIndex cannot, so "messages after X" reads go here.
+    const timelineTable = new Table(this, 'ChatSessionTimelineTable', {
+      tableName: process.env.CDK_STACK_NAME + "ChatSessionTimelineTable",
+      partitionKey: { name: 'pk_session_id', type: AttributeType.STRING },
+      sortKey: { name: 'sk_message_id', type: AttributeType.STRING },
+    });
+    this.timelineTable = timelineTable;
+
     // Define the Reviews Table
     const reviewsTable = new Table(this, 'ChatReviewsTable', {
       tableName: process.env.CDK_STACK_NAME + "ChatReviewsTable",
@@ -75,15 +118,33 @@ export class TableStack extends Stack {
       projectionType: ProjectionType.ALL,
     });
 
-    // // Optional GSI for filtering reviews by archival status and reviewer
-    // reviewsTable.addGlobalSecondaryIndex({
-    //   indexName: 'ReviewerIndex',
-    //   partitionKey: { name: 'reviewed_by', type: AttributeType.STRING },
-    //   projectionType: ProjectionType.ALL,
-    // });
+    // GSI to page through one admin's reviews, newest first
+    reviewsTable.addGlobalSecondaryIndex({
+      indexName: 'ReviewerIndex',
+      partitionKey: { name: 'reviewed_by', type: AttributeType.STRING },
+      sortKey: { name: 'reviewed_at', type: AttributeType.STRING },
+      projectionType: ProjectionType.ALL,
+    });
 
     this.reviewsTable = reviewsTable;
 
+    // One item per day holding the distinct users who created sessions that day, as an exact
+    // set or a HyperLogLog sketch, so the daily-users chart reads days instead of scanning sessions
+    const dailyUsersTable = new Table(this, 'DailyUsersRollupTable', {
+      tableName: process.env.CDK_STACK_NAME + "DailyUsersRollupTable",
+      partitionKey: { name: 'pk_date', type: AttributeType.STRING },
+    });
+    this.dailyUsersTable = dailyUsersTable;
+
+    // One item per hour (pk_date, sk_hour) holding a DDSketch of that hour's response times,
+    // so latency percentiles merge hour and day summaries instead of reading every message
+    const responseTimeRollupTable = new Table(this, 'ResponseTimeRollupTable', {
+      tableName: process.env.CDK_STACK_NAME + "ResponseTimeRollupTable",
+      partitionKey: { name: 'pk_date', type: AttributeType.STRING },
+      sortKey: { name: 'sk_hour', type: AttributeType.STRING },
+    });
+    this.responseTimeRollupTable = responseTimeRollupTable;
+
     const evalSummariesTable = new Table(scope, 'EvaluationSummariesTable', {
       partitionKey: { name: 'PartitionKey', type: AttributeType.STRING },
       sortKey: { name: 'Timestamp', type: AttributeType.STRING },
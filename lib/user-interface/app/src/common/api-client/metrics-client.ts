@@ -36,15 +36,16 @@ export class MetricClient {
   }
 
   /**
-   * Get daily login counts within a date range.
-   * Returns data formatted for BarChart.
+   * Get distinct user counts within a date range, per day by default or per
+   * week / month with granularity. Returns data formatted for BarChart.
    */
-  async getDailyLogins(startDate?: string, endDate?: string) {
+  async getDailyLogins(startDate?: string, endDate?: string, granularity?: "day" | "week" | "month") {
     try {
       const auth = await Utils.authenticate();
       const params = new URLSearchParams();
       if (startDate) params.append("startDate", startDate);
       if (endDate) params.append("endDate", endDate);
+      if (granularity) params.append("granularity", granularity);
 
       const url = `${this.API}/daily-logins?${params.toString()}`;
 
@@ -69,6 +70,34 @@ export class MetricClient {
     }
   }
 
+  /**
+   * Get response-time percentiles (p50/p90/p99) and histograms per day, or per hour.
+   */
+  async getLatency(startDate: string, endDate: string, granularity?: "day" | "hour") {
+    try {
+      const auth = await Utils.authenticate();
+      const params = new URLSearchParams({ startDate, endDate });
+      if (granularity) params.append("granularity", granularity);
+
+      const response = await fetch(`${this.API}/chatbot-use/latency?${params.toString()}`, {
+        method: 'GET',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': auth,
+        },
+      });
+
+      if (!response.ok) {
+        throw new Error(`Failed to fetch latency: ${response.statusText}`);
+      }
+
+      return await response.json();
+    } catch (e) {
+      console.log("Error retrieving response time percentiles - " + e);
+      throw e;
+    }
+  }
+
   /**
    * Get overall metrics summary (total users, sessions, messages).
    */
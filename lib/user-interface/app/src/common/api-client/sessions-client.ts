@@ -192,9 +192,9 @@ export class SessionsClient {
     return "DONE";
   }
 
-  // Gets all sessions for admin review
-  // Return format: [{"session_id" : "string", "user_id" : "string", "time_stamp" : "dd/mm/yy", "title" : "string"}...]
-  async getAllSessions(startTime: string, endTime: string, hasFeedback: string, hasReview: string, userId: string) {
+  // Gets one page of sessions for admin review
+  // Return format: {"sessions": [{"session_id" : "string", "time_stamp" : "dd/mm/yy", "title" : "string", ...}...], "next_cursor": "string" | null}
+  async getAllSessions(startTime: string, endTime: string, hasFeedback: string, hasReview: string, userId: string, pageSize: number, cursor?: string) {
     const auth = await Utils.authenticate();
     let validData = false;
     let output = [];
@@ -216,6 +216,8 @@ export class SessionsClient {
           "has_feedback": hasFeedback,
           "has_review": hasReview,
           "user_id": userId,
+          "page_size": pageSize,
+          "cursor": cursor,
         })
       });
       if (response.status != 200) {
@@ -239,6 +241,76 @@ export class SessionsClient {
     return output;
   }
 
+  // Gets several sessions in one request so the review list can prefetch conversations (admin only)
+  // Return format: {"sessions": {"<session_id>": {..., "chat_history": [...]}}, "missing": ["string"...], "deferred": ["string"...]}
+  // Sessions listed under "deferred" did not fit in the response size limit and can be requested again
+  async getSessionsBatch(sessionIds: string[], lastNTurns?: number) {
+    const auth = await Utils.authenticate();
+    const response = await fetch(this.API + '/user-session', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Bearer ' + auth,
+      },
+      body: JSON.stringify({
+        "operation": "get_sessions_batch",
+        "session_ids": sessionIds,
+        "last_n_turns": lastNTurns,
+      })
+    });
+    if (response.status != 200) {
+      throw new Error(await response.json());
+    }
+    return await response.json();
+  }
+
+  // Searches a user's session titles; every word of the query prefix-matches a title word
+  // Return format: {"sessions": [{"session_id": "string", "title": "string", "time_stamp": "string"}], "total": number}
+  async searchSessions(userId: string, query: string, limit?: number) {
+    const auth = await Utils.authenticate();
+    const response = await fetch(this.API + '/user-session', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Bearer ' + auth,
+      },
+      body: JSON.stringify({
+        "operation": "search_sessions",
+        "user_id": userId,
+        "query": query,
+        "limit": limit,
+      })
+    });
+    if (response.status != 200) {
+      throw new Error(await response.json());
+    }
+    return await response.json();
+  }
+
+  // Pages through the reviews written by an admin (the caller when reviewedBy is omitted), newest first
+  // Return format: {"reviews": [{"review_id", "session_id", "title", "time_stamp", "comments", "reviewed_at"}], "next_cursor": "string" | null}
+  async listReviewsByReviewer(userId: string, pageSize: number, cursor?: string | null, reviewedBy?: string) {
+    const auth = await Utils.authenticate();
+    const response = await fetch(this.API + '/user-session', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': 'Bearer ' + auth,
+      },
+      body: JSON.stringify({
+        "operation": "list_reviews_by_reviewer",
+        "user_id": userId,
+        "reviewed_by": reviewedBy ?? userId,
+        "page_size": pageSize,
+        "cursor": cursor,
+      })
+    });
+    if (response.status != 200) {
+      throw new Error(await response.json());
+    }
+    return await response.json();
+  }
+
   // Creates, updates, or removes a review by an admin
   // Return format: [{"review_id": "string", "session_id" : "string", "user_id" : "string"]
   async updateReview(reviewId: string, sessionId: string, userId: string, update: boolean) {
@@ -317,14 +389,17 @@ export class SessionsClient {
       return;
     }
 
-    // Otherwise, start polling
-    const jobId = `${startTime}-${endTime}`; // Use time range as job ID
-    await this.pollForCompletion(jobId, startTime, endTime);
+    if (!result.job_id) {
+      throw new Error(result.error || 'Could not start export');
+    }
+
+    // Otherwise, poll the export job until it finishes
+    await this.pollForCompletion(result.job_id);
   }
 
-  private async pollForCompletion(jobId: string, startTime: string, endTime: string) {
+  private async pollForCompletion(jobId: string) {
     const auth = await Utils.authenticate();
-    const maxAttempts = 30; // 5 minutes total (10 seconds * 30)
+    const maxAttempts = 180; // 30 minutes total (10 seconds * 180), exports resume across invocations
     let attempts = 0;
 
     while (attempts < maxAttempts) {
@@ -338,9 +413,7 @@ export class SessionsClient {
           'Authorization': 'Bearer ' + auth,
         },
         body: JSON.stringify({
-          "operation": "download_all_sessions_csv",
-          "start_time": startTime,
-          "end_time": endTime,
+          "operation": "get_export_status",
           "job_id": jobId
         })
       });
@@ -350,9 +423,12 @@ export class SessionsClient {
         this.initiateDownload(result.download_url);
         return;
       }
+      if (result.status === 'failed') {
+        throw new Error(result.error || 'Export failed');
+      }
     }
 
-    throw new Error('Export timed out after 5 minutes');
+    throw new Error('Export timed out after 30 minutes');
   }
 
   private initiateDownload(downloadUrl: string) {
@@ -15,14 +15,22 @@ export class UserFeedbackClient {
 
     console.log(feedbackData);
     const auth = await Utils.authenticate();
-    const response = await fetch(this.API + '/user-feedback', {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-        'Authorization': auth,
-      },
-      body: JSON.stringify({ feedbackData })
-    });
+    let response;
+    // Chat turns are stored asynchronously; 409 means the message is not stored yet, so retry a few times
+    for (let attempt = 0; attempt < 4; attempt++) {
+      if (attempt > 0) {
+        await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+      }
+      response = await fetch(this.API + '/user-feedback', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+          'Authorization': auth,
+        },
+        body: JSON.stringify({ feedbackData })
+      });
+      if (response.status != 409) break;
+    }
     /** TODO: add error handling for when it does not go through successfully.
      * I neglected to do so because this is not critical functionality
      */
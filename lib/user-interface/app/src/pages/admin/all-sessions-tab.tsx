@@ -12,7 +12,9 @@ import {
   CollectionPreferences,
   Link,
   ProgressBar,
-  Alert
+  Alert,
+  NonCancelableCustomEvent,
+  PaginationProps
 } from "@cloudscape-design/components";
 import { Auth } from "aws-amplify";
 import { I18nProvider } from '@cloudscape-design/components/i18n';
@@ -60,19 +62,10 @@ export default function AllSessionsTab(props: AllSessionsTabProps) {
   const [downloadProgress, setDownloadProgress] = useState(0);
   const [downloadError, setDownloadError] = useState<string | null>(null);
 
-  const { items, collectionProps, paginationProps } = useCollection(
-    [...pages], 
+  // Pages come from the server newest-first; columns sort within the page being shown
+  const { items, collectionProps } = useCollection(
+    pages[Math.min(pages.length - 1, currentPageIndex - 1)]?.sessions ?? [],
     {
-      filtering: {
-        empty: (
-          <Box margin={{ vertical: "xs" }} textAlign="center" color="inherit">
-            <SpaceBetween size="m">
-              <b>No feedback</b>
-            </SpaceBetween>
-          </Box>
-        ),
-      },
-      pagination: { pageSize: preferences.pageSize },
       sorting: {
         defaultState: {
           sortingColumn: {
@@ -81,29 +74,34 @@ export default function AllSessionsTab(props: AllSessionsTabProps) {
           isDescending: true,
         },
       },
-      selection: {},
     }
   );
 
+  /** Loads one page of sessions. Without a cursor the first page is loaded and
+   * previously loaded pages are dropped, since the filters or data may have changed */
   const getAllSessions = useCallback(
-    async () => {
+    async (params: { cursor?: string } = {}) => {
       setLoading(true);
       let username;
       await Auth.currentAuthenticatedUser().then((value) => username = value.username);
       if (!username) return;  
       try {
-        const result = await apiClient.sessions.getAllSessions(value.startDate + "T00:00:00", value.endDate + "T23:59:59", selectedOption.value, hasReviewed.value, username)
+        const result = await apiClient.sessions.getAllSessions(value.startDate + "T00:00:00", value.endDate + "T23:59:59", selectedOption.value, hasReviewed.value, username, preferences.pageSize, params.cursor)
         needsRefresh.current = false;
-        setPages([...result]);
-        setCurrentPageIndex(1);
+        if (params.cursor) {
+          setPages((current) => [...current, result]);
+        } else {
+          setPages([result]);
+          setCurrentPageIndex(1);
+        }
       } catch (error) {
         console.log(error);
         console.error(Utils.getErrorMessage(error));
-        setPages([]);
+        if (!params.cursor) setPages([]);
       }
       setLoading(false);
     },
-    [appContext, selectedOption, value, needsRefresh, hasReviewed]
+    [appContext, selectedOption, value, needsRefresh, hasReviewed, preferences]
   );
 
   /** The getAllSessions function is a memoized function.
@@ -121,6 +119,22 @@ export default function AllSessionsTab(props: AllSessionsTabProps) {
     await getAllSessions();
   };
 
+  /** Page numbers and arrows move between loaded pages; pages not loaded yet are left to onNextPageClick */
+  const onPageChange = ({ detail }: NonCancelableCustomEvent<PaginationProps.ChangeDetail>) => {
+    if (detail.currentPageIndex <= pages.length) {
+      setCurrentPageIndex(detail.currentPageIndex);
+    }
+  };
+
+  /** Fetches the next page from the server the first time it is visited */
+  const onNextPageClick = async ({ detail }: NonCancelableCustomEvent<PaginationProps.PageClickDetail>) => {
+    const cursor = pages[pages.length - 1]?.next_cursor;
+    if (!detail.requestedPageAvailable && cursor) {
+      await getAllSessions({ cursor });
+      setCurrentPageIndex(detail.requestedPageIndex);
+    }
+  };
+
   // If isReviewed is set to true, add a review element to the DynamoDB table, if false then remove it
   const updateSelectedReview = async (isReviewed: boolean, review_id?: string, session_id?: string) => {
     if (!appContext) return;
@@ -208,8 +222,6 @@ export default function AllSessionsTab(props: AllSessionsTabProps) {
     },
   ];
 
-  console.log("Pagination props");
-  console.log(paginationProps);
   return (
     <>
       <I18nProvider locale="en" messages={[messages]}>
@@ -444,7 +456,17 @@ export default function AllSessionsTab(props: AllSessionsTabProps) {
           empty={
             <Box textAlign="center">No sessions available</Box>
           }
-          pagination={<Pagination {...paginationProps} />}
+          pagination={
+            pages.length === 0 ? null : (
+              <Pagination
+                openEnd={pages[pages.length - 1]?.next_cursor != null}
+                pagesCount={pages.length}
+                currentPageIndex={currentPageIndex}
+                onChange={onPageChange}
+                onNextPageClick={onNextPageClick}
+              />
+            )
+          }
         />
       </I18nProvider>
     </>